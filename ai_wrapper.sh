@@ -57,11 +57,20 @@ show_ai_help() {
 # Batch processing
 ./ai_wrapper.sh batch_json film_list.json
 
-# Check if film exists
+# Parallel batch processing (JSON lines, one per film as it completes)
+./ai_wrapper.sh batch film_list.json --workers 4 --rps 0.5
+
+# Check if the film's review exists (page + review content, no browser)
 ./ai_wrapper.sh check "Film Title" YEAR
 
 # Get review stats
 ./ai_wrapper.sh stats --json
+
+# Re-extract all reviews offline from the raw HTML archive (JSON lines)
+./ai_wrapper.sh reextract --workers 4
+
+# Full-text search in extracted reviews (JSON)
+./ai_wrapper.sh search "nolan bomba atomica" --limit 10
 ```
 
 ## Input Formats
@@ -117,7 +126,22 @@ check_film() {
     local title="$1"
     local year="$2"
     
-    # Test rapido con timeout ridotto (compatible con macOS)
+    # Controllo HTTP senza browser (GET della pagina del film e verifica della recensione)
+    if command -v python3 &> /dev/null && python3 -c "import requests" 2>/dev/null; then
+        python3 "$SCRIPT_DIR/mymovies_http.py" "$title" "$year" > /dev/null 2>&1
+        case $? in
+            0)
+                output_result "found" "$title" "$year" "Film exists on MyMovies.it" "" "" "" ""
+                return 0
+                ;;
+            1)
+                output_result "not_found" "$title" "$year" "Film not found or unavailable" "" "" "" ""
+                return 1
+                ;;
+        esac
+    fi
+    
+    # Fallback: estrazione completa con timeout ridotto (compatible con macOS)
     local temp_file=$(mktemp)
     "$MYMOVIES_CMD" "$title" "$year" --no-save > "$temp_file" 2>&1 &
     local pid=$!
@@ -258,6 +282,11 @@ stats_json() {
         return 1
     fi
     
+    # Indice dei metadati: niente find/du/ls sull'intera directory ad ogni chiamata
+    if command -v python3 &> /dev/null; then
+        python3 "$SCRIPT_DIR/review_index.py" stats && return 0
+    fi
+    
     local total_files=$(find "$reviews_dir" -name "*.txt" | wc -l)
     local successful_files=$(find "$reviews_dir" -name "*.txt" -size +100c | wc -l)
     local failed_files=$((total_files - successful_files))
@@ -321,6 +350,29 @@ case "$1" in
         batch_json "$2"
         ;;
     
+    "batch")
+        if [ $# -lt 2 ]; then
+            output_result "error" "" "" "Usage: batch file.json|file.txt [--workers N] [--rps R]" "" "0" "" ""
+            exit 2
+        fi
+        shift
+        python3 "$SCRIPT_DIR/batch_extract.py" "$@"
+        ;;
+    
+    "reextract")
+        shift
+        node "$SCRIPT_DIR/reextract.js" "$@"
+        ;;
+    
+    "search")
+        if [ $# -lt 2 ]; then
+            output_result "error" "" "" "Usage: search \"query\" [--limit N] [--year YEAR]" "" "0" "" ""
+            exit 2
+        fi
+        shift
+        python3 "$SCRIPT_DIR/review_search.py" "$@" --json
+        ;;
+    
     "stats")
         if [ "$2" = "--json" ]; then
             stats_json
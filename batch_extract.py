@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+MyMovies Batch Extract
+Estrazione parallela di liste di film con worker pool e rate limit globale verso mymovies.it
+
+Input: JSON come batch_example.json oppure CSV come films_example.txt
+Output: una riga JSON per film, emessa appena l'estrazione termina
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from extraction_cache import is_not_found_status
+from http_client import TokenBucket
+from review_store import ReviewStore
+from text_cleaner import normalize_title_py
+from extraction_worker import to_wrapper_result
+from search_and_extract import MyMoviesExtractor
+
+
+def load_films(path):
+    """Legge la lista film da JSON (batch_example.json) o CSV (films_example.txt)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    if path.endswith('.json') or text.lstrip().startswith('{'):
+        data = json.loads(text)
+        films = [{'title': film['title'], 'year': int(film['year'])} for film in data.get('films', [])]
+        return films, data.get('options', {})
+
+    films = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        # Il titolo puo contenere virgole: l'anno e sempre l'ultimo campo
+        title, _, year = line.rpartition(',')
+        if title and year.strip().isdigit():
+            films.append({'title': title.strip(), 'year': int(year)})
+    return films, {}
+
+
+def film_key(title, year):
+    """Chiave film coerente con i nomi file in reviews/ (slug_anno)"""
+    return f"{normalize_title_py(title)}_{year}"
+
+
+class ExtractionJournal:
+    """
+    Journal append-only degli esiti per film (una riga JSON per tentativo).
+    Alla ripartenza l'ultimo esito di ogni film decide se saltarlo o ritentarlo.
+    """
+
+    def __init__(self, path, not_found_window_days=7, reviews_dir=None):
+        self.path = path
+        self.not_found_window = not_found_window_days * 24 * 3600
+        self.reviews_dir = reviews_dir
+        # Film gia presenti nell'archivio strutturato (solo metadati, anche senza export .txt)
+        self.stored = set(ReviewStore(os.path.join(reviews_dir, 'store')).latest_metadata()) if reviews_dir else set()
+        self.latest = {}
+        self._load()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Riga troncata da un crash durante la scrittura
+                    continue
+                self.latest[entry['key']] = entry
+
+    def skip_reason(self, film):
+        """Motivo per saltare il film, o None se va estratto"""
+        key = film_key(film['title'], film['year'])
+        entry = self.latest.get(key)
+
+        if entry and entry['status'] == 'success':
+            return 'already_extracted'
+        # Solo le assenze confermate (404 o pagina 2xx senza recensione): righe scritte prima del
+        # flag notFound possono contenere errori transitori registrati come not_found
+        if (entry and entry['status'] == 'not_found' and is_not_found_status(entry.get('http_status'))
+                and time.time() - entry['recorded_at'] < self.not_found_window):
+            return 'not_found_recently'
+        if key in self.stored or (
+                self.reviews_dir and os.path.exists(os.path.join(self.reviews_dir, f"{key}_review.txt"))):
+            return 'review_exists'
+        return None
+
+    def record(self, result):
+        entry = {
+            'key': film_key(result['title'], result['year']),
+            'title': result['title'],
+            'year': result['year'],
+            'status': result['status'],
+            'message': result.get('message', ''),
+            'http_status': result.get('http_status'),
+            'recorded_at': time.time()
+        }
+        self.latest[entry['key']] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class BatchExtractor:
+    def __init__(self, extractor, workers=4, requests_per_second=0.5, save_files=True, journal=None, force=False):
+        self.extractor = extractor
+        self.force = force
+        self.workers = max(1, workers)
+        self.save_files = save_files
+        self.journal = journal
+        # Limite globale verso mymovies.it, condiviso da tutti i worker
+        self.limiter = TokenBucket(requests_per_second, burst=1)
+
+    def _extract(self, index, film):
+        started = time.time()
+        # I risultati in cache non toccano mymovies.it: niente attesa sul rate limit
+        cached = None if self.force or not self.extractor.cache else self.extractor.cache.get(film['title'], film['year'])
+        try:
+            if cached:
+                result = to_wrapper_result(cached, film['title'], film['year'])
+            else:
+                # Cache gia consultata qui sopra
+                self.limiter.acquire()
+                result = self.extractor.extract_review(film['title'], film['year'],
+                                                       no_save=not self.save_files, force=True)
+        except Exception as e:
+            result = {'status': 'error', 'title': film['title'], 'year': film['year'], 'message': str(e)}
+
+        result.setdefault('title', film['title'])
+        result.setdefault('year', film['year'])
+        result['index'] = index
+        result['elapsed_ms'] = int((time.time() - started) * 1000)
+        return result
+
+    def run(self, films):
+        """
+        Estrae i film in parallelo e restituisce i risultati man mano che terminano.
+        Se il consumatore si interrompe (Ctrl-C, close() del generatore) le estrazioni non
+        ancora avviate vengono annullate: si attendono solo quelle gia in corso.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = []
+            for i, film in enumerate(films):
+                reason = self.journal.skip_reason(film) if self.journal else None
+                if reason:
+                    yield {'status': 'skipped', 'title': film['title'], 'year': film['year'],
+                           'message': reason, 'index': i}
+                    continue
+                futures.append(executor.submit(self._extract, i, film))
+
+            for future in as_completed(futures):
+                result = future.result()
+                if self.journal:
+                    self.journal.record(result)
+                yield result
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description='Estrazione batch parallela di recensioni MyMovies')
+    parser.add_argument('input', help='File JSON (come batch_example.json) o CSV Titolo,Anno (come films_example.txt)')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('MYMOVIES_BATCH_WORKERS', '4')),
+                        help='Estrazioni concorrenti (default: 4)')
+    parser.add_argument('--rps', type=float, default=None,
+                        help='Richieste/secondo verso mymovies.it (default: da options.rate_limit, altrimenti 0.5)')
+    parser.add_argument('--no-save', action='store_true', help='Non salvare i file recensione')
+    parser.add_argument('--journal', default=None,
+                        help='Journal degli esiti per riprendere il batch (default: <input>.journal.jsonl)')
+    parser.add_argument('--not-found-window', type=float, default=7,
+                        help='Giorni in cui un not_found non viene ritentato (default: 7)')
+    parser.add_argument('--no-resume', action='store_true',
+                        help='Ignora journal e recensioni esistenti ed estrai tutto')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignora la cache dei risultati e rifai ogni estrazione')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(json.dumps({'status': 'error', 'message': f'File not found: {args.input}'}))
+        sys.exit(2)
+
+    films, options = load_films(args.input)
+
+    # options.rate_limit (ms tra film) diventa un tetto di richieste/secondo
+    rps = args.rps
+    if rps is None:
+        rate_limit_ms = options.get('rate_limit', 2000)
+        rps = 1000.0 / rate_limit_ms if rate_limit_ms else 0
+    save_files = options.get('save_files', True) and not args.no_save
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    journal = None
+    if not args.no_resume:
+        journal = ExtractionJournal(
+            args.journal or f"{args.input}.journal.jsonl",
+            not_found_window_days=args.not_found_window,
+            reviews_dir=os.path.join(script_dir, 'reviews') if save_files else None
+        )
+
+    extractor = MyMoviesExtractor(script_dir, worker_concurrency=args.workers)
+    batch = BatchExtractor(extractor, workers=args.workers, requests_per_second=rps,
+                           save_files=save_files, journal=journal, force=args.force)
+
+    started = time.time()
+    counts = {}
+
+    results = batch.run(films)
+    try:
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    except KeyboardInterrupt:
+        print("\nInterrotto", file=sys.stderr)
+    finally:
+        # Annulla subito le estrazioni in coda (il generatore interrotto non lo farebbe da solo)
+        results.close()
+        extractor.close()
+        if journal:
+            journal.close()
+
+    summary = {
+        'batch_completed': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'films': len(films),
+        'results': counts,
+        'wall_time_s': round(time.time() - started, 2)
+    }
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
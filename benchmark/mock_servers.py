@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Server finti per i benchmark: API TMDB e mymovies.it in locale
+
+- catalogo di film sintetico (deterministico, --films N); una parte non ha pagina su MyMovies (404)
+- pagine MyMovies registrate: con --archive-dir si servono le pagine dell'archivio HTML
+  (html_archive.js, MYMOVIES_ARCHIVE=1), altrimenti pagine sintetiche con la stessa struttura
+- latenza (media + jitter) ed errori (500 su MyMovies, 429 con Retry-After su TMDB) configurabili
+- elenchi /movie/now_playing e /movie/upcoming (20 film per pagina) per prewarm.py
+
+Uso autonomo:
+  python3 benchmark/mock_servers.py --latency-ms 80 --error-rate 0.02
+  -> stampa {"tmdb": "http://127.0.0.1:PORT/3", "mymovies": "http://127.0.0.1:PORT"}
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_cleaner import fold_accents, normalize_title_py  # noqa: E402
+
+WORDS = ['ombra', 'notte', 'citta', 'mare', 'fuoco', 'silenzio', 'strada', 'cuore', 'tempo', 'vento',
+         'luce', 'inverno', 'guerra', 'sogno', 'ritorno', 'confine', 'memoria', 'deserto', 'isola', 'segreto']
+LIST_SIZE = 60
+LIST_PAGE_SIZE = 20
+REVIEW_SENTENCE = ("Il film costruisce con pazienza un racconto che alterna intimita e grande spettacolo, "
+                   "e la regia trova nel montaggio il suo strumento piu efficace. ")
+
+
+class MockConfig:
+    def __init__(self, latency_ms=50, jitter_ms=20, error_rate=0.0, films=200, not_found_rate=0.1,
+                 page_kb=150, seed=42, archive_dir=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.page_kb = page_kb
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {'tmdb': 0, 'mymovies': 0, 'errors': 0}
+        self.catalog = build_catalog(films, not_found_rate, seed)
+        self.recorded = load_recorded_pages(archive_dir) if archive_dir else {}
+
+    def delay(self):
+        """Attesa simulata e decisione di errore (sotto lock: sequenza riproducibile)"""
+        with self.lock:
+            wait = max(0.0, self.random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            fail = self.random.random() < self.error_rate
+        time.sleep(wait)
+        return fail
+
+    def count(self, name, error=False):
+        with self.lock:
+            self.counters[name] += 1
+            if error:
+                self.counters['errors'] += 1
+
+
+def build_catalog(count, not_found_rate, seed):
+    """Film sintetici: titoli di due o tre parole, anni 1990-2024, regista, presenza su MyMovies"""
+    rng = random.Random(seed)
+    films = []
+    for index in range(count):
+        title = ' '.join(rng.choice(WORDS).capitalize() if i == 0 else rng.choice(WORDS)
+                         for i in range(rng.choice((2, 3)))) + f" {index}"
+        films.append({
+            'id': 1000 + index,
+            'title': title,
+            'original_title': title,
+            'year': rng.randint(1990, 2024),
+            'director': f"Regista {index % 37}",
+            'on_mymovies': rng.random() >= not_found_rate
+        })
+    return films
+
+
+def load_recorded_pages(archive_dir):
+    """Pagine registrate dall'archivio HTML: percorso URL -> HTML"""
+    pages = {}
+    for ref_path in glob.glob(os.path.join(archive_dir, 'refs', '*.json')):
+        try:
+            with open(ref_path, 'r', encoding='utf-8') as f:
+                ref = json.load(f)
+            object_path = os.path.join(archive_dir, 'objects', ref['sha256'][:2], f"{ref['sha256']}.html.gz")
+            with gzip.open(object_path, 'rt', encoding='utf-8') as f:
+                pages[urlparse(ref['url']).path] = f.read()
+        except (OSError, ValueError, KeyError):
+            continue
+    return pages
+
+
+def synthetic_page(film, page_kb):
+    """Pagina con la struttura di mymovies.it (metadati, p.corpo) e zavorra di script/markup"""
+    paragraphs = ''.join(f"<p class=\"corpo\">{REVIEW_SENTENCE * 6}</p>" for _ in range(4))
+    filler_unit = '<script>window.__ads=window.__ads||[];__ads.push({slot:"top",size:[728,90]});</script>' \
+                  '<div class="nav"><a href="/film/">Film</a><a href="/cinema/">Cinema</a></div>\n'
+    filler = filler_unit * max(1, (page_kb * 1024) // len(filler_unit))
+    return (f"<!DOCTYPE html><html><head><title>{film['title']} - Film ({film['year']}) - MYmovies.it</title>"
+            f"</head><body>{filler}<div id=\"recensione\"><span class=\"autore\">Recensione di Paola Casella</span>"
+            f"<br> domenica 23 luglio 2023 {paragraphs}</div>{filler}</body></html>")
+
+
+def make_handler(config, kind):
+    by_path = {f"/film/{film['year']}/{normalize_title_py(film['title'])}/": film for film in config.catalog}
+    by_id = {str(film['id']): film for film in config.catalog}
+    # Elenchi in sala / in uscita: due fette distinte del catalogo
+    lists = {'now_playing': config.catalog[:LIST_SIZE], 'upcoming': config.catalog[LIST_SIZE:2 * LIST_SIZE]}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body=b'', content_type='application/json', headers=None, head=False):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+
+        def do_HEAD(self):
+            self.do_GET(head=True)
+
+        def do_GET(self, head=False):
+            failed = config.delay()
+            config.count(kind, failed)
+            url = urlparse(self.path)
+
+            if kind == 'tmdb':
+                if failed:
+                    return self._send(429, b'{}', headers={'Retry-After': '0.1'}, head=head)
+                return self._tmdb(url, head)
+
+            if failed:
+                return self._send(500, b'error', 'text/html', head=head)
+            path = url.path if url.path.endswith('/') else url.path + '/'
+            film = by_path.get(path)
+            html = config.recorded.get(path)
+            if html is None and film and film['on_mymovies']:
+                html = synthetic_page(film, config.page_kb)
+            if html is None:
+                return self._send(404, b'Not found', 'text/html', head=head)
+            self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8', head=head)
+
+        def _tmdb(self, url, head):
+            params = parse_qs(url.query)
+            if url.path.endswith('/search/movie'):
+                tokens = fold_accents(params.get('query', [''])[0].lower()).split()
+                matches = [film for film in config.catalog
+                           if all(token in fold_accents(film['title'].lower()) for token in tokens)]
+                body = {'page': 1, 'total_results': len(matches), 'results': [{
+                    'id': film['id'], 'title': film['title'], 'original_title': film['original_title'],
+                    'release_date': f"{film['year']}-05-01", 'overview': 'Trama di prova.',
+                    'vote_average': 7.1, 'poster_path': f"/{film['id']}.jpg"} for film in matches[:20]]}
+            elif url.path.startswith('/3/movie/') and url.path.rsplit('/', 1)[-1] in lists:
+                films = lists[url.path.rsplit('/', 1)[-1]]
+                page = int(params.get('page', ['1'])[0])
+                chunk = films[(page - 1) * LIST_PAGE_SIZE:page * LIST_PAGE_SIZE]
+                body = {'page': page, 'total_results': len(films),
+                        'total_pages': max(1, -(-len(films) // LIST_PAGE_SIZE)), 'results': [{
+                            'id': film['id'], 'title': film['title'], 'original_title': film['original_title'],
+                            'release_date': f"{film['year']}-05-01", 'overview': 'Trama di prova.',
+                            'vote_average': 7.1, 'popularity': round(1000.0 / (film['id'] - 999), 2),
+                            'poster_path': f"/{film['id']}.jpg"} for film in chunk]}
+            elif url.path.startswith('/3/movie/') and url.path.rsplit('/', 1)[-1] in by_id:
+                film = by_id[url.path.rsplit('/', 1)[-1]]
+                body = {'id': film['id'], 'runtime': 110, 'genres': [{'name': 'Drammatico'}],
+                        'credits': {'crew': [{'job': 'Director', 'name': film['director']}]}}
+            else:
+                return self._send(404, b'{}', head=head)
+            self._send(200, json.dumps(body).encode('utf-8'), head=head)
+
+    return Handler
+
+
+def start_mock_servers(config):
+    """Avvia i due server in thread daemon: restituisce (tmdb_url, mymovies_url, servers)"""
+    servers = []
+    for kind in ('tmdb', 'mymovies'):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(config, kind))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    tmdb_url = f"http://127.0.0.1:{servers[0].server_address[1]}/3"
+    mymovies_url = f"http://127.0.0.1:{servers[1].server_address[1]}"
+    return tmdb_url, mymovies_url, servers
+
+
+def add_mock_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=50, help='Latenza media per risposta (default: 50)')
+    parser.add_argument('--jitter-ms', type=float, default=20, help='Deviazione standard della latenza (default: 20)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Frazione di risposte in errore (default: 0)')
+    parser.add_argument('--films', type=int, default=200, help='Film nel catalogo finto (default: 200)')
+    parser.add_argument('--not-found-rate', type=float, default=0.1, help='Film senza pagina MyMovies (default: 0.1)')
+    parser.add_argument('--page-kb', type=int, default=150, help='Dimensione pagine sintetiche in KB (default: 150)')
+    parser.add_argument('--archive-dir', default=None, help='Serve le pagine registrate di questo archivio HTML')
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def config_from_args(args):
+    return MockConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                      films=args.films, not_found_rate=args.not_found_rate, page_kb=args.page_kb,
+                      seed=args.seed, archive_dir=args.archive_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Server finti TMDB e mymovies.it per i benchmark')
+    add_mock_arguments(parser)
+    config = config_from_args(parser.parse_args())
+    tmdb_url, mymovies_url, _ = start_mock_servers(config)
+    print(json.dumps({'tmdb': tmdb_url, 'mymovies': mymovies_url}), flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
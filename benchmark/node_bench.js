@@ -0,0 +1,133 @@
+#!/usr/bin/env node
+
+/**
+ * Scenari Node dei benchmark (lanciati da run_benchmark.py, che misura RSS e tempo del processo)
+ *
+ *   node benchmark/node_bench.js extract FILMS.json --concurrency 4
+ *   node benchmark/node_bench.js search-service QUERIES.json
+ *
+ * Stampa un oggetto JSON su stdout; i log dell'estrattore vanno su stderr.
+ */
+
+const fs = require('fs');
+const path = require('path');
+
+const ROOT = path.join(__dirname, '..');
+
+// stdout e riservato al risultato
+console.log = (...args) => console.error(...args);
+
+function percentiles(values) {
+    const sorted = [...values].sort((a, b) => a - b);
+    const pick = p => sorted.length ? sorted[Math.min(sorted.length - 1, Math.ceil(p / 100 * sorted.length) - 1)] : null;
+    const round = value => value === null ? null : Math.round(value * 100) / 100;
+    return {
+        count: sorted.length,
+        p50: round(pick(50)),
+        p90: round(pick(90)),
+        p99: round(pick(99)),
+        max: round(sorted[sorted.length - 1] ?? null),
+        mean: round(sorted.length ? sorted.reduce((sum, value) => sum + value, 0) / sorted.length : null)
+    };
+}
+
+function elapsedMs(start) {
+    return Number(process.hrtime.bigint() - start) / 1e6;
+}
+
+/**
+ * extractMovieReview su tutti i film, con al massimo `concurrency` estrazioni in corso
+ */
+async function benchExtract(films, concurrency) {
+    const { extractMovieReview, launchBrowser } = require(path.join(ROOT, 'mymovies_extractor'));
+    // Browser condiviso avviato solo se il livello HTTP non basta (come extraction_worker.js)
+    let browserPromise = null;
+    const getBrowser = () => browserPromise || (browserPromise = launchBrowser({ headless: true }));
+    const latencies = [];
+    const outcomes = {};
+    const tiers = {};
+    let next = 0;
+
+    const worker = async () => {
+        while (next < films.length) {
+            const film = films[next++];
+            const start = process.hrtime.bigint();
+            const result = await extractMovieReview(film.title, film.year, { noSave: true, browser: getBrowser });
+            latencies.push(elapsedMs(start));
+
+            const outcome = result.success ? 'success' : (result.notFound ? 'not_found' : 'error');
+            outcomes[outcome] = (outcomes[outcome] || 0) + 1;
+            if (result.metadata.tier) tiers[result.metadata.tier] = (tiers[result.metadata.tier] || 0) + 1;
+        }
+    };
+
+    const start = process.hrtime.bigint();
+    await Promise.all(Array.from({ length: Math.min(concurrency, films.length) }, worker));
+    const wallMs = elapsedMs(start);
+    if (browserPromise) {
+        const browser = await browserPromise.catch(() => null);
+        if (browser) await browser.close();
+    }
+
+    return {
+        films: films.length,
+        concurrency,
+        wall_ms: Math.round(wallMs),
+        throughput_per_s: Math.round(films.length / (wallMs / 1000) * 100) / 100,
+        latency_ms: percentiles(latencies),
+        outcomes,
+        tiers
+    };
+}
+
+/**
+ * Ricerca TMDB passando dal servizio Python persistente (stesso percorso di /api/search)
+ */
+async function benchSearchService(queries) {
+    const { SearchServiceClient } = require(path.join(ROOT, 'search_service'));
+    const client = new SearchServiceClient();
+
+    let start = process.hrtime.bigint();
+    await client.request('GET', '/health');
+    const startupMs = elapsedMs(start);
+
+    const latencies = [];
+    let failures = 0;
+    for (const query of queries) {
+        start = process.hrtime.bigint();
+        const { status } = await client.searchMovies(query, 10);
+        latencies.push(elapsedMs(start));
+        if (status !== 200) failures++;
+    }
+
+    client.stop();
+    return {
+        queries: queries.length,
+        startup_ms: Math.round(startupMs),
+        latency_ms: percentiles(latencies),
+        failures
+    };
+}
+
+async function main() {
+    const [scenario, inputPath] = process.argv.slice(2);
+    const concurrencyIndex = process.argv.indexOf('--concurrency');
+    const concurrency = concurrencyIndex !== -1 ? parseInt(process.argv[concurrencyIndex + 1]) : 4;
+    const input = JSON.parse(fs.readFileSync(inputPath, 'utf8'));
+
+    let result;
+    if (scenario === 'extract') {
+        result = await benchExtract(input, concurrency);
+    } else if (scenario === 'search-service') {
+        result = await benchSearchService(input);
+    } else {
+        throw new Error(`Scenario sconosciuto: ${scenario}`);
+    }
+
+    process.stdout.write(JSON.stringify(result) + '\n');
+}
+
+main().catch(error => {
+    console.error('Errore benchmark:', error.message);
+    process.exit(1);
+});
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Benchmark dei percorsi Python e Node contro server finti locali (benchmark/mock_servers.py)
+
+Ogni scenario gira in un processo separato: tempo totale e RSS di picco vengono misurati
+dall'esterno (wait4), cosi i numeri sono confrontabili tra commit diversi.
+
+Scenari:
+  search-python    TMDBMovieSearch.search_movies in processo (cache TMDB disattivata)
+  search-service   ricerca tramite search_service.js -> search_service.py (percorso di /api/search)
+  extract-node     extractMovieReview con N estrazioni concorrenti
+  extract-python   MyMoviesExtractor.extract_review con worker persistente e N thread
+  batch            batch_extract.py sull'intera lista (--force --no-save)
+
+Uso:
+  python3 benchmark/run_benchmark.py --output bench.json
+  python3 benchmark/run_benchmark.py --latency-ms 120 --error-rate 0.05 --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+from mock_servers import add_mock_arguments, config_from_args, start_mock_servers  # noqa: E402
+
+SCENARIOS = ['search-python', 'search-service', 'extract-node', 'extract-python', 'batch']
+# Metriche confrontate con --compare: (percorso nel risultato, piu alto e meglio)
+COMPARED_METRICS = [
+    ('latency_ms.p50', False), ('latency_ms.p90', False), ('latency_ms.p99', False),
+    ('throughput_per_s', True), ('wall_ms', False), ('peak_rss_mb', False)
+]
+
+
+def percentiles(values):
+    """Stesso calcolo (nearest-rank) di node_bench.js"""
+    ordered = sorted(values)
+    if not ordered:
+        return {'count': 0, 'p50': None, 'p90': None, 'p99': None, 'max': None, 'mean': None}
+
+    def pick(p):
+        return round(ordered[min(len(ordered) - 1, max(0, -(-p * len(ordered) // 100) - 1))], 2)
+
+    return {'count': len(ordered), 'p50': pick(50), 'p90': pick(90), 'p99': pick(99),
+            'max': round(ordered[-1], 2), 'mean': round(sum(ordered) / len(ordered), 2)}
+
+
+# --- Scenari eseguiti nel processo figlio (--child) -------------------------------------------
+
+def child_search_python(queries, concurrency):
+    from search_and_extract import TMDBMovieSearch
+
+    tmdb = TMDBMovieSearch(cache=False)
+    latencies = []
+    empty = 0
+    for query in queries:
+        started = time.perf_counter()
+        if not tmdb.search_movies(query, 10):
+            empty += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {'queries': len(queries), 'latency_ms': percentiles(latencies), 'empty_results': empty}
+
+
+def child_extract_python(films, concurrency):
+    from search_and_extract import MyMoviesExtractor
+
+    extractor = MyMoviesExtractor(ROOT, worker_concurrency=concurrency, use_cache=False)
+    latencies = []
+    outcomes = {}
+
+    def extract(film):
+        started = time.perf_counter()
+        result = extractor.extract_review(film['title'], film['year'], no_save=True, force=True)
+        return (time.perf_counter() - started) * 1000, result.get('status')
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for latency, status in executor.map(extract, films):
+                latencies.append(latency)
+                outcomes[status] = outcomes.get(status, 0) + 1
+    finally:
+        extractor.close()
+    wall = time.perf_counter() - started
+
+    return {'films': len(films), 'concurrency': concurrency, 'wall_ms': round(wall * 1000),
+            'throughput_per_s': round(len(films) / wall, 2), 'latency_ms': percentiles(latencies),
+            'outcomes': outcomes}
+
+
+CHILD_SCENARIOS = {'search-python': child_search_python, 'extract-python': child_extract_python}
+
+
+# --- Processo principale ----------------------------------------------------------------------
+
+def run_measured(cmd, env, stdout_json=True):
+    """Esegue il comando e restituisce (risultato JSON da stdout, secondi, RSS di picco in MB)"""
+    started = time.perf_counter()
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        process = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=out, stderr=err)
+        # wait4: rusage del figlio e dei suoi discendenti attesi (worker Node, servizio di ricerca)
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        elapsed = time.perf_counter() - started
+        out.seek(0)
+        err.seek(0)
+        output = out.read().decode('utf-8', 'replace')
+        errors = err.read().decode('utf-8', 'replace')
+
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} terminato con codice {process.returncode}: {errors.strip()[-500:]}")
+
+    # ru_maxrss e in KB su Linux, in byte su macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    peak_rss_mb = round(rusage.ru_maxrss / divisor, 1)
+    result = json.loads(output.strip().splitlines()[-1]) if stdout_json else {'stdout_lines': len(output.splitlines())}
+    return result, elapsed, peak_rss_mb
+
+
+def pick_workload(config, args):
+    """Film (con e senza pagina MyMovies) e query di ricerca, deterministici dato il seed"""
+    rng = random.Random(args.seed)
+    films = rng.sample(config.catalog, min(args.extractions, len(config.catalog)))
+    queries = [' '.join(rng.choice(config.catalog)['title'].split()[:2]).lower() for _ in range(args.queries)]
+    return [{'title': film['title'], 'year': film['year']} for film in films], queries
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def lookup(result, dotted):
+    for part in dotted.split('.'):
+        if not isinstance(result, dict) or part not in result:
+            return None
+        result = result[part]
+    return result
+
+
+def compare(current, baseline_path):
+    """Variazione percentuale delle metriche principali rispetto a un risultato precedente"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    rows = []
+    for name, scenario in current['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous or 'error' in scenario or 'error' in previous:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            new, old = lookup(scenario, metric), lookup(previous, metric)
+            if new is None or not old:
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if higher_is_better else change < 0
+            rows.append({'scenario': name, 'metric': metric, 'baseline': old, 'current': new,
+                         'change_pct': round(change, 1), 'better': better if abs(change) >= 1 else None})
+    return {'baseline': baseline.get('revision'), 'rows': rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark contro server TMDB/MyMovies finti')
+    add_mock_arguments(parser)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"Scenari separati da virgola (default: tutti: {','.join(SCENARIOS)})")
+    parser.add_argument('--queries', type=int, default=30, help='Ricerche per scenario di ricerca (default: 30)')
+    parser.add_argument('--extractions', type=int, default=40, help='Film per scenario di estrazione (default: 40)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Estrazioni concorrenti (default: 4)')
+    parser.add_argument('--output', help='Scrive il risultato JSON anche su file')
+    parser.add_argument('--compare', help='Risultato JSON precedente da confrontare')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--input', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            workload = json.load(f)
+        print(json.dumps(CHILD_SCENARIOS[args.child](workload, args.concurrency)))
+        return
+
+    config = config_from_args(args)
+    tmdb_url, mymovies_url, servers = start_mock_servers(config)
+    films, queries = pick_workload(config, args)
+
+    work_dir = tempfile.mkdtemp(prefix='mymovies-bench-')
+    films_path = os.path.join(work_dir, 'films.json')
+    queries_path = os.path.join(work_dir, 'queries.json')
+    batch_path = os.path.join(work_dir, 'films.txt')
+    with open(films_path, 'w', encoding='utf-8') as f:
+        json.dump(films, f)
+    with open(queries_path, 'w', encoding='utf-8') as f:
+        json.dump(queries, f)
+    with open(batch_path, 'w', encoding='utf-8') as f:
+        f.writelines(f"{film['title']},{film['year']}\n" for film in films)
+
+    # Nessuna cache e nessun file scritto: ogni esecuzione misura lo stesso lavoro
+    env = dict(os.environ,
+               TMDB_BASE_URL=tmdb_url, TMDB_API_KEY='benchmark', TMDB_CACHE='0',
+               MYMOVIES_BASE_URL=mymovies_url, MYMOVIES_EXTRACTION_CACHE='0', MYMOVIES_ARCHIVE='0',
+               MYMOVIES_RATE_LIMIT='0', MYMOVIES_SERVER_URL='', SEARCH_SERVICE_URL='',
+               MYMOVIES_SEARCH_SERVICE_PORT='0', MYMOVIES_WORKER_LOG=os.path.join(work_dir, 'worker.log'))
+
+    python_child = [sys.executable, os.path.abspath(__file__), '--concurrency', str(args.concurrency), '--child']
+    node_bench = ['node', os.path.join(BENCH_DIR, 'node_bench.js')]
+    commands = {
+        'search-python': python_child + ['search-python', '--input', queries_path],
+        'search-service': node_bench + ['search-service', queries_path],
+        'extract-node': node_bench + ['extract', films_path, '--concurrency', str(args.concurrency)],
+        'extract-python': python_child + ['extract-python', '--input', films_path],
+        'batch': [sys.executable, os.path.join(ROOT, 'batch_extract.py'), batch_path, '--workers',
+                  str(args.concurrency), '--rps', '0', '--no-save', '--no-resume', '--force']
+    }
+
+    results = {}
+    for name in [name.strip() for name in args.scenarios.split(',') if name.strip()]:
+        if name not in commands:
+            parser.error(f"Scenario sconosciuto: {name}")
+        print(f"▶ {name}...", file=sys.stderr, flush=True)
+        try:
+            result, elapsed, peak_rss_mb = run_measured(commands[name], env, stdout_json=name != 'batch')
+            if name == 'batch':
+                result = {'films': len(films), 'wall_ms': round(elapsed * 1000),
+                          'throughput_per_s': round(len(films) / elapsed, 2), 'workers': args.concurrency}
+            result['process_wall_ms'] = round(elapsed * 1000)
+            result['peak_rss_mb'] = peak_rss_mb
+        except (RuntimeError, OSError, ValueError) as e:
+            result = {'error': str(e)}
+        results[name] = result
+
+    for server in servers:
+        server.shutdown()
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpus': os.cpu_count()},
+        'mock': {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'error_rate': args.error_rate,
+                 'films': args.films, 'not_found_rate': args.not_found_rate, 'page_kb': args.page_kb,
+                 'recorded_pages': len(config.recorded), 'seed': args.seed, 'requests': config.counters},
+        'workload': {'queries': len(queries), 'extractions': len(films), 'concurrency': args.concurrency},
+        'scenarios': results
+    }
+    if args.compare:
+        report['comparison'] = compare(report, args.compare)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
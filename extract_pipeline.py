@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Pipeline non interattiva di search_and_extract.py (--jsonl)
+
+Legge una riga JSON per film da stdin o da file e per ognuna esegue
+ricerca TMDB -> risoluzione URL MyMovies -> estrazione, con al massimo --in-flight
+record in lavorazione: l'input viene letto solo quando si libera un posto, quindi la
+memoria resta costante qualunque sia la lunghezza dell'input.
+
+Input (una riga per record):
+  {"query": "dune parte due"}                       ricerca, primo risultato
+  {"query": "dune", "year": 2021, "pick": 2}        filtro per anno / n-esimo risultato
+  {"title": "Dune", "year": 2021, "tmdb_id": 438631, "original_title": "Dune"}
+  dune parte due                                    riga non JSON = query
+
+Output: una riga JSON per record appena termina (ordine di completamento, campo "index"),
+con i campi di ai_wrapper.sh piu "input", "tmdb_id", "url" ed "elapsed_ms".
+Stati: success, not_found, error, no_match (nessun risultato TMDB), resolved (--resolve-only).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from http_client import TokenBucket
+from mymovies_http import MyMoviesResolver
+from search_and_extract import MyMoviesExtractor, TMDBMovieSearch
+from tmdb_cache import TMDBCache
+
+
+def parse_record(line):
+    """Riga di input -> dict con 'query' oppure 'title'/'year' (None per righe vuote o commenti)"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{'):
+        record = json.loads(line)
+        if not record.get('query') and not (record.get('title') and record.get('year')):
+            raise ValueError("Record senza 'query' ne 'title'/'year'")
+        return record
+    return {'query': line}
+
+
+class ExtractionPipeline:
+    def __init__(self, extractor, resolver, tmdb=None, workers=4, max_in_flight=None,
+                 requests_per_second=0.5, save_files=True, force=False, extract=True):
+        self.extractor = extractor
+        self.resolver = resolver
+        self.tmdb = tmdb
+        self.workers = max(1, workers)
+        self.max_in_flight = max(self.workers, max_in_flight or self.workers * 2)
+        self.save_files = save_files
+        self.force = force
+        self.extract = extract
+        # Limite globale verso mymovies.it per le estrazioni (le verifiche hanno il limiter del checker)
+        self.limiter = TokenBucket(requests_per_second, burst=1)
+        # Conteggio per stato dell'ultima run(), parziale se interrotta
+        self.counts = {}
+
+    def _select(self, record):
+        """Film TMDB per una query: primo risultato (o 'pick'), filtrato per 'year' se presente"""
+        if not self.tmdb:
+            raise ValueError('TMDB_API_KEY non impostata: servono record con title/year')
+        movies, _ = self.tmdb.search_movies_light(record['query'], 20)
+        if record.get('year'):
+            movies = [movie for movie in movies if movie['year'] == str(record['year'])]
+        pick = int(record.get('pick', 1))
+        return movies[pick - 1] if 0 < pick <= len(movies) else None
+
+    def process(self, index, record):
+        """Ricerca -> risoluzione -> estrazione di un record; non solleva eccezioni"""
+        started = time.time()
+        result = {'index': index, 'input': record}
+
+        try:
+            if record.get('query'):
+                movie = self._select(record)
+                if not movie:
+                    result.update(status='no_match', message='Nessun risultato TMDB')
+                    return result
+                film = {'title': movie['title'], 'year': movie['year'],
+                        'original_title': movie['original_title'], 'tmdb_id': movie['id']}
+            else:
+                film = {'title': record['title'], 'year': str(record['year']),
+                        'original_title': record.get('original_title'), 'tmdb_id': record.get('tmdb_id')}
+            result['tmdb_id'] = film['tmdb_id']
+
+            resolved = self.resolver.resolve(film['title'], film['year'], film['original_title'],
+                                             tmdb_id=film['tmdb_id'])
+            result.update(title=resolved['title'], year=resolved['year'], url=resolved['url'])
+            if not resolved['found']:
+                result.update(status='error' if resolved['error'] else 'not_found',
+                              message=resolved['error'] or 'Film non trovato su MyMovies.it')
+            elif not self.extract:
+                result['status'] = 'resolved'
+            else:
+                self.limiter.acquire()
+                extracted = self.extractor.extract_review(resolved['title'], resolved['year'],
+                                                          no_save=not self.save_files, force=self.force)
+                result.update({key: value for key, value in extracted.items() if key not in ('title', 'year')})
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            result.update(status='error', message=str(e))
+        except Exception as e:
+            result.update(status='error', message=f"{type(e).__name__}: {e}")
+        finally:
+            result['elapsed_ms'] = int((time.time() - started) * 1000)
+        return result
+
+    def run(self, lines, emit):
+        """
+        Elabora le righe (iterabile letto pigramente) chiamando emit(risultato) a ogni
+        completamento; restituisce il conteggio per stato (anche in self.counts).
+        Su interruzione (Ctrl-C) annulla i record in coda, attende quelli in corso e rilancia:
+        self.counts resta valido con i risultati emessi fino a quel momento.
+        """
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        emit_lock = threading.Lock()
+        counts = self.counts = {}
+
+        def finished(future):
+            try:
+                if future.cancelled():
+                    return
+                result = future.result()
+                with emit_lock:
+                    counts[result['status']] = counts.get(result['status'], 0) + 1
+                    emit(result)
+            finally:
+                slots.release()
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            for index, line in enumerate(lines):
+                try:
+                    record = parse_record(line)
+                except ValueError as e:
+                    # Riga non valida: esito immediato, senza occupare un posto
+                    with emit_lock:
+                        counts['error'] = counts.get('error', 0) + 1
+                        emit({'index': index, 'input': line.strip(), 'status': 'error', 'message': str(e)})
+                    continue
+                if record is None:
+                    continue
+                # Attende un posto libero prima di leggere la riga successiva
+                slots.acquire()
+                executor.submit(self.process, index, record).add_done_callback(finished)
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+        return counts
+
+
+def run_jsonl(args):
+    """Modalita --jsonl di search_and_extract.py"""
+    # stdout riservato ai risultati: eventuali messaggi delle librerie vanno su stderr
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    cache = TMDBCache() if os.getenv('TMDB_CACHE', '1') != '0' else None
+    api_key = args.api_key or os.getenv('TMDB_API_KEY')
+    tmdb = TMDBMovieSearch(api_key, cache=cache) if api_key else None
+    extractor = MyMoviesExtractor(script_dir, worker_concurrency=args.workers) if not args.resolve_only else None
+    resolver = MyMoviesResolver(extractor.checker if extractor else None, cache=cache)
+
+    pipeline = ExtractionPipeline(extractor, resolver, tmdb=tmdb, workers=args.workers,
+                                  max_in_flight=args.in_flight, requests_per_second=args.rps,
+                                  save_files=not args.no_save, force=args.force, extract=not args.resolve_only)
+
+    def emit(result):
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+        out.flush()
+
+    started = time.time()
+    interrupted = False
+    source = sys.stdin if args.jsonl == '-' else open(args.jsonl, 'r', encoding='utf-8')
+    try:
+        pipeline.run(source, emit)
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\nInterrotto", file=sys.stderr)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if extractor:
+            extractor.close()
+
+    counts = pipeline.counts
+    summary = {
+        'pipeline_completed': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'results': counts,
+        'interrupted': interrupted,
+        'wall_time_s': round(time.time() - started, 2)
+    }
+    print(json.dumps(summary), file=sys.stderr)
+    # 130: convenzione della shell per l'interruzione con Ctrl-C
+    if interrupted:
+        return 130
+    return 0 if not counts.get('error') else 1
@@ -0,0 +1,195 @@
+#!/usr/bin/env node
+
+const fs = require('fs');
+const path = require('path');
+const { writeFileAtomic } = require('./html_archive');
+const { getReviewStore, reviewKey } = require('./review_store');
+const { normalizeFilmTitle } = require('./text_cleaner');
+
+/**
+ * Cache dei risultati di estrazione, per film (slug normalizzato + anno)
+ *
+ * .cache/extraction_cache/<slug>_<anno>.json  { key, status: success|not_found, cachedAt, result }
+ *
+ * - success: risultato completo di extractMovieReview (recensione salvata), valido per
+ *   MYMOVIES_CACHE_MAX_AGE_DAYS (default 30); in assenza di voce si usa l'archivio recensioni
+ * - not_found: risultato con notFound (404, o pagina caricata con 2xx ma senza recensione), valido per
+ *   MYMOVIES_CACHE_NOT_FOUND_DAYS (default 7)
+ * - gli errori transitori (5xx, 429, 403, pagina bloccata o senza risposta) non vengono mai messi in cache
+ *
+ * Stesso formato letto da extraction_cache.py. MYMOVIES_EXTRACTION_CACHE=0 la disabilita.
+ */
+
+const DAY_MS = 24 * 3600 * 1000;
+const DEFAULT_CACHE_DIR = process.env.MYMOVIES_EXTRACTION_CACHE_DIR || path.join(__dirname, '.cache', 'extraction_cache');
+const DEFAULT_MAX_AGE_DAYS = parseFloat(process.env.MYMOVIES_CACHE_MAX_AGE_DAYS || '30');
+const DEFAULT_NOT_FOUND_DAYS = parseFloat(process.env.MYMOVIES_CACHE_NOT_FOUND_DAYS || '7');
+
+/**
+ * Stato HTTP di una pagina che conferma l'assenza della recensione: 404, oppure pagina
+ * caricata (2xx) ma senza recensione. Gli altri stati sono errori transitori.
+ */
+function isNotFoundStatus(httpStatus) {
+    return httpStatus === 404 || (httpStatus >= 200 && httpStatus < 300);
+}
+
+function isNotFound(result) {
+    return !result.success && result.notFound === true;
+}
+
+/**
+ * Risultato in formato extractMovieReview ricostruito da un record dell'archivio recensioni
+ */
+function resultFromRecord(record) {
+    return {
+        success: true,
+        input: { title: record.title, year: record.year },
+        url: record.url,
+        review: {
+            content: record.content,
+            author: record.author,
+            date: record.date,
+            title: record.filmTitle
+        },
+        metadata: {
+            extractionMethod: record.extractionMethod,
+            tier: record.tier,
+            contentLength: record.contentLength,
+            wordCount: record.wordCount,
+            processingTime: record.processingTime
+        },
+        httpStatus: record.httpStatus ?? 200,
+        filePath: record.file ? path.join(__dirname, 'reviews', record.file) : undefined,
+        notFound: false,
+        error: null
+    };
+}
+
+class ExtractionCache {
+    constructor(cacheDir = DEFAULT_CACHE_DIR, options = {}) {
+        this.cacheDir = cacheDir;
+        this.maxAgeMs = (options.maxAgeDays ?? DEFAULT_MAX_AGE_DAYS) * DAY_MS;
+        this.notFoundMs = (options.notFoundDays ?? DEFAULT_NOT_FOUND_DAYS) * DAY_MS;
+        this.store = options.store === undefined ? getReviewStore() : options.store;
+    }
+
+    key(title, year) {
+        return reviewKey(normalizeFilmTitle(title), year);
+    }
+
+    entryPath(key) {
+        return path.join(this.cacheDir, `${key}.json`);
+    }
+
+    isFresh(entry) {
+        const age = Date.now() - Date.parse(entry.cachedAt);
+        return age < (entry.status === 'not_found' ? this.notFoundMs : this.maxAgeMs);
+    }
+
+    /**
+     * Risultato in cache ancora valido (con cached: true), o null
+     */
+    get(title, year) {
+        const key = this.key(title, year);
+        let entry = null;
+        try {
+            entry = JSON.parse(fs.readFileSync(this.entryPath(key), 'utf8'));
+        } catch (error) {
+            entry = this.fromStore(key);
+        }
+
+        if (!entry || !this.isFresh(entry)) return null;
+        if (entry.status === 'not_found') {
+            // Voci scritte prima di notFound: scartate se l'esito era in realta un errore transitorio
+            if (entry.result.notFound === undefined && !isNotFoundStatus(entry.result.httpStatus)) return null;
+            return { ...entry.result, notFound: true, input: { title, year }, cached: true, cachedAt: entry.cachedAt };
+        }
+        return { ...entry.result, input: { title, year }, cached: true, cachedAt: entry.cachedAt };
+    }
+
+    /**
+     * Recensione gia nell'archivio ma senza voce in cache (estratta prima della cache)
+     */
+    fromStore(key) {
+        // latestMetadata() e incrementale: un miss non rilegge tutti gli shard metadati
+        const record = this.store ? this.store.get(key, this.store.latestMetadata()) : null;
+        if (!record) return null;
+        return this.write(key, 'success', resultFromRecord(record), record.extractedAt);
+    }
+
+    /**
+     * Registra l'esito di un'estrazione: successi salvati e pagine inesistenti
+     */
+    set(result) {
+        const { title, year } = result.input;
+        if (result.success && result.filePath) {
+            return this.write(this.key(title, year), 'success', result);
+        }
+        if (isNotFound(result)) {
+            return this.write(this.key(title, year), 'not_found', result);
+        }
+        return null;
+    }
+
+    write(key, status, result, cachedAt = new Date().toISOString()) {
+        const { cached, cachedAt: previous, ...clean } = result;
+        const entry = { key, status, cachedAt, result: clean };
+        try {
+            fs.mkdirSync(this.cacheDir, { recursive: true });
+            writeFileAtomic(this.entryPath(key), JSON.stringify(entry));
+        } catch (error) {
+            console.error('ATTENZIONE: Cache estrazioni non aggiornata:', error.message);
+        }
+        return entry;
+    }
+
+    invalidate(title, year) {
+        fs.rmSync(this.entryPath(this.key(title, year)), { force: true });
+    }
+
+    stats() {
+        const counts = { success: 0, not_found: 0, stale: 0 };
+        if (!fs.existsSync(this.cacheDir)) return { ...counts, cacheDir: this.cacheDir };
+
+        for (const name of fs.readdirSync(this.cacheDir)) {
+            if (!name.endsWith('.json')) continue;
+            try {
+                const entry = JSON.parse(fs.readFileSync(path.join(this.cacheDir, name), 'utf8'));
+                counts[this.isFresh(entry) ? entry.status : 'stale']++;
+            } catch (error) {
+                // Voce illeggibile: verra riscritta alla prossima estrazione
+            }
+        }
+        return { ...counts, cacheDir: this.cacheDir };
+    }
+
+    clear() {
+        fs.rmSync(this.cacheDir, { recursive: true, force: true });
+    }
+}
+
+let sharedCache;
+
+/**
+ * Cache condivisa del processo, o null se disabilitata (MYMOVIES_EXTRACTION_CACHE=0)
+ */
+function getExtractionCache() {
+    if (sharedCache === undefined) {
+        sharedCache = process.env.MYMOVIES_EXTRACTION_CACHE === '0' ? null : new ExtractionCache();
+    }
+    return sharedCache;
+}
+
+module.exports = {
+    ExtractionCache,
+    getExtractionCache,
+    isNotFound,
+    isNotFoundStatus
+};
+
+// CLI: node extraction_cache.js [stats|clear]
+if (require.main === module) {
+    const cache = new ExtractionCache();
+    if (process.argv[2] === 'clear') cache.clear();
+    console.log(JSON.stringify(cache.stats(), null, 2));
+}
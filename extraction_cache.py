@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Lettore della cache dei risultati di estrazione (.cache/extraction_cache/, scritta da extraction_cache.js)
+
+<slug>_<anno>.json  {"key", "status": "success"|"not_found", "cachedAt", "result"}
+
+Consultata da MyMoviesExtractor prima di avviare worker o wrapper: un film gia estratto
+(o una recensione inesistente di recente) torna in pochi millisecondi.
+"""
+
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from review_store import ReviewStore
+from text_cleaner import normalize_title_py
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.getenv('MYMOVIES_EXTRACTION_CACHE_DIR', os.path.join(SCRIPT_DIR, '.cache', 'extraction_cache'))
+DAY = 24 * 3600
+
+
+def _timestamp(iso):
+    return datetime.fromisoformat(iso.replace('Z', '+00:00')).timestamp()
+
+
+def is_not_found_status(http_status):
+    """404, o pagina caricata (2xx) senza recensione: assenza confermata (come isNotFoundStatus in JS)"""
+    return http_status == 404 or (http_status is not None and 200 <= http_status < 300)
+
+
+def result_from_record(record):
+    """Risultato in formato extractMovieReview da un record dell'archivio recensioni"""
+    return {
+        'success': True,
+        'input': {'title': record['title'], 'year': record['year']},
+        'url': record.get('url'),
+        'review': {
+            'content': record['content'],
+            'author': record.get('author'),
+            'date': record.get('date'),
+            'title': record.get('filmTitle')
+        },
+        'metadata': {
+            'extractionMethod': record.get('extractionMethod'),
+            'tier': record.get('tier'),
+            'contentLength': record.get('contentLength'),
+            'wordCount': record.get('wordCount'),
+            'processingTime': record.get('processingTime')
+        },
+        'httpStatus': record.get('httpStatus') or 200,
+        'filePath': os.path.join(SCRIPT_DIR, 'reviews', record['file']) if record.get('file') else None,
+        'notFound': False,
+        'error': None
+    }
+
+
+class ExtractionCache:
+    def __init__(self, cache_dir=None, max_age_days=None, not_found_days=None, store=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_age = (max_age_days if max_age_days is not None
+                        else float(os.getenv('MYMOVIES_CACHE_MAX_AGE_DAYS', '30'))) * DAY
+        self.not_found_age = (not_found_days if not_found_days is not None
+                              else float(os.getenv('MYMOVIES_CACHE_NOT_FOUND_DAYS', '7'))) * DAY
+        self.store = store if store is not None else ReviewStore()
+
+    @staticmethod
+    def key(title, year):
+        return f"{normalize_title_py(title)}_{year}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def is_fresh(self, entry):
+        age = time.time() - _timestamp(entry['cachedAt'])
+        return age < (self.not_found_age if entry['status'] == 'not_found' else self.max_age)
+
+    def get(self, title, year):
+        """Risultato ancora valido (con cached=True), o None"""
+        key = self.key(title, year)
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = self._from_store(key)
+
+        if not entry or not self.is_fresh(entry):
+            return None
+        result = {**entry['result'], 'input': {'title': title, 'year': int(year)},
+                  'cached': True, 'cachedAt': entry['cachedAt']}
+        if entry['status'] == 'not_found':
+            # Voci scritte prima di notFound: scartate se l'esito era in realta un errore transitorio
+            if 'notFound' not in entry['result'] and not is_not_found_status(entry['result'].get('httpStatus')):
+                return None
+            result['notFound'] = True
+        return result
+
+    def _from_store(self, key):
+        """Recensione gia nell'archivio ma senza voce in cache: la voce viene creata"""
+        # latest_metadata() e incrementale: un miss non rilegge tutti gli shard metadati
+        record = self.store.get(key, self.store.latest_metadata()) if self.store else None
+        if not record:
+            return None
+        entry = {'key': key, 'status': 'success', 'cachedAt': record['extractedAt'],
+                 'result': result_from_record(record)}
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+            tmp_path = None
+        except OSError:
+            pass
+        finally:
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        return entry
+
+    def invalidate(self, title, year):
+        try:
+            os.remove(self._path(self.key(title, year)))
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 3 and sys.argv[1] == 'get':
+        print(json.dumps(ExtractionCache().get(sys.argv[2], sys.argv[3]), indent=2, ensure_ascii=False))
+    else:
+        print("Usage: python3 extraction_cache.py get 'Titolo' ANNO  (statistiche: node extraction_cache.js stats)")
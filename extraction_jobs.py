@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Client Python della coda di estrazione di server.js (extraction_queue.js)
+
+  POST /api/jobs {"title", "year", "noSave", "force"}  -> 202 {"job", "deduplicated", "statusUrl", "eventsUrl"}
+                                                        (200 con "cached": true se il film e in cache)
+  GET  /api/jobs/<id>                                  -> stato del job
+  GET  /api/jobs/<id>/events                           -> Server-Sent Events, un evento "job" per cambio di stato
+
+Il server limita le estrazioni contemporanee e unisce i job identici: piu processi Python
+che chiedono lo stesso film condividono un'unica estrazione.
+"""
+
+import json
+import time
+
+import requests
+
+from http_client import create_session
+
+FINISHED_STATUSES = ('done', 'error')
+
+
+class ExtractionJobError(Exception):
+    pass
+
+
+class ExtractionJobClient:
+    def __init__(self, base_url, session=None, poll_interval=1.0):
+        self.base_url = base_url.rstrip('/')
+        self.session = session or create_session(pool_size=4)
+        self.poll_interval = poll_interval
+
+    def _json(self, response):
+        try:
+            data = response.json()
+        except ValueError:
+            raise ExtractionJobError(f"Risposta non valida dal server ({response.status_code})")
+        if response.status_code >= 400:
+            raise ExtractionJobError(data.get('error') or f"HTTP {response.status_code}")
+        return data
+
+    def submit(self, title, year, no_save=False, force=False):
+        """Accoda l'estrazione: restituisce {'job': ..., 'deduplicated': bool, 'cached': bool, ...}"""
+        response = self.session.post(f"{self.base_url}/api/jobs",
+                                     json={'title': title, 'year': int(year), 'noSave': no_save, 'force': force},
+                                     timeout=10)
+        return self._json(response)
+
+    def status(self, job_id):
+        return self._json(self.session.get(f"{self.base_url}/api/jobs/{job_id}", timeout=10))
+
+    def stream(self, job_id, timeout=180):
+        """Snapshot del job a ogni cambio di stato (SSE), fino alla conclusione"""
+        with self.session.get(f"{self.base_url}/api/jobs/{job_id}/events",
+                              stream=True, timeout=(10, timeout)) as response:
+            if response.status_code != 200:
+                self._json(response)
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith('data: '):
+                    job = json.loads(line[len('data: '):])
+                    yield job
+                    if job['status'] in FINISHED_STATUSES:
+                        return
+
+    def wait(self, job_id, timeout=180, on_update=None):
+        """Attende la fine del job via SSE, con polling di stato se lo stream si interrompe"""
+        deadline = time.time() + timeout
+        try:
+            for job in self.stream(job_id, timeout=timeout):
+                if on_update:
+                    on_update(job)
+                if job['status'] in FINISHED_STATUSES:
+                    return job
+        except requests.exceptions.RequestException:
+            pass
+
+        while time.time() < deadline:
+            job = self.status(job_id)
+            if on_update:
+                on_update(job)
+            if job['status'] in FINISHED_STATUSES:
+                return job
+            time.sleep(self.poll_interval)
+        raise ExtractionJobError(f"Timeout in attesa del job {job_id}")
+
+    def extract(self, title, year, no_save=False, force=False, timeout=180, on_update=None):
+        """Accoda e attende: restituisce il risultato di extractMovieReview"""
+        job = self.submit(title, year, no_save=no_save, force=force)['job']
+        if job['status'] not in FINISHED_STATUSES:
+            job = self.wait(job['id'], timeout=timeout, on_update=on_update)
+        if job['status'] == 'error':
+            raise ExtractionJobError(job.get('error') or 'Errore di estrazione')
+        return job['result']
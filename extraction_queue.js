@@ -0,0 +1,250 @@
+const crypto = require('crypto');
+const { EventEmitter } = require('events');
+const { extractMovieReview, launchBrowser, normalizeFilmTitle } = require('./mymovies_extractor');
+const { getExtractionCache } = require('./extraction_cache');
+
+/**
+ * Coda dei job di estrazione per server.js
+ *
+ * - al massimo `concurrency` estrazioni contemporanee, tutte sullo stesso browser (avviato solo
+ *   se il livello HTTP non basta, chiuso dopo un periodo di inattivita)
+ * - un job identico (stesso titolo normalizzato e anno) gia in coda o in corso viene riutilizzato
+ * - coda e storico dei job conclusi hanno un limite: oltre maxQueued submit() rifiuta il job
+ * - un film gia in cache (extraction_cache.js) diventa subito un job concluso, salvo force
+ *
+ * Stati: queued -> running -> done | error. Ogni cambio emette 'job' (snapshot) sull'emitter.
+ * Un'estrazione fallita (success: false) e un job in errore, compresi 5xx/429/403 e pagine bloccate;
+ * solo una recensione inesistente (notFound: 404 o pagina 2xx senza recensione) e un job concluso
+ * con success: false.
+ */
+
+const DEFAULT_CONCURRENCY = parseInt(process.env.MYMOVIES_QUEUE_CONCURRENCY || '2');
+const DEFAULT_MAX_QUEUED = parseInt(process.env.MYMOVIES_QUEUE_MAX || '100');
+const MAX_FINISHED_JOBS = 500;
+const FINISHED_TTL_MS = 60 * 60 * 1000;
+const BROWSER_IDLE_MS = 60 * 1000;
+
+class QueueFullError extends Error {}
+
+class ExtractionQueue extends EventEmitter {
+    constructor(options = {}) {
+        super();
+        this.concurrency = Math.max(1, options.concurrency || DEFAULT_CONCURRENCY);
+        this.maxQueued = options.maxQueued || DEFAULT_MAX_QUEUED;
+        this.extract = options.extract || extractMovieReview;
+        this.cache = options.cache !== undefined ? options.cache : getExtractionCache();
+        this.jobs = new Map();      // id -> job (attivi e conclusi recenti)
+        this.activeByKey = new Map(); // chiave -> job in coda o in corso
+        this.pending = [];
+        this.running = 0;
+        this.browserPromise = null;
+        this.idleTimer = null;
+        this.counters = { submitted: 0, cached: 0, deduplicated: 0, rejected: 0, done: 0, error: 0 };
+        // Un client SSE per job e piu ascoltatori sono normali
+        this.setMaxListeners(0);
+    }
+
+    /**
+     * Accoda un'estrazione: restituisce { job, deduplicated, cached }
+     * options: { noSave, force } (force ignora la cache, non i job identici gia in corso)
+     */
+    submit(title, year, options = {}) {
+        const key = `${normalizeFilmTitle(title)}_${year}${options.noSave ? ':nosave' : ''}`;
+        const existing = this.activeByKey.get(key);
+        if (existing) {
+            this.counters.deduplicated++;
+            return { job: this.snapshot(existing), deduplicated: true, cached: false };
+        }
+
+        const cachedResult = this.cache && !options.force ? this.cache.get(title, year) : null;
+        if (cachedResult) {
+            this.counters.cached++;
+            const job = this.createJob(key, title, year, options);
+            job.status = 'done';
+            job.startedAt = job.finishedAt = job.createdAt;
+            job.result = cachedResult;
+            this.jobs.set(job.id, job);
+            this.prune();
+            return { job: this.snapshot(job), deduplicated: false, cached: true };
+        }
+
+        if (this.pending.length >= this.maxQueued) {
+            this.counters.rejected++;
+            throw new QueueFullError(`Coda piena (${this.maxQueued} job in attesa)`);
+        }
+
+        const job = this.createJob(key, title, year, options);
+        this.counters.submitted++;
+        this.jobs.set(job.id, job);
+        this.activeByKey.set(key, job);
+        this.pending.push(job);
+        this.update(job, this.pending.length);
+        this.drain();
+
+        return { job: this.snapshot(job), deduplicated: false, cached: false };
+    }
+
+    createJob(key, title, year, options) {
+        return {
+            id: crypto.randomUUID(),
+            key,
+            title,
+            year,
+            noSave: Boolean(options.noSave),
+            status: 'queued',
+            stage: null,
+            createdAt: new Date().toISOString(),
+            startedAt: null,
+            finishedAt: null,
+            result: null,
+            error: null
+        };
+    }
+
+    get(id) {
+        const job = this.jobs.get(id);
+        return job ? this.snapshot(job) : null;
+    }
+
+    /**
+     * Copia pubblica del job; position (1 = prossimo) si calcola se non indicata
+     */
+    snapshot(job, position = null) {
+        const { key, ...data } = job;
+        if (job.status === 'queued') data.position = position ?? this.pending.indexOf(job) + 1;
+        return data;
+    }
+
+    stats() {
+        return {
+            concurrency: this.concurrency,
+            running: this.running,
+            queued: this.pending.length,
+            retained: this.jobs.size,
+            browser: this.browserPromise !== null,
+            ...this.counters
+        };
+    }
+
+    update(job, position = null) {
+        this.emit('job', this.snapshot(job, position));
+    }
+
+    getBrowser() {
+        if (!this.browserPromise) {
+            this.browserPromise = launchBrowser({ headless: true }).then(browser => {
+                browser.on('disconnected', () => {
+                    this.browserPromise = null;
+                });
+                return browser;
+            }).catch(error => {
+                this.browserPromise = null;
+                throw error;
+            });
+        }
+        return this.browserPromise;
+    }
+
+    drain() {
+        clearTimeout(this.idleTimer);
+
+        let started = 0;
+        while (this.running < this.concurrency && this.pending.length > 0) {
+            const job = this.pending.shift();
+            this.run(job);
+            started++;
+        }
+
+        // Le posizioni in coda sono cambiate solo se qualche job e partito (calcolate qui, senza indexOf)
+        if (started > 0) {
+            this.pending.forEach((job, index) => this.update(job, index + 1));
+        }
+
+        if (this.running === 0 && this.browserPromise) {
+            this.idleTimer = setTimeout(() => this.closeBrowser(), BROWSER_IDLE_MS);
+            this.idleTimer.unref();
+        }
+    }
+
+    async run(job) {
+        this.running++;
+        job.status = 'running';
+        job.startedAt = new Date().toISOString();
+        this.update(job);
+
+        try {
+            const result = await this.extract(job.title, job.year, {
+                headless: true,
+                noSave: job.noSave,
+                browser: () => this.getBrowser(),
+                onProgress: stage => {
+                    job.stage = stage;
+                    this.update(job);
+                }
+            });
+            job.result = result;
+            if (result && result.success === false && result.notFound !== true) {
+                // extractMovieReview non solleva eccezioni: il fallimento e nel risultato,
+                // notFound distingue l'assenza confermata della recensione dagli errori transitori
+                job.status = 'error';
+                job.error = result.error || 'Estrazione non riuscita';
+                this.counters.error++;
+            } else {
+                job.status = 'done';
+                this.counters.done++;
+            }
+        } catch (error) {
+            job.status = 'error';
+            job.error = error.message;
+            this.counters.error++;
+        }
+
+        job.finishedAt = new Date().toISOString();
+        this.running--;
+        this.activeByKey.delete(job.key);
+        this.update(job);
+        this.prune();
+        this.drain();
+    }
+
+    /**
+     * Limita lo storico dei job conclusi (numero e eta)
+     */
+    prune() {
+        const cutoff = Date.now() - FINISHED_TTL_MS;
+        let finished = 0;
+        for (const job of this.jobs.values()) {
+            if (job.finishedAt) finished++;
+        }
+
+        // Map in ordine di inserimento: i primi sono i piu vecchi
+        for (const [id, job] of this.jobs) {
+            if (!job.finishedAt) continue;
+            if (finished <= MAX_FINISHED_JOBS && Date.parse(job.finishedAt) >= cutoff) break;
+            this.jobs.delete(id);
+            finished--;
+        }
+    }
+
+    async closeBrowser() {
+        if (!this.browserPromise || this.running > 0) return;
+        const browser = await this.browserPromise.catch(() => null);
+        this.browserPromise = null;
+        if (browser) await browser.close().catch(() => {});
+    }
+}
+
+let sharedQueue = null;
+
+function getExtractionQueue() {
+    if (!sharedQueue) {
+        sharedQueue = new ExtractionQueue();
+    }
+    return sharedQueue;
+}
+
+module.exports = {
+    ExtractionQueue,
+    QueueFullError,
+    getExtractionQueue
+};
@@ -0,0 +1,138 @@
+#!/usr/bin/env node
+
+/**
+ * Worker di estrazione persistente
+ * Protocollo JSON-lines su stdin/stdout: una richiesta per riga, una risposta per riga.
+ *
+ *   -> {"id": 1, "action": "extract", "title": "Oppenheimer", "year": 2023, "options": {"noSave": false}}
+ *   <- {"id": 1, "ok": true, "result": {...}}
+ *   -> {"id": 2, "action": "ping"}
+ *   <- {"id": 2, "ok": true, "result": {"pid": 1234, "active": 0, "queued": 0}}
+ *
+ * Il browser resta avviato tra una richiesta e l'altra: ogni estrazione apre solo una pagina.
+ * I log vanno su stderr, stdout e riservato al protocollo.
+ */
+
+// stdout e riservato alle risposte: i console.log dell'estrattore vanno su stderr
+console.log = (...args) => console.error(...args);
+
+const readline = require('readline');
+const { extractMovieReview, launchBrowser } = require('./mymovies_extractor');
+
+const args = process.argv.slice(2);
+const concurrencyIndex = args.indexOf('--concurrency');
+const concurrency = Math.max(1, parseInt(
+    concurrencyIndex !== -1 ? args[concurrencyIndex + 1] : process.env.MYMOVIES_WORKER_CONCURRENCY || '2'
+) || 2);
+
+let browserPromise = null;
+let active = 0;
+const queue = [];
+let closing = false;
+
+/**
+ * Restituisce il browser condiviso, riavviandolo se si e disconnesso
+ */
+function getBrowser() {
+    if (!browserPromise) {
+        browserPromise = launchBrowser({ headless: true }).then(browser => {
+            browser.on('disconnected', () => {
+                browserPromise = null;
+            });
+            return browser;
+        }).catch(error => {
+            browserPromise = null;
+            throw error;
+        });
+    }
+    return browserPromise;
+}
+
+function send(message) {
+    process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+async function handle(request) {
+    switch (request.action) {
+        case 'ping':
+            return { pid: process.pid, active, queued: queue.length, concurrency };
+
+        case 'extract': {
+            if (!request.title || !request.year) {
+                throw new Error('title e year richiesti');
+            }
+            // Il browser parte solo se il livello HTTP non basta
+            return extractMovieReview(request.title, parseInt(request.year), {
+                ...(request.options || {}),
+                browser: getBrowser
+            });
+        }
+
+        default:
+            throw new Error(`Azione sconosciuta: ${request.action}`);
+    }
+}
+
+/**
+ * Esegue le richieste in coda rispettando il limite di pagine concorrenti
+ */
+function drain() {
+    while (active < concurrency && queue.length > 0) {
+        const request = queue.shift();
+        active++;
+
+        handle(request)
+            .then(result => send({ id: request.id, ok: true, result }))
+            .catch(error => send({ id: request.id, ok: false, error: error.message }))
+            .finally(() => {
+                active--;
+                drain();
+                if (closing) shutdown();
+            });
+    }
+}
+
+async function shutdown() {
+    if (active > 0 || queue.length > 0) return;
+    if (browserPromise) {
+        const browser = await browserPromise.catch(() => null);
+        browserPromise = null;
+        if (browser) await browser.close().catch(() => {});
+    }
+    process.exit(0);
+}
+
+const rl = readline.createInterface({ input: process.stdin, terminal: false });
+
+rl.on('line', (line) => {
+    if (!line.trim()) return;
+
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (error) {
+        send({ id: null, ok: false, error: `JSON non valido: ${error.message}` });
+        return;
+    }
+
+    if (request.action === 'shutdown') {
+        closing = true;
+        shutdown();
+        return;
+    }
+
+    queue.push(request);
+    drain();
+});
+
+// stdin chiuso dal processo padre: termina dopo le richieste in corso
+rl.on('close', () => {
+    closing = true;
+    shutdown();
+});
+
+process.on('SIGTERM', () => {
+    queue.length = 0;
+    closing = true;
+    shutdown();
+});
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Client Python per extraction_worker.js
+Mantiene un processo Node (con Chromium gia avviato) e gli invia richieste JSON-lines
+"""
+
+import itertools
+import json
+import os
+import subprocess
+import threading
+from datetime import datetime, timezone
+
+
+class ExtractionWorkerError(Exception):
+    pass
+
+
+def parse_year(year):
+    """Anno come intero, o None se non valido (es. 'N/A' dei film TMDB senza data di uscita)"""
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return None
+
+
+class ExtractionWorker:
+    def __init__(self, script_dir, concurrency=2, node_bin='node'):
+        self.script_dir = script_dir
+        self.concurrency = concurrency
+        self.node_bin = node_bin
+        self.worker_script = os.path.join(script_dir, 'extraction_worker.js')
+        self._process = None
+        self._log_file = None
+        self._reader = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _ensure_started(self):
+        """Avvia il worker Node se non e gia in esecuzione"""
+        with self._lock:
+            if self._process and self._process.poll() is None:
+                return self._process
+
+            # Log del processo precedente (terminato): il nuovo ne apre uno suo
+            self._close_log()
+            log_path = os.getenv('MYMOVIES_WORKER_LOG')
+            if log_path:
+                self._log_file = open(log_path, 'a')
+            stderr = self._log_file or subprocess.DEVNULL
+
+            self._process = subprocess.Popen(
+                [self.node_bin, self.worker_script, '--concurrency', str(self.concurrency)],
+                cwd=self.script_dir,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                text=True,
+                encoding='utf-8',
+                bufsize=1
+            )
+            self._reader = threading.Thread(target=self._read_loop, args=(self._process,), daemon=True)
+            self._reader.start()
+            return self._process
+
+    def _close_log(self):
+        if self._log_file:
+            self._log_file.close()
+            self._log_file = None
+
+    def _read_loop(self, process):
+        """Smista le risposte del worker alle richieste in attesa"""
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            with self._lock:
+                slot = self._pending.pop(message.get('id'), None)
+            if slot:
+                slot['response'] = message
+                slot['event'].set()
+
+        # Processo terminato: sblocca chi e ancora in attesa
+        with self._lock:
+            orphaned = {k: v for k, v in self._pending.items() if v['process'] is process}
+            for request_id in orphaned:
+                del self._pending[request_id]
+        for slot in orphaned.values():
+            slot['response'] = {'ok': False, 'error': 'Worker di estrazione terminato'}
+            slot['event'].set()
+
+    def request(self, payload, timeout=180):
+        """Invia una richiesta e attende la risposta corrispondente"""
+        process = self._ensure_started()
+        request_id = next(self._ids)
+        slot = {'event': threading.Event(), 'response': None, 'process': process}
+
+        with self._lock:
+            self._pending[request_id] = slot
+
+        try:
+            with self._write_lock:
+                process.stdin.write(json.dumps({**payload, 'id': request_id}) + '\n')
+                process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise ExtractionWorkerError(f"Worker non raggiungibile: {e}")
+
+        if not slot['event'].wait(timeout):
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise ExtractionWorkerError(f"Timeout dopo {timeout}s")
+
+        response = slot['response']
+        if not response.get('ok'):
+            raise ExtractionWorkerError(response.get('error', 'Errore sconosciuto'))
+        return response['result']
+
+    def extract(self, title, year, no_save=False, timeout=180, trace=False):
+        """Estrae una recensione e restituisce il risultato grezzo di extractMovieReview
+        (trace=True: con le durate delle fasi in 'trace')"""
+        year_value = parse_year(year)
+        if year_value is None:
+            raise ExtractionWorkerError(f"Anno non valido: {year}")
+        options = {'noSave': no_save}
+        if trace:
+            options['trace'] = True
+        return self.request({
+            'action': 'extract',
+            'title': title,
+            'year': year_value,
+            'options': options
+        }, timeout=timeout)
+
+    def ping(self, timeout=10):
+        return self.request({'action': 'ping'}, timeout=timeout)
+
+    def close(self, timeout=10):
+        """Chiude il worker attendendo le estrazioni in corso"""
+        with self._lock:
+            process = self._process
+            self._process = None
+        try:
+            if not process or process.poll() is not None:
+                return
+
+            try:
+                process.stdin.close()
+                process.wait(timeout=timeout)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+                process.wait()
+        finally:
+            with self._lock:
+                self._close_log()
+
+
+def to_wrapper_result(result, title, year):
+    """Converte il risultato di extractMovieReview nel formato JSON di ai_wrapper.sh"""
+    review = result.get('review') or {}
+    metadata = result.get('metadata') or {}
+    success = bool(result.get('success'))
+    year_value = parse_year(year)
+
+    # notFound (404 o pagina 2xx senza recensione): esito permanente, non un errore transitorio
+    if success:
+        status = 'success'
+    elif result.get('notFound'):
+        status = 'not_found'
+    else:
+        status = 'error'
+
+    return {
+        'status': status,
+        'title': title,
+        'year': year_value if year_value is not None else year,
+        'message': 'Review extracted successfully' if success else (result.get('error') or 'Unknown extraction error'),
+        'file_path': result.get('filePath', ''),
+        'content_length': metadata.get('contentLength', 0) if success else 0,
+        'author': review.get('author') or '',
+        'date': review.get('date') or '',
+        'url': result.get('url'),
+        'http_status': result.get('httpStatus'),
+        'extraction_method': metadata.get('extractionMethod'),
+        'extraction_tier': metadata.get('tier'),
+        'processing_time_ms': metadata.get('processingTime', 0),
+        'bytes_transferred': metadata.get('bytesTransferred'),
+        'cached': bool(result.get('cached')),
+        'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    }
@@ -0,0 +1,199 @@
+#!/usr/bin/env node
+
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+const zlib = require('zlib');
+
+/**
+ * Archivio dell'HTML grezzo delle pagine MyMovies
+ *
+ * objects/ab/<sha256>.html.gz  contenuto gzip, indirizzato per hash (pagine identiche condivise)
+ * refs/<sha256(url)>.json      ultima versione per URL: hash, ETag, Last-Modified, titolo, anno
+ *
+ * Un file per URL invece di un indice unico: worker, batch e server possono scrivere
+ * insieme senza sovrascriversi (scrittura atomica tmp + rename).
+ */
+
+const DEFAULT_ARCHIVE_DIR = process.env.MYMOVIES_ARCHIVE_DIR || path.join(__dirname, '.cache', 'html_archive');
+
+function sha256(text) {
+    return crypto.createHash('sha256').update(text).digest('hex');
+}
+
+/**
+ * URL senza frammento (#recensione): stessa pagina, stessa voce
+ */
+function canonicalUrl(url) {
+    return url.split('#')[0];
+}
+
+function writeFileAtomic(filePath, data) {
+    const tmpPath = `${filePath}.${process.pid}.${crypto.randomBytes(4).toString('hex')}.tmp`;
+    fs.writeFileSync(tmpPath, data);
+    fs.renameSync(tmpPath, filePath);
+}
+
+class HtmlArchive {
+    constructor(archiveDir = DEFAULT_ARCHIVE_DIR) {
+        this.archiveDir = archiveDir;
+        this.objectsDir = path.join(archiveDir, 'objects');
+        this.refsDir = path.join(archiveDir, 'refs');
+    }
+
+    refPath(url) {
+        return path.join(this.refsDir, `${sha256(canonicalUrl(url))}.json`);
+    }
+
+    objectPath(hash) {
+        return path.join(this.objectsDir, hash.slice(0, 2), `${hash}.html.gz`);
+    }
+
+    /**
+     * Voce dell'archivio per l'URL, o null
+     */
+    lookup(url) {
+        try {
+            return JSON.parse(fs.readFileSync(this.refPath(url), 'utf8'));
+        } catch (error) {
+            return null;
+        }
+    }
+
+    /**
+     * Header per una GET condizionale (vuoto se la pagina non e in archivio)
+     */
+    conditionalHeaders(url) {
+        const ref = this.lookup(url);
+        const headers = {};
+        if (!ref || !fs.existsSync(this.objectPath(ref.sha256))) return headers;
+        if (ref.etag) headers['If-None-Match'] = ref.etag;
+        if (ref.lastModified) headers['If-Modified-Since'] = ref.lastModified;
+        return headers;
+    }
+
+    /**
+     * Salva l'HTML (se non gia presente) e aggiorna la voce dell'URL
+     * info: { status, etag, lastModified, title, year }
+     */
+    store(url, html, info = {}) {
+        const hash = sha256(html);
+        const objectPath = this.objectPath(hash);
+
+        if (!fs.existsSync(objectPath)) {
+            fs.mkdirSync(path.dirname(objectPath), { recursive: true });
+            writeFileAtomic(objectPath, zlib.gzipSync(html));
+        }
+
+        const now = new Date().toISOString();
+        const ref = {
+            url: canonicalUrl(url),
+            sha256: hash,
+            status: info.status || 200,
+            etag: info.etag || null,
+            lastModified: info.lastModified || null,
+            title: info.title || null,
+            year: info.year || null,
+            size: Buffer.byteLength(html),
+            fetchedAt: now,
+            checkedAt: now
+        };
+
+        fs.mkdirSync(this.refsDir, { recursive: true });
+        writeFileAtomic(this.refPath(url), JSON.stringify(ref));
+        return ref;
+    }
+
+    /**
+     * Pagina non modificata (304): aggiorna solo la data dell'ultimo controllo
+     */
+    touch(url) {
+        const ref = this.lookup(url);
+        if (!ref) return null;
+        ref.checkedAt = new Date().toISOString();
+        writeFileAtomic(this.refPath(url), JSON.stringify(ref));
+        return ref;
+    }
+
+    /**
+     * HTML archiviato per l'URL (o per una voce gia letta), null se assente
+     */
+    read(urlOrRef) {
+        const ref = typeof urlOrRef === 'string' ? this.lookup(urlOrRef) : urlOrRef;
+        if (!ref) return null;
+        try {
+            return zlib.gunzipSync(fs.readFileSync(this.objectPath(ref.sha256))).toString('utf8');
+        } catch (error) {
+            return null;
+        }
+    }
+
+    /**
+     * Tutte le voci dell'archivio
+     */
+    list() {
+        if (!fs.existsSync(this.refsDir)) return [];
+
+        const refs = [];
+        for (const name of fs.readdirSync(this.refsDir)) {
+            if (!name.endsWith('.json')) continue;
+            try {
+                refs.push(JSON.parse(fs.readFileSync(path.join(this.refsDir, name), 'utf8')));
+            } catch (error) {
+                // Voce illeggibile: ignorata, verra riscritta al prossimo fetch
+            }
+        }
+        return refs;
+    }
+
+    stats() {
+        const refs = this.list();
+        let compressedSize = 0;
+        const hashes = new Set(refs.map(ref => ref.sha256));
+        for (const hash of hashes) {
+            try {
+                compressedSize += fs.statSync(this.objectPath(hash)).size;
+            } catch (error) {
+                // Oggetto mancante
+            }
+        }
+        return {
+            pages: refs.length,
+            objects: hashes.size,
+            rawSize: refs.reduce((sum, ref) => sum + (ref.size || 0), 0),
+            compressedSize,
+            archiveDir: this.archiveDir
+        };
+    }
+}
+
+const archives = new Map();
+
+/**
+ * Archivio condiviso per directory (una istanza per processo)
+ */
+function getHtmlArchive(archiveDir = DEFAULT_ARCHIVE_DIR) {
+    if (!archives.has(archiveDir)) {
+        archives.set(archiveDir, new HtmlArchive(archiveDir));
+    }
+    return archives.get(archiveDir);
+}
+
+module.exports = {
+    HtmlArchive,
+    getHtmlArchive,
+    canonicalUrl,
+    writeFileAtomic
+};
+
+// CLI: node html_archive.js [stats|list]
+if (require.main === module) {
+    const command = process.argv[2] || 'stats';
+    const archive = getHtmlArchive();
+
+    if (command === 'list') {
+        console.log(JSON.stringify(archive.list(), null, 2));
+    } else {
+        console.log(JSON.stringify(archive.stats(), null, 2));
+    }
+}
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Utility HTTP condivise: sessioni con pool di connessioni keep-alive,
+retry con backoff esponenziale e rate limiter token bucket
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Rate limiter token bucket thread-safe (rate richieste/secondo, burst massimo)"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def acquire(self, tokens=1):
+        """Attende finche non e disponibile un token"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Svuota il bucket per rispettare un Retry-After del server (nessun effetto con rate <= 0)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+def create_session(pool_size=10, user_agent=None):
+    """Crea una Session con pool di connessioni keep-alive dimensionato"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if user_agent:
+        session.headers['User-Agent'] = user_agent
+    return session
+
+
+def parse_retry_after(value):
+    """Converte l'header Retry-After (secondi o data HTTP) in secondi"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def request_with_retry(session, method, url, limiter=None, max_retries=3,
+                       backoff_base=0.5, backoff_max=30.0, **kwargs):
+    """
+    Esegue una richiesta con retry su 429/5xx ed errori di connessione.
+    Rispetta Retry-After, altrimenti usa backoff esponenziale con jitter.
+    Restituisce l'ultima response: il chiamante decide con raise_for_status().
+    """
+    attempt = 0
+    while True:
+        if limiter:
+            limiter.acquire()
+
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt >= max_retries:
+                raise
+            delay = None
+            throttled = False
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries:
+                return response
+            delay = parse_retry_after(response.headers.get('Retry-After'))
+            throttled = response.status_code == 429 or delay is not None
+            response.close()
+
+        if delay is None:
+            delay = backoff_base * (2 ** attempt) * (1 + random.random() * 0.25)
+        delay = min(delay, backoff_max)
+
+        if limiter is not None and limiter.rate > 0 and throttled:
+            # Il server chiede di rallentare: la pausa vale per tutti i thread
+            # che condividono il limiter, il prossimo acquire() attende il delay.
+            # Un limiter senza limite (rate <= 0) non puo attendere: si dorme qui
+            limiter.pause(delay)
+        else:
+            time.sleep(delay)
+        attempt += 1
@@ -0,0 +1,195 @@
+/**
+ * Metriche in formato Prometheus e tracce per estrazione
+ *
+ * Ogni span (Trace.span) alimenta l'istogramma mymovies_stage_duration_seconds{stage}
+ * del processo; se richiesta, la traccia completa finisce anche nel risultato (result.trace).
+ * server.js espone il registro su /metrics insieme a quello del servizio di ricerca Python (metrics.py).
+ */
+
+const DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60];
+
+function labelKey(labels) {
+    return JSON.stringify(Object.entries(labels).sort(([a], [b]) => a.localeCompare(b)));
+}
+
+function formatLabels(labels, extra = {}) {
+    const entries = Object.entries({ ...labels, ...extra });
+    if (entries.length === 0) return '';
+    const escape = value => String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n');
+    return `{${entries.map(([key, value]) => `${key}="${escape(value)}"`).join(',')}}`;
+}
+
+class Counter {
+    constructor(name, help) {
+        this.name = name;
+        this.help = help;
+        this.values = new Map();
+    }
+
+    inc(labels = {}, value = 1) {
+        const key = labelKey(labels);
+        const current = this.values.get(key);
+        this.values.set(key, { labels, value: (current ? current.value : 0) + value });
+    }
+
+    render() {
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+        for (const { labels, value } of this.values.values()) {
+            lines.push(`${this.name}${formatLabels(labels)} ${value}`);
+        }
+        return lines.join('\n');
+    }
+}
+
+/**
+ * Valori letti al momento del render da collect() -> [[labels, value], ...] (es. stato della coda)
+ */
+class CollectedMetric {
+    constructor(name, help, type, collect) {
+        this.name = name;
+        this.help = help;
+        this.type = type;
+        this.collect = collect;
+    }
+
+    render() {
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} ${this.type}`];
+        for (const [labels, value] of this.collect()) {
+            lines.push(`${this.name}${formatLabels(labels)} ${value}`);
+        }
+        return lines.join('\n');
+    }
+}
+
+class Histogram {
+    constructor(name, help, buckets = DEFAULT_BUCKETS) {
+        this.name = name;
+        this.help = help;
+        this.buckets = buckets;
+        this.values = new Map();
+    }
+
+    observe(labels, seconds) {
+        const key = labelKey(labels);
+        let series = this.values.get(key);
+        if (!series) {
+            series = { labels, counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+            this.values.set(key, series);
+        }
+        const index = this.buckets.findIndex(bound => seconds <= bound);
+        if (index !== -1) series.counts[index]++;
+        series.sum += seconds;
+        series.count++;
+    }
+
+    render() {
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+        for (const { labels, counts, sum, count } of this.values.values()) {
+            let cumulative = 0;
+            this.buckets.forEach((bound, i) => {
+                cumulative += counts[i];
+                lines.push(`${this.name}_bucket${formatLabels(labels, { le: bound })} ${cumulative}`);
+            });
+            lines.push(`${this.name}_bucket${formatLabels(labels, { le: '+Inf' })} ${count}`);
+            lines.push(`${this.name}_sum${formatLabels(labels)} ${Math.round(sum * 1e6) / 1e6}`);
+            lines.push(`${this.name}_count${formatLabels(labels)} ${count}`);
+        }
+        return lines.join('\n');
+    }
+}
+
+class Registry {
+    constructor() {
+        this.metrics = new Map();
+    }
+
+    register(metric) {
+        if (!this.metrics.has(metric.name)) this.metrics.set(metric.name, metric);
+        return this.metrics.get(metric.name);
+    }
+
+    counter(name, help) {
+        return this.register(new Counter(name, help));
+    }
+
+    histogram(name, help, buckets) {
+        return this.register(new Histogram(name, help, buckets));
+    }
+
+    gauge(name, help, collect) {
+        return this.register(new CollectedMetric(name, help, 'gauge', collect));
+    }
+
+    collectedCounter(name, help, collect) {
+        return this.register(new CollectedMetric(name, help, 'counter', collect));
+    }
+
+    render() {
+        return [...this.metrics.values()].map(metric => metric.render()).join('\n') + '\n';
+    }
+}
+
+const registry = new Registry();
+const stageDuration = registry.histogram(
+    'mymovies_stage_duration_seconds', 'Durata delle fasi di estrazione (fetch, browser, parsing, salvataggio)');
+
+/**
+ * Traccia di un'estrazione: una lista di span { stage, startMs, durationMs } relativi all'inizio
+ */
+class Trace {
+    constructor() {
+        this.start = process.hrtime.bigint();
+        this.spans = [];
+    }
+
+    elapsedMs(from = this.start) {
+        return Number(process.hrtime.bigint() - from) / 1e6;
+    }
+
+    record(stage, startedAt, extra) {
+        const durationMs = this.elapsedMs(startedAt);
+        stageDuration.observe({ stage }, durationMs / 1000);
+        this.spans.push({
+            stage,
+            startMs: Math.round(Number(startedAt - this.start) / 1e4) / 100,
+            durationMs: Math.round(durationMs * 100) / 100,
+            ...extra
+        });
+    }
+
+    /**
+     * Esegue fn (sincrona o asincrona) misurandone la durata, anche in caso di errore
+     */
+    span(stage, fn) {
+        const startedAt = process.hrtime.bigint();
+        let result;
+        try {
+            result = fn();
+        } catch (error) {
+            this.record(stage, startedAt, { error: true });
+            throw error;
+        }
+        if (!result || typeof result.then !== 'function') {
+            this.record(stage, startedAt);
+            return result;
+        }
+        return result.then(value => {
+            this.record(stage, startedAt);
+            return value;
+        }, error => {
+            this.record(stage, startedAt, { error: true });
+            throw error;
+        });
+    }
+
+    toJSON() {
+        return { totalMs: Math.round(this.elapsedMs() * 100) / 100, spans: this.spans };
+    }
+}
+
+module.exports = {
+    Registry,
+    Trace,
+    registry,
+    stageDuration
+};
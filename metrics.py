@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Metriche in formato Prometheus e tracce per estrazione (lato Python, vedi metrics.js)
+
+Ogni span (Trace.span) alimenta l'istogramma mymovies_py_stage_duration_seconds{stage}
+del processo; search_service.py espone il registro su /metrics e server.js lo riporta
+nel proprio /metrics.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ''
+    escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')  # noqa: E731
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in items) + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels=None, value=1):
+        labels = labels or {}
+        key = _label_key(labels)
+        with self._lock:
+            current = self._values.get(key, (labels, 0))[1]
+            self._values[key] = (labels, current + value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in self._values.values():
+                lines.append(f'{self.name}{_format_labels(labels)} {value}')
+        return '\n'.join(lines)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def observe(self, labels, seconds):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'labels': labels, 'counts': [0] * len(self.buckets),
+                                              'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series['counts'][index] += 1
+                    break
+            series['sum'] += seconds
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(labels, time.perf_counter() - started)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for series in self._values.values():
+                labels = series['labels']
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['counts']):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{_format_labels(labels, {"le": bound})} {cumulative}')
+                lines.append(f'{self.name}_bucket{_format_labels(labels, {"le": "+Inf"})} {series["count"]}')
+                lines.append(f'{self.name}_sum{_format_labels(labels)} {round(series["sum"], 6)}')
+                lines.append(f'{self.name}_count{_format_labels(labels)} {series["count"]}')
+        return '\n'.join(lines)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text):
+        return self._register(Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+registry = Registry()
+stage_duration = registry.histogram(
+    'mymovies_py_stage_duration_seconds', 'Durata delle fasi lato Python (cache, coda, worker, wrapper)')
+
+
+class Trace:
+    """Traccia di un'estrazione: lista di span {stage, startMs, durationMs} relativi all'inizio"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = []
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            stage_duration.observe({'stage': stage}, duration)
+            span = {'stage': stage, 'startMs': round((started - self.start) * 1000, 2),
+                    'durationMs': round(duration * 1000, 2)}
+            if error:
+                span['error'] = True
+            self.spans.append(span)
+
+    def to_dict(self):
+        return {'totalMs': round((time.perf_counter() - self.start) * 1000, 2), 'spans': self.spans}
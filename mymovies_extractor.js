@@ -1,34 +1,38 @@
 #!/usr/bin/env node
 
-const puppeteer = require('puppeteer');
 const fs = require('fs');
 const path = require('path');
+const { getReviewIndex } = require('./review_index');
+const { normalizeFilmTitle, cleanReviewContent } = require('./text_cleaner');
+const { getHtmlArchive, canonicalUrl } = require('./html_archive');
+const { getReviewStore, formatReviewText, reviewKey } = require('./review_store');
+const { getExtractionCache, isNotFound, isNotFoundStatus } = require('./extraction_cache');
+const { Trace, registry } = require('./metrics');
 
-/**
- * Normalizza il titolo del film per creare URL MyMovies validi
- */
-function normalizeFilmTitle(title) {
-    return title
-        .toLowerCase()
-        .replace(/[àáâãäå]/g, 'a')
-        .replace(/[èéêë]/g, 'e')
-        .replace(/[ìíîï]/g, 'i')
-        .replace(/[òóôõöø]/g, 'o')
-        .replace(/[ùúûü]/g, 'u')
-        .replace(/[ýÿ]/g, 'y')
-        .replace(/[ñ]/g, 'n')
-        .replace(/[ç]/g, 'c')
-        .replace(/[^a-z0-9\s]/g, '') // Rimuovi caratteri speciali
-        .replace(/\s+/g, '-')        // Spazi -> trattini
-        .replace(/^-+|-+$/g, '');    // Rimuovi trattini all'inizio/fine
-}
+const extractionsTotal = registry.counter(
+    'mymovies_extractions_total', 'Estrazioni concluse per livello ed esito');
+const extractionDuration = registry.histogram(
+    'mymovies_extraction_duration_seconds', 'Durata totale di extractMovieReview per livello');
+const browserRequests = registry.counter(
+    'mymovies_browser_requests_total', 'Richieste delle pagine Puppeteer lasciate passare o bloccate');
+const bytesTransferred = registry.counter(
+    'mymovies_bytes_transferred_total', 'Byte scaricati da mymovies.it per livello di estrazione');
+
+const MYMOVIES_BASE_URL = process.env.MYMOVIES_BASE_URL || 'https://www.mymovies.it';
+const USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36';
+const MIN_REVIEW_LENGTH = 200;
+// Livello browser: attesa massima di #recensione p.corpo dopo domcontentloaded
+const REVIEW_SELECTOR = '#recensione p.corpo, #recensione .corpo';
+const READY_TIMEOUT_MS = parseInt(process.env.MYMOVIES_READY_TIMEOUT_MS || '5000');
+// Profilo di estrazione: solo documento, script e XHR del sito (niente immagini, CSS, font, ads, tracker)
+const ALLOWED_RESOURCE_TYPES = new Set(['document', 'script', 'xhr', 'fetch']);
 
 /**
  * Costruisce l'URL MyMovies da titolo e anno
  */
 function buildMyMoviesURL(title, year) {
     const normalizedTitle = normalizeFilmTitle(title);
-    return `https://www.mymovies.it/film/${year}/${normalizedTitle}/#recensione`;
+    return `${MYMOVIES_BASE_URL}/film/${year}/${normalizedTitle}/#recensione`;
 }
 
 /**
@@ -101,229 +105,320 @@ function extractMetadata(html) {
 }
 
 /**
- * Pulisce e valida il contenuto della recensione
+ * Estrae metadati e recensione dall'HTML grezzo della pagina (metodo HTML_RESPONSE)
  */
-function cleanReviewContent(rawContent, metadata) {
-    if (!rawContent) return '';
+function parseReviewHTML(fullHTML) {
+    const metadata = extractMetadata(fullHTML);
+    let reviewContent = '';
     
-    let cleaned = rawContent
-        .replace(/<script[^>]*>.*?<\/script>/gis, '')
-        .replace(/<style[^>]*>.*?<\/style>/gis, '')
-        .replace(/<[^>]+>/g, ' ')
-        .replace(/&[a-z]+;/gi, ' ')
-        .replace(/\s+/g, ' ')
-        .trim();
+    const patterns = [
+        '<p class="corpo">',
+        'class="corpo"'
+    ];
     
-    // Rimuovi metadata che potrebbero essere incluse nel testo
-    if (metadata.author) {
-        cleaned = cleaned.replace(new RegExp(`Recensione di\\s+${metadata.author}`, 'gi'), '');
+    for (const pattern of patterns) {
+        const index = fullHTML.indexOf(pattern);
+        if (index !== -1) {
+            const blockStart = Math.max(0, index - 200);
+            const blockEnd = Math.min(fullHTML.length, index + 8000);
+            const candidate = fullHTML.substring(blockStart, blockEnd);
+            
+            const cleaned = cleanReviewContent(candidate, metadata);
+            if (cleaned.length > reviewContent.length && cleaned.length > MIN_REVIEW_LENGTH) {
+                reviewContent = cleaned;
+                break;
+            }
+        }
     }
     
-    if (metadata.date) {
-        cleaned = cleaned.replace(new RegExp(metadata.date, 'gi'), '');
-    }
+    return { metadata, content: reviewContent };
+}
+
+/**
+ * Scarica l'HTML della pagina con una semplice richiesta HTTP (senza browser)
+ * Con un archivio la richiesta e condizionale (ETag/Last-Modified): su 304 l'HTML arriva dall'archivio.
+ */
+async function fetchReviewHTML(url, options = {}) {
+    const archive = options.archive || null;
+    const conditional = archive && options.conditional !== false ? archive.conditionalHeaders(url) : {};
     
-    // Rimuovi contenuto non pertinente
-    const cleanPatterns = [
-        // HTML artifacts all'inizio
-        /^[a-z_]+\"?>\s*/i,  // Rimuove "a_lg"> e simili all'inizio
-        /&#x[0-9A-F]+;/g,    // Codici HTML hex
-        
-        // Form di commenti
-        /Il tuo commento è stato registrato\.[\s\S]*$/i,
-        /Convalida adesso il tuo inserimento\.[\s\S]*$/i,
-        
-        // Overview aggiuntivi
-        /Overview di [^.]+\s+(lunedì|martedì|mercoledì|giovedì|venerdì|sabato|domenica)[\s\S]*$/i,
-        
-        // HTML e artifacts finali
-        /<input[^>]*>[\s\S]*$/i,
-        /\s*<[^>]*>[\s\S]*$/i,
-        
-        // Metadata del sito
-        /MYmovies\.it/gi,
-        /Film \(\d{4}\)/gi,
-        
-        // Linee separatrici
-        /^={10,}$/gm,
-        /^-{10,}$/gm
-    ];
+    const response = await fetch(canonicalUrl(url), {
+        headers: { 'User-Agent': USER_AGENT, 'Accept-Language': 'it-IT,it;q=0.9', ...conditional },
+        redirect: 'follow',
+        signal: AbortSignal.timeout(options.timeout || 20000)
+    });
     
-    for (const pattern of cleanPatterns) {
-        cleaned = cleaned.replace(pattern, '');
+    if (response.status === 304 && archive) {
+        const html = archive.read(url);
+        if (html !== null) {
+            archive.touch(url);
+            return { status: 200, html, notModified: true };
+        }
+        // Oggetto mancante nell'archivio: nuova richiesta senza condizioni
+        return fetchReviewHTML(url, { ...options, conditional: false });
     }
     
-    return cleaned.trim();
+    const contentType = response.headers.get('content-type') || '';
+    const html = response.ok && contentType.includes('text/html') ? await response.text() : '';
+    return {
+        status: response.status,
+        html,
+        // Sempre i byte del corpo decodificato: fetch decomprime e non espone la dimensione
+        // trasferita (Content-Length, se presente, sarebbe quella compressa)
+        bytes: Buffer.byteLength(html),
+        etag: response.headers.get('etag'),
+        lastModified: response.headers.get('last-modified')
+    };
+}
+
+/**
+ * Archivio dell'HTML grezzo: options.archive (istanza o true) oppure MYMOVIES_ARCHIVE=1
+ */
+function resolveArchive(options = {}) {
+    if (options.archive && typeof options.archive === 'object') return options.archive;
+    if (options.archive === true || (options.archive !== false && process.env.MYMOVIES_ARCHIVE === '1')) {
+        return getHtmlArchive();
+    }
+    return null;
+}
+
+function archivePage(archive, url, page, input) {
+    try {
+        archive.store(url, page.html, {
+            status: page.status,
+            etag: page.etag,
+            lastModified: page.lastModified,
+            title: input.title,
+            year: input.year
+        });
+    } catch (error) {
+        console.log('ATTENZIONE: HTML non archiviato:', error.message);
+    }
 }
 
 /**
  * Salva recensione con timestamp e log
+ * Il record strutturato va sempre in reviews/store (review_store.js); il .txt leggibile
+ * e un export, disattivabile con MYMOVIES_TXT_EXPORT=0.
+ * Restituisce il percorso del .txt, o dello shard se il .txt non viene scritto.
  */
 function saveReviewWithLog(result) {
     if (!result.success) return null;
 
     const { title, year } = result.input;
-    const timestamp = new Date();
-    const timestampStr = timestamp.toLocaleString('it-IT', {
-        weekday: 'long',
-        year: 'numeric',
-        month: 'long',
-        day: 'numeric',
-        hour: '2-digit',
-        minute: '2-digit',
-        second: '2-digit'
-    });
-
-    // Normalizza nome file
     const normalizedTitle = normalizeFilmTitle(title);
     const fileName = `${normalizedTitle}_${year}_review.txt`;
     const reviewsDir = path.join(__dirname, 'reviews');
     const filePath = path.join(reviewsDir, fileName);
+    const exportText = process.env.MYMOVIES_TXT_EXPORT !== '0';
+
+    const record = {
+        key: reviewKey(normalizedTitle, year),
+        title,
+        filmTitle: result.review.title || title,
+        year,
+        author: result.review.author || 'Autore sconosciuto',
+        date: result.review.date || 'Data non disponibile',
+        url: result.url,
+        content: result.review.content,
+        contentLength: result.metadata.contentLength,
+        wordCount: result.metadata.wordCount,
+        extractionMethod: result.metadata.extractionMethod,
+        tier: result.metadata.tier,
+        processingTime: result.metadata.processingTime,
+        httpStatus: result.httpStatus,
+        userAgent: USER_AGENT,
+        extractedAt: new Date().toISOString(),
+        file: exportText ? fileName : null
+    };
+
+    const store = getReviewStore();
+    try {
+        store.append(record);
+    } catch (error) {
+        console.error('❌ Errore salvataggio:', error.message);
+        return null;
+    }
 
-    // Crea directory se non esiste
-    if (!fs.existsSync(reviewsDir)) {
-        fs.mkdirSync(reviewsDir, { recursive: true });
+    if (!exportText) {
+        return path.join(store.storeDir, `${store.shard}.jsonl`);
     }
 
-    // Costruisci contenuto con timestamp e log
-    const content = `ESTRATTO IL: ${timestampStr}
-
-${result.review.title || title} (${year})
-Autore: ${result.review.author || 'Autore sconosciuto'}
-Data: ${result.review.date || 'Data non disponibile'}
-Lunghezza: ${result.metadata.contentLength} caratteri
-
-RECENSIONE:
-================================================================================
-${result.review.content}
-================================================================================
-
-LOG ESTRAZIONE:
-================================================================================
-URL: ${result.url}
-Tempo elaborazione: ${result.metadata.processingTime}ms
-Metodo estrazione: ${result.metadata.extractionMethod}
-Parole: ${result.metadata.wordCount}
-File: ${fileName}
-Timestamp: ${timestamp.toISOString()}
-User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36
-Selettori utilizzati: p.corpo, .corpo, #recensione
-Viewport: Default Puppeteer
-Lingua: Italiano
-================================================================================
-`;
+    // Allinea l'indice prima della scrittura, cosi dopo basta aggiornare una voce.
+    // Senza attendere il lock: il salvataggio puo avvenire nell'event loop di server.js
+    const index = getReviewIndex(reviewsDir);
+    try {
+        index.refresh({ wait: false });
+    } catch (error) {
+        console.error('ATTENZIONE: Indice recensioni non aggiornato:', error.message);
+    }
 
     try {
-        fs.writeFileSync(filePath, content, 'utf8');
-        return filePath;
+        fs.writeFileSync(filePath, formatReviewText(record), 'utf8');
     } catch (error) {
         console.error('❌ Errore salvataggio:', error.message);
         return null;
     }
+
+    try {
+        index.upsert(filePath, {
+            filmTitle: record.filmTitle,
+            author: record.author,
+            date: record.date,
+            length: record.contentLength
+        }, { syncDir: true, wait: false });
+    } catch (error) {
+        console.error('ATTENZIONE: Indice recensioni non aggiornato:', error.message);
+    }
+
+    return filePath;
 }
 
 
 /**
- * Funzione principale per estrarre recensione
+ * Avvia un'istanza di Chromium headless
  */
-async function extractMovieReview(title, year, options = {}) {
-    const startTime = Date.now();
-    const result = {
-        success: false,
-        input: { title, year },
-        url: null,
-        review: {
-            content: '',
-            author: null,
-            date: null,
-            title: null
-        },
-        metadata: {
-            extractionMethod: null,
-            contentLength: 0,
-            wordCount: 0,
-            processingTime: 0
-        },
-        error: null
-    };
-    
-    const browser = await puppeteer.launch({ 
+function launchBrowser(options = {}) {
+    // Caricato solo quando serve davvero un browser (livello HTTP e reextract non lo usano)
+    const puppeteer = require('puppeteer');
+    return puppeteer.launch({
         headless: options.headless !== false,
         args: ['--no-sandbox', '--disable-setuid-sandbox']
     });
+}
+
+// Dominio del sito senza www: vale per www/non-www e per http/https dopo i redirect
+const SITE_HOST = new URL(MYMOVIES_BASE_URL).hostname.replace(/^www\./, '');
+
+function isSiteHost(hostname) {
+    return hostname === SITE_HOST || hostname.endsWith(`.${SITE_HOST}`);
+}
+
+/**
+ * Richiesta da lasciar passare nel profilo di estrazione: tipo ammesso e stesso sito di MYMOVIES_BASE_URL
+ */
+function isAllowedRequest(request) {
+    if (!ALLOWED_RESOURCE_TYPES.has(request.resourceType())) return false;
+    try {
+        return isSiteHost(new URL(request.url()).hostname);
+    } catch (error) {
+        return false;
+    }
+}
+
+/**
+ * Risposta con la pagina di un film (dominio del sito, percorso /film/...), qualunque sia
+ * lo schema o il prefisso www dopo i redirect
+ */
+function isFilmPageUrl(url) {
+    try {
+        const { hostname, pathname } = new URL(url);
+        return isSiteHost(hostname) && pathname.startsWith('/film/');
+    } catch (error) {
+        return false;
+    }
+}
+
+/**
+ * Profilo di estrazione sulla pagina: blocca le risorse inutili (options.blockResources === false
+ * o MYMOVIES_BLOCK_RESOURCES=0 per disattivarlo) e conta i byte ricevuti via CDP.
+ * Restituisce le statistiche aggiornate man mano { bytes, allowed, blocked }.
+ */
+async function applyExtractionProfile(page, options = {}) {
+    const stats = { bytes: 0, allowed: 0, blocked: 0 };
+    const block = options.blockResources !== false && process.env.MYMOVIES_BLOCK_RESOURCES !== '0';
+    
+    if (block) {
+        // Sottodomini del sito ammessi (SITE_HOST, senza www)
+        await page.setRequestInterception(true);
+        page.on('request', request => {
+            if (request.isInterceptResolutionHandled && request.isInterceptResolutionHandled()) return;
+            if (isAllowedRequest(request)) {
+                stats.allowed++;
+                request.continue().catch(() => {});
+            } else {
+                stats.blocked++;
+                request.abort('blockedbyclient').catch(() => {});
+            }
+        });
+    }
     
     try {
-        const page = await browser.newPage();
-        
-        // Costruisci URL
-        const url = buildMyMoviesURL(title, year);
-        result.url = url;
-        
-        console.log(`Estrazione recensione: "${title}" (${year})`);
-        console.log(`URL: ${url}`);
+        const client = await page.target().createCDPSession();
+        await client.send('Network.enable');
+        // encodedDataLength: byte effettivi sulla rete (compressi, header inclusi)
+        client.on('Network.loadingFinished', event => { stats.bytes += event.encodedDataLength || 0; });
+    } catch (error) {
+        console.log('ATTENZIONE: Conteggio byte non disponibile:', error.message);
+    }
+    
+    return stats;
+}
+
+/**
+ * Livello browser: Puppeteer cattura l'HTML della risposta e, se serve, legge il DOM renderizzato
+ */
+async function extractWithBrowser(url, options = {}, trace = new Trace()) {
+    // Browser condiviso (worker persistente, anche come funzione che lo avvia al primo uso)
+    // oppure dedicato a questa estrazione
+    const sharedBrowser = typeof options.browser === 'function'
+        ? await trace.span('browser_acquire', options.browser)
+        : options.browser || null;
+    const browser = sharedBrowser || await trace.span('browser_launch', () => launchBrowser(options));
+    let page = null;
+    
+    try {
+        page = await trace.span('page_open', () => browser.newPage());
+        const network = await trace.span('profile', () => applyExtractionProfile(page, options));
         
         let fullHTML = '';
+        let htmlHeaders = {};
+        let htmlCapture = null;
         
-        // Intercetta HTML completo
-        page.on('response', async (response) => {
-            if (response.url().includes('mymovies.it/film') && 
+        // Intercetta HTML completo (atteso dopo la navigazione: text() puo finire dopo domcontentloaded)
+        page.on('response', (response) => {
+            const status = response.status();
+            // Le risposte di redirect non hanno corpo: conta la pagina finale
+            if (isFilmPageUrl(response.url()) && (status < 300 || status >= 400) &&
                 response.headers()['content-type']?.includes('text/html')) {
-                try {
-                    fullHTML = await response.text();
-                } catch (e) {
+                htmlHeaders = response.headers();
+                htmlCapture = response.text().then(text => { fullHTML = text; }, e => {
                     console.log('ATTENZIONE: Errore cattura HTML:', e.message);
-                }
+                });
             }
         });
         
-        await page.setUserAgent('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36');
+        await page.setUserAgent(USER_AGENT);
         
         // Naviga alla pagina
-        await page.goto(url, {
+        const response = await trace.span('navigation', () => page.goto(url, {
             waitUntil: 'domcontentloaded',
             timeout: 20000
-        });
+        }));
+        const httpStatus = response ? response.status() : null;
+        if (htmlCapture) await htmlCapture;
         
-        await page.evaluate(() => new Promise(resolve => setTimeout(resolve, 3000)));
-        
-        // Estrai metadati
+        // Metodo 1: HTML Response
         let metadata = { author: null, date: null, title: null };
-        if (fullHTML) {
-            metadata = extractMetadata(fullHTML);
-            console.log('Metadata estratti:', metadata);
-        }
-        
-        // Estrai contenuto recensione
         let reviewContent = '';
         let extractionMethod = '';
-        
-        // Metodo 1: HTML Response
         if (fullHTML) {
-            const patterns = [
-                '<p class="corpo">',
-                'class="corpo"'
-            ];
-            
-            for (const pattern of patterns) {
-                const index = fullHTML.indexOf(pattern);
-                if (index !== -1) {
-                    const blockStart = Math.max(0, index - 200);
-                    const blockEnd = Math.min(fullHTML.length, index + 8000);
-                    const candidate = fullHTML.substring(blockStart, blockEnd);
-                    
-                    const cleaned = cleanReviewContent(candidate, metadata);
-                    if (cleaned.length > reviewContent.length && cleaned.length > 200) {
-                        reviewContent = cleaned;
-                        extractionMethod = 'HTML_RESPONSE';
-                        break;
-                    }
-                }
+            const parsed = trace.span('parse', () => parseReviewHTML(fullHTML));
+            metadata = parsed.metadata;
+            console.log('Metadata estratti:', metadata);
+            if (parsed.content) {
+                reviewContent = parsed.content;
+                extractionMethod = 'HTML_RESPONSE';
             }
         }
         
-        // Metodo 2: DOM Fallback
-        if (!reviewContent || reviewContent.length < 200) {
-            const domContent = await page.evaluate(() => {
+        // Metodo 2: DOM Fallback, appena il testo della recensione e nel DOM (o allo scadere del timeout)
+        if ((!reviewContent || reviewContent.length < MIN_REVIEW_LENGTH) && httpStatus !== 404) {
+            const readyTimeout = options.readyTimeout || READY_TIMEOUT_MS;
+            await trace.span('review_ready', () => page.waitForSelector(REVIEW_SELECTOR, { timeout: readyTimeout })
+                .catch(() => console.log(`ATTENZIONE: ${REVIEW_SELECTOR} assente dopo ${readyTimeout}ms`)));
+            
+            const domContent = await trace.span('dom_fallback', () => page.evaluate(() => {
                 const recensioneEl = document.getElementById('recensione');
                 if (!recensioneEl) return null;
                 
@@ -341,14 +436,132 @@ async function extractMovieReview(title, year, options = {}) {
                 }
                 
                 return bestContent || recensioneEl.innerText || '';
-            });
+            }));
             
             if (domContent && domContent.length > reviewContent.length) {
-                reviewContent = cleanReviewContent(domContent, metadata);
+                reviewContent = trace.span('clean', () => cleanReviewContent(domContent, metadata));
                 extractionMethod = 'DOM_FALLBACK';
             }
         }
         
+        return {
+            httpStatus, metadata, content: reviewContent, extractionMethod, network,
+            page: { html: fullHTML, status: httpStatus, etag: htmlHeaders.etag, lastModified: htmlHeaders['last-modified'] }
+        };
+    } finally {
+        await trace.span('browser_cleanup', async () => {
+            if (sharedBrowser) {
+                if (page) await page.close().catch(() => {});
+            } else {
+                await browser.close();
+            }
+        });
+    }
+}
+
+/**
+ * Funzione principale per estrarre recensione
+ * Prima una richiesta HTTP diretta (livello HTTP); il browser parte solo se il testo
+ * trovato e sotto la soglia (livello BROWSER).
+ * options.browser: browser da riutilizzare, o funzione async che lo restituisce (viene chiusa solo la pagina)
+ * options.httpTier: false per andare direttamente al browser (anche MYMOVIES_HTTP_TIER=0)
+ * options.archive: salva l'HTML grezzo in html_archive (anche MYMOVIES_ARCHIVE=1)
+ * options.blockResources: false per caricare anche immagini, CSS, font e terze parti nel browser
+ * options.readyTimeout: attesa massima (ms) della recensione nel DOM (anche MYMOVIES_READY_TIMEOUT_MS)
+ */
+async function extractMovieReview(title, year, options = {}) {
+    const startTime = Date.now();
+    // Durata di ogni fase: sempre nelle metriche, nel risultato con options.trace o MYMOVIES_TRACE=1
+    const trace = new Trace();
+    // Byte scaricati in questa estrazione (livello HTTP + browser), riportati in metadata
+    const network = { bytes: 0, requestsBlocked: 0 };
+    const result = {
+        success: false,
+        input: { title, year },
+        url: null,
+        review: {
+            content: '',
+            author: null,
+            date: null,
+            title: null
+        },
+        metadata: {
+            extractionMethod: null,
+            tier: null,
+            contentLength: 0,
+            wordCount: 0,
+            processingTime: 0
+        },
+        httpStatus: null,
+        // true solo se la recensione non esiste (404 o pagina 2xx senza recensione): esito da mettere in cache
+        notFound: false,
+        error: null
+    };
+    
+    try {
+        // Costruisci URL
+        const url = buildMyMoviesURL(title, year);
+        result.url = url;
+        
+        console.log(`Estrazione recensione: "${title}" (${year})`);
+        console.log(`URL: ${url}`);
+        
+        let extraction = null;
+        const httpTier = options.httpTier !== false && process.env.MYMOVIES_HTTP_TIER !== '0';
+        const archive = resolveArchive(options);
+        // Avanzamento per la coda dei job: http, browser, saving
+        const progress = stage => options.onProgress && options.onProgress(stage);
+        
+        // Livello 1: HTTP diretto, stesso parsing di HTML_RESPONSE
+        if (httpTier) {
+            progress('http');
+            try {
+                const fetched = await trace.span('http_fetch', () => fetchReviewHTML(url, { archive }));
+                result.httpStatus = fetched.status;
+                network.bytes += fetched.bytes || 0;
+                bytesTransferred.inc({ tier: 'HTTP' }, fetched.bytes || 0);
+                if (archive && fetched.html && !fetched.notModified) {
+                    trace.span('archive_write', () => archivePage(archive, url, fetched, result.input));
+                }
+                
+                if (fetched.status === 404) {
+                    // Pagina inesistente: il browser non troverebbe altro
+                    extraction = { httpStatus: 404, metadata: { author: null, date: null, title: null },
+                        content: '', extractionMethod: '', tier: 'HTTP' };
+                } else if (fetched.html) {
+                    const parsed = trace.span('parse', () => parseReviewHTML(fetched.html));
+                    console.log('Metadata estratti:', parsed.metadata);
+                    if (parsed.content.length >= MIN_REVIEW_LENGTH) {
+                        extraction = { httpStatus: fetched.status, metadata: parsed.metadata,
+                            content: parsed.content, extractionMethod: 'HTML_RESPONSE', tier: 'HTTP' };
+                    }
+                }
+            } catch (error) {
+                console.log('ATTENZIONE: Richiesta HTTP diretta fallita:', error.message);
+            }
+            
+            if (!extraction) {
+                console.log('Contenuto insufficiente via HTTP, uso il browser');
+            }
+        }
+        
+        // Livello 2: browser (HTML_RESPONSE + DOM_FALLBACK)
+        if (!extraction) {
+            progress('browser');
+            extraction = { ...await extractWithBrowser(url, options, trace), tier: 'BROWSER' };
+            network.bytes += extraction.network.bytes;
+            network.requestsBlocked = extraction.network.blocked;
+            bytesTransferred.inc({ tier: 'BROWSER' }, extraction.network.bytes);
+            browserRequests.inc({ action: 'allowed' }, extraction.network.allowed);
+            browserRequests.inc({ action: 'blocked' }, extraction.network.blocked);
+            if (archive && extraction.page.html) {
+                trace.span('archive_write', () => archivePage(archive, url, extraction.page, result.input));
+            }
+        }
+        
+        result.httpStatus = extraction.httpStatus;
+        const { metadata, content: reviewContent, extractionMethod } = extraction;
+        
         // Compila risultato
         if (reviewContent && reviewContent.length > 50) {
             result.success = true;
@@ -361,17 +574,19 @@ async function extractMovieReview(title, year, options = {}) {
             
             result.metadata = {
                 extractionMethod,
+                tier: extraction.tier,
                 contentLength: reviewContent.length,
                 wordCount: reviewContent.split(/\s+/).length,
                 processingTime: Date.now() - startTime
             };
             
             
-            console.log(`✅ Successo! ${reviewContent.length} caratteri estratti`);
+            console.log(`✅ Successo! ${reviewContent.length} caratteri estratti (livello ${extraction.tier})`);
 
             // Salva con timestamp e log (sempre, a meno che non sia specificato --no-save)
             if (!options.noSave) {
-                const savedPath = saveReviewWithLog(result);
+                progress('saving');
+                const savedPath = trace.span('save', () => saveReviewWithLog(result));
                 if (savedPath) {
                     console.log(`File salvato: ${path.basename(savedPath)}`);
                     result.filePath = savedPath;
@@ -379,16 +594,42 @@ async function extractMovieReview(title, year, options = {}) {
             }
 
         } else {
-            result.error = 'Recensione non trovata o troppo breve';
-            console.log('❌ Recensione non trovata');
+            result.metadata.tier = extraction.tier;
+            if (isNotFoundStatus(extraction.httpStatus)) {
+                result.notFound = true;
+                result.error = 'Recensione non trovata o troppo breve';
+                console.log('❌ Recensione non trovata');
+            } else {
+                // 5xx, 429, 403, richiesta bloccata o nessuna risposta: da ritentare, non in cache
+                result.error = extraction.httpStatus
+                    ? `Pagina non disponibile (HTTP ${extraction.httpStatus})`
+                    : 'Pagina non disponibile (nessuna risposta)';
+                console.log(`❌ ${result.error}`);
+            }
+        }
+        
+        // Successi salvati e recensioni inesistenti: le richieste successive non rifanno l'estrazione
+        const cache = getExtractionCache();
+        if (cache) {
+            result.metadata.processingTime = Date.now() - startTime;
+            trace.span('cache_write', () => cache.set(result));
         }
         
     } catch (error) {
         result.error = error.message;
         console.error('💥 Errore:', error.message);
     } finally {
-        await browser.close();
         result.metadata.processingTime = Date.now() - startTime;
+        result.metadata.bytesTransferred = network.bytes;
+        result.metadata.requestsBlocked = network.requestsBlocked;
+        
+        const tier = result.metadata.tier || 'none';
+        const outcome = result.success ? 'success' : (isNotFound(result) ? 'not_found' : 'error');
+        extractionsTotal.inc({ tier, outcome });
+        extractionDuration.observe({ tier }, result.metadata.processingTime / 1000);
+        if (options.trace || process.env.MYMOVIES_TRACE === '1') {
+            result.trace = trace.toJSON();
+        }
     }
     
     return result;
@@ -405,6 +646,9 @@ async function main() {
         console.log('  --json      Output in JSON format');
         console.log('  --verbose   Show browser (non-headless mode)');
         console.log('  --no-save   Don\'t save review to file');
+        console.log('  --browser   Skip the direct HTTP fetch and use the browser only');
+        console.log('  --archive   Keep the raw HTML in .cache/html_archive (conditional GET on later runs)');
+        console.log('  --trace     Print per-stage timings (included in the JSON output as "trace")');
         process.exit(1);
     }
     
@@ -413,6 +657,9 @@ async function main() {
     const outputJson = args.includes('--json');
     const verbose = args.includes('--verbose');
     const noSave = args.includes('--no-save');
+    const browserOnly = args.includes('--browser');
+    const archive = args.includes('--archive');
+    const trace = args.includes('--trace');
     
     if (!year || year < 1900 || year > 2030) {
         console.error('Errore: Anno non valido');
@@ -422,7 +669,10 @@ async function main() {
     try {
         const result = await extractMovieReview(title, year, {
             headless: !verbose,
-            noSave: noSave
+            noSave: noSave,
+            httpTier: !browserOnly,
+            archive: archive || undefined,
+            trace
         });
         
         if (outputJson) {
@@ -442,7 +692,9 @@ async function main() {
                 
                 console.log(`Lunghezza: ${result.metadata.contentLength} caratteri`);
                 console.log(`Tempo: ${result.metadata.processingTime}ms`);
-                console.log(`Metodo: ${result.metadata.extractionMethod}`);
+                console.log(`Scaricati: ${(result.metadata.bytesTransferred / 1024).toFixed(1)} KB` +
+                    (result.metadata.requestsBlocked ? ` (${result.metadata.requestsBlocked} richieste bloccate)` : ''));
+                console.log(`Metodo: ${result.metadata.extractionMethod} (livello ${result.metadata.tier})`);
 
                 console.log('\nRECENSIONE:');
                 console.log('-'.repeat(80));
@@ -452,6 +704,14 @@ async function main() {
                 console.log(`ERRORE: ${result.error}`);
                 console.log(`URL tentato: ${result.url}`);
             }
+            
+            if (result.trace) {
+                console.log(`\nFASI (${result.trace.totalMs}ms totali):`);
+                for (const span of result.trace.spans) {
+                    const label = span.error ? `${span.stage} (errore)` : span.stage;
+                    console.log(`  +${String(span.startMs).padStart(8)}ms  ${label.padEnd(18)} ${span.durationMs}ms`);
+                }
+            }
         }
         
     } catch (error) {
@@ -463,6 +723,10 @@ async function main() {
 // Export per uso come modulo
 module.exports = {
     extractMovieReview,
+    launchBrowser,
+    parseReviewHTML,
+    saveReviewWithLog,
+    MIN_REVIEW_LENGTH,
     buildMyMoviesURL,
     normalizeFilmTitle
 };
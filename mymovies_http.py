@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Accesso HTTP leggero a MyMovies.it (senza browser)
+Costruzione URL come buildMyMoviesURL, controllo della recensione via GET (o solo della pagina
+via HEAD) e risoluzione dell'URL tra le varianti di titolo e anno (MyMoviesResolver)
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+
+from http_client import TokenBucket, create_session, request_with_retry
+from text_cleaner import normalize_title_py
+
+MYMOVIES_BASE_URL = os.getenv('MYMOVIES_BASE_URL', 'https://www.mymovies.it')
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+
+def build_mymovies_url(title, year, base_url=None):
+    """Costruisce l'URL MyMovies da titolo e anno (come buildMyMoviesURL)"""
+    return f"{base_url or MYMOVIES_BASE_URL}/film/{year}/{normalize_title_py(title)}/"
+
+
+class MyMoviesChecker:
+    """Controllo esistenza film su MyMovies.it con sole richieste HTTP"""
+
+    def __init__(self, base_url=None, max_workers=8, rate_limit=None, timeout=8):
+        self.base_url = base_url or MYMOVIES_BASE_URL
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = create_session(max_workers, user_agent=USER_AGENT)
+        if rate_limit is None:
+            rate_limit = float(os.getenv('MYMOVIES_RATE_LIMIT', '5'))
+        self.limiter = TokenBucket(rate_limit)
+
+    @staticmethod
+    def _is_film_page(url):
+        """Verifica che l'URL finale (dopo redirect) sia ancora una pagina film"""
+        return re.match(r'^/film/\d{4}/[^/]+', urlparse(url).path) is not None
+
+    def check(self, title, year, deep=True):
+        """
+        Controlla se la pagina del film esiste (exists) e, con deep=True, scarica l'HTML e
+        verifica anche la presenza della recensione (has_review, p.corpo).
+        deep=False fa solo una HEAD: has_review resta None e una pagina senza recensione
+        (es. film non ancora uscito) risulta comunque esistente.
+        """
+        url = build_mymovies_url(title, year, self.base_url)
+        result = {
+            'title': title,
+            'year': year,
+            'url': url,
+            'final_url': None,
+            'http_status': None,
+            'exists': False,
+            'has_review': None,
+            'error': None
+        }
+
+        try:
+            method = 'GET' if deep else 'HEAD'
+            response = request_with_retry(
+                self.session, method, url, limiter=self.limiter, max_retries=2,
+                allow_redirects=True, timeout=self.timeout
+            )
+            if response.status_code in (403, 405, 501) and method == 'HEAD':
+                # Server che non gestiscono HEAD
+                response = request_with_retry(
+                    self.session, 'GET', url, limiter=self.limiter, max_retries=2,
+                    allow_redirects=True, timeout=self.timeout
+                )
+
+            result['http_status'] = response.status_code
+            result['final_url'] = response.url
+            result['exists'] = response.status_code == 200 and self._is_film_page(response.url)
+
+            if deep and result['exists']:
+                result['has_review'] = 'class="corpo"' in response.text
+            response.close()
+
+        except requests.exceptions.RequestException as e:
+            result['error'] = str(e)
+
+        return result
+
+    @staticmethod
+    def has_review(result):
+        """Esito di check(): pagina trovata e recensione non esclusa (None se deep=False)"""
+        return result['exists'] and result['has_review'] is not False
+
+    def exists(self, title, year, deep=True):
+        return self.has_review(self.check(title, year, deep=deep))
+
+    def check_many(self, films, deep=True):
+        """Controlla in parallelo una lista di (titolo, anno), mantenendo l'ordine"""
+        films = list(films)
+        if not films:
+            return []
+
+        workers = max(1, min(self.max_workers, len(films)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda film: self.check(film[0], film[1], deep=deep), films))
+
+
+class MyMoviesResolver:
+    """
+    Trova la pagina MyMovies di un film TMDB provando in parallelo titolo localizzato e originale,
+    anno TMDB e anno +-1 (MyMovies usa spesso l'anno di uscita italiana).
+    Vince il primo candidato in ordine di priorita la cui pagina contiene la recensione
+    (verifica completa via GET, come ai_wrapper.sh check); la mappatura id TMDB -> URL
+    resta in cache (TMDBCache se passata, altrimenti solo in memoria).
+    """
+
+    CACHE_ENDPOINT = '/mymovies/resolve'
+    MEMORY_ENTRIES = 2048
+    HIT_TTL = 30 * 24 * 3600
+
+    def __init__(self, checker=None, cache=None, year_window=1, max_workers=6, miss_ttl=None):
+        self.checker = checker or MyMoviesChecker()
+        self.cache = cache
+        self.year_window = year_window
+        self.max_workers = max_workers
+        # Film non trovati: si riprova dopo un giorno (la pagina puo comparire all'uscita)
+        self.miss_ttl = miss_ttl if miss_ttl is not None else int(os.getenv('MYMOVIES_RESOLVE_MISS_TTL', '86400'))
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def candidates(self, title, year, original_title=None):
+        """(titolo, anno) in ordine di priorita, senza slug duplicati"""
+        titles = [title]
+        if original_title and original_title != title:
+            titles.append(original_title)
+        try:
+            base_year = int(year)
+        except (TypeError, ValueError):
+            return []
+
+        # Anno TMDB, poi successivo (uscita italiana posticipata), poi precedente
+        offsets = [0]
+        for delta in range(1, self.year_window + 1):
+            offsets += [delta, -delta]
+
+        seen = set()
+        result = []
+        for offset in offsets:
+            for candidate_title in titles:
+                slug = (normalize_title_py(candidate_title), base_year + offset)
+                if slug[0] and slug not in seen:
+                    seen.add(slug)
+                    result.append((candidate_title, str(base_year + offset)))
+        return result
+
+    def _cache_key(self, title, year, tmdb_id):
+        return {'tmdb_id': int(tmdb_id)} if tmdb_id else {'slug': normalize_title_py(title), 'year': str(year)}
+
+    def _cached(self, params):
+        key = tuple(sorted(params.items()))
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > time.time():
+                self._memory.move_to_end(key)
+                return entry[0]
+        return self.cache.get(self.CACHE_ENDPOINT, params) if self.cache else None
+
+    def _store(self, params, value, ttl):
+        with self._lock:
+            self._memory[tuple(sorted(params.items()))] = (value, time.time() + ttl)
+            while len(self._memory) > self.MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+        if self.cache:
+            self.cache.set(self.CACHE_ENDPOINT, params, value, ttl=ttl)
+
+    def resolve(self, title, year, original_title=None, tmdb_id=None):
+        """
+        Restituisce {'found', 'title', 'year', 'url', 'probes', 'cached', 'error'}:
+        title e year sono quelli con cui MyMovies espone il film (da passare a extract_review).
+        """
+        params = self._cache_key(title, year, tmdb_id)
+        cached = self._cached(params)
+        if cached is not None:
+            return {**cached, 'probes': 0, 'cached': True, 'error': None}
+
+        candidates = self.candidates(title, year, original_title)
+        if not candidates:
+            return {'found': False, 'title': title, 'year': year, 'url': None, 'probes': 0,
+                    'cached': False, 'error': None}
+
+        results = [None] * len(candidates)
+        winner = None
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(candidates))))
+        try:
+            futures = {executor.submit(self.checker.check, candidate_title, candidate_year): index
+                       for index, (candidate_title, candidate_year) in enumerate(candidates)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                # Il miglior candidato trovato vince appena tutti quelli con priorita maggiore hanno risposto
+                for result in results:
+                    if result is None:
+                        break
+                    if self.checker.has_review(result):
+                        winner = result
+                        break
+                if winner:
+                    break
+        finally:
+            # Le verifiche ancora in coda non servono piu
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        probes = sum(1 for result in results if result is not None)
+        errors = [result['error'] for result in results if result is not None and result['error']]
+        if winner:
+            value = {'found': True, 'title': winner['title'], 'year': winner['year'], 'url': winner['url']}
+            self._store(params, value, self.HIT_TTL)
+        else:
+            value = {'found': False, 'title': title, 'year': year, 'url': None}
+            # Errori di rete: esito incerto, non va in cache
+            if not errors:
+                self._store(params, value, self.miss_ttl)
+        return {**value, 'probes': probes, 'cached': False, 'error': errors[0] if errors and not winner else None}
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    if len(sys.argv) < 3:
+        print('Usage: python3 mymovies_http.py "Titolo Film" ANNO [--head]')
+        print('  --head  solo esistenza della pagina (HEAD), senza verificare la recensione')
+        sys.exit(2)
+
+    checker = MyMoviesChecker()
+    result = checker.check(sys.argv[1], sys.argv[2], deep='--head' not in sys.argv)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    # 0 recensione trovata, 1 non trovata, 3 errore di rete (come ai_wrapper.sh)
+    sys.exit(0 if checker.has_review(result) else 3 if result['error'] else 1)
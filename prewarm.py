@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Pre-riscaldamento delle cache per le uscite in sala
+Da lanciare periodicamente (es. cron la mattina) prima dei picchi di traffico sulle novita.
+
+1. elenchi TMDB now_playing e upcoming per la regione (default IT), pagine in parallelo
+2. ricerca per titolo di ogni film nella cache TMDB con le stesse query dell'interfaccia (titolo
+   com'e per /api/search, titolo normalizzato per il typeahead), poi dettagli + credits dei film e
+   dei primi risultati di ogni ricerca, entro il rate limit --rps (0 = nessun limite)
+3. opzionale (--extract-top N): risoluzione URL ed estrazione MyMovies dei N film piu popolari,
+   che finiscono nella cache dei risultati di estrazione
+
+Uso:
+  python3 prewarm.py --pages 3 --rps 20
+  python3 prewarm.py --extract-top 20 --extract-rps 0.5
+  # crontab: 0 6 * * * cd /path/mymovies_extractor && python3 prewarm.py --extract-top 20 >> .cache/prewarm.log
+
+Stampa su stdout un report JSON (voci scaricate, gia in cache o fallite, esiti delle estrazioni, durate).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from extract_pipeline import ExtractionPipeline
+from mymovies_http import MyMoviesResolver
+from search_and_extract import MyMoviesExtractor, TMDBMovieSearch
+from typeahead import normalize_query
+
+DEFAULT_LISTS = ('now_playing', 'upcoming')
+# Risultati di /api/search (search_service.py): search_movies carica i dettagli di ognuno
+SEARCH_RESULTS = 10
+
+
+def collect_movies(tmdb, lists, region, max_pages):
+    """Film degli elenchi (senza duplicati) ordinati per popolarita, piu le pagine lette per elenco"""
+    first_pages = {name: tmdb.list_movies(name, region, 1) for name in lists}
+    pages = [(name, page) for name, (_, total_pages) in first_pages.items()
+             for page in range(2, min(total_pages, max_pages) + 1)]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(tmdb.max_workers, len(pages) or 1))) as executor:
+        other_pages = list(executor.map(lambda item: (item[0], tmdb.list_movies(item[0], region, item[1])[0]), pages))
+
+    movies = {}
+    report = {}
+    for name, (results, total_pages) in first_pages.items():
+        chunks = [results] + [chunk for list_name, chunk in other_pages if list_name == name]
+        report[name] = {'pages': len(chunks), 'total_pages': total_pages, 'movies': sum(len(c) for c in chunks)}
+        for chunk in chunks:
+            for movie in chunk:
+                movies.setdefault(movie['id'], movie)
+
+    return sorted(movies.values(), key=lambda movie: movie['popularity'], reverse=True), report
+
+
+def search_queries(movies):
+    """
+    Query che l'interfaccia manda a TMDB per i titoli indicati, senza duplicati: il titolo com'e
+    (/api/search passa il testo digitato a search_movies) e normalizzato (chiave del typeahead)
+    """
+    queries = {}
+    for movie in movies:
+        for query in (movie['title'].strip(), normalize_query(movie['title'])):
+            if query:
+                queries.setdefault(query, None)
+    return list(queries)
+
+
+def warm_tmdb(tmdb, movies):
+    """Ricerche per titolo, poi dettagli/credits dei film e dei risultati; restituisce le richieste fallite"""
+    def search(query):
+        try:
+            results, _ = tmdb.search_movies_light(query, SEARCH_RESULTS)
+            return [movie['id'] for movie in results], 0
+        except requests.exceptions.RequestException:
+            return [], 1
+
+    def details(movie_id):
+        try:
+            tmdb.fetch_movie_details(movie_id)
+            return 0
+        except requests.exceptions.RequestException:
+            return 1
+
+    with ThreadPoolExecutor(max_workers=tmdb.max_workers) as executor:
+        searches = list(executor.map(search, search_queries(movies)))
+        movie_ids = dict.fromkeys([movie['id'] for movie in movies] +
+                                  [movie_id for ids, _ in searches for movie_id in ids])
+        return sum(failed for _, failed in searches) + sum(executor.map(details, movie_ids))
+
+
+def pre_extract(movies, workers, requests_per_second, cache):
+    """Risoluzione + estrazione dei film indicati (pipeline di extract_pipeline.py); conteggio per stato"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    extractor = MyMoviesExtractor(script_dir, worker_concurrency=workers)
+    resolver = MyMoviesResolver(extractor.checker, cache=cache)
+    pipeline = ExtractionPipeline(extractor, resolver, workers=workers, requests_per_second=requests_per_second)
+
+    records = (json.dumps({'title': movie['title'], 'year': movie['year'], 'tmdb_id': movie['id'],
+                           'original_title': movie['original_title']}) for movie in movies)
+
+    def progress(result):
+        label = '(dalla cache)' if result.get('cached') else result.get('message', '')
+        print(f"  {result['status']:<10} {result.get('title')} ({result.get('year')}) {label}", file=sys.stderr)
+
+    try:
+        return pipeline.run(records, progress)
+    finally:
+        extractor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-riscaldamento cache TMDB/MyMovies per le uscite in sala')
+    parser.add_argument('--lists', default=','.join(DEFAULT_LISTS),
+                        help='Elenchi TMDB separati da virgola (default: now_playing,upcoming)')
+    parser.add_argument('--region', default='IT', help='Regione TMDB (default: IT)')
+    parser.add_argument('--pages', type=int, default=5, help='Pagine massime per elenco, 20 film ciascuna (default: 5)')
+    parser.add_argument('--rps', type=float, default=20,
+                        help='Richieste/secondo verso TMDB (default: 20, meta del limite TMDB; 0 = nessun limite)')
+    parser.add_argument('--extract-top', type=int, default=0,
+                        help='Estrae le recensioni dei N film piu popolari (default: 0 = nessuna)')
+    parser.add_argument('--extract-rps', type=float, default=0.5,
+                        help='Estrazioni/secondo verso mymovies.it (default: 0.5)')
+    parser.add_argument('--workers', type=int, default=4, help='Estrazioni concorrenti (default: 4)')
+    args = parser.parse_args()
+
+    if os.getenv('TMDB_CACHE', '1') == '0':
+        print(json.dumps({'status': 'error', 'message': 'TMDB_CACHE=0: niente da pre-riscaldare'}))
+        sys.exit(2)
+
+    started = time.time()
+    tmdb = TMDBMovieSearch(rate_limit=args.rps)
+    hits, misses = tmdb.cache.hits, tmdb.cache.misses
+
+    lists = [name.strip() for name in args.lists.split(',') if name.strip()]
+    try:
+        movies, lists_report = collect_movies(tmdb, lists, args.region, args.pages)
+    except requests.exceptions.RequestException as e:
+        print(json.dumps({'status': 'error', 'message': f'Elenchi TMDB non disponibili: {e}'}))
+        sys.exit(1)
+    print(f"▶ {len(movies)} film da {', '.join(lists)} ({args.region})", file=sys.stderr)
+
+    failed = warm_tmdb(tmdb, movies)
+    tmdb_elapsed = time.time() - started
+    # Prima delle estrazioni: il resolver usa la stessa cache e falserebbe i conteggi.
+    # Ogni richiesta fallita e un miss che non ha portato nulla in cache
+    fetched, already_cached = tmdb.cache.misses - misses - failed, tmdb.cache.hits - hits
+
+    extraction = None
+    extraction_elapsed = 0
+    if args.extract_top > 0:
+        top = [movie for movie in movies if movie['year'] != 'N/A'][:args.extract_top]
+        print(f"▶ Estrazione dei {len(top)} film piu popolari", file=sys.stderr)
+        extraction_started = time.time()
+        extraction = pre_extract(top, args.workers, args.extract_rps, tmdb.cache)
+        extraction_elapsed = time.time() - extraction_started
+
+    report = {
+        'prewarm_completed': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'region': args.region,
+        'lists': lists_report,
+        'movies': len(movies),
+        'tmdb': {
+            # Richieste a TMDB la cui risposta e ora in cache
+            'fetched': fetched,
+            'already_cached': already_cached,
+            'failed': failed,
+            'elapsed_s': round(tmdb_elapsed, 2)
+        },
+        'extraction': {'results': extraction, 'elapsed_s': round(extraction_elapsed, 2)} if extraction is not None else None,
+        'elapsed_s': round(time.time() - started, 2)
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 // Global state
 let currentExtractionTimer = null;
 let extractionStartTime = null;
+let typeaheadTimer = null;
+let typeaheadController = null;
+
+const TYPEAHEAD_DELAY_MS = 200;
+const TYPEAHEAD_MIN_LENGTH = 2;
 
 // DOM Elements
 const searchInput = document.getElementById('searchInput');
@@ -29,6 +34,7 @@ document.addEventListener('DOMContentLoaded', function() {
     searchInput.addEventListener('keypress', function(e) {
         if (e.key === 'Enter') searchMovies();
     });
+    searchInput.addEventListener('input', scheduleTypeahead);
     
     extractBtn.addEventListener('click', extractDirect);
     refreshBtn.addEventListener('click', function() {
@@ -47,6 +53,7 @@ async function searchMovies() {
     const query = searchInput.value.trim();
     if (!query) return;
     
+    cancelTypeahead();
     searchBtn.disabled = true;
     searchBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Ricerca...';
     
@@ -75,6 +82,47 @@ async function searchMovies() {
     }
 }
 
+// Typeahead: risultati leggeri mentre si digita, il regista arriva in un secondo momento
+function cancelTypeahead() {
+    clearTimeout(typeaheadTimer);
+    if (typeaheadController) typeaheadController.abort();
+    typeaheadController = null;
+}
+
+function scheduleTypeahead() {
+    cancelTypeahead();
+    const query = searchInput.value.trim();
+    if (query.length < TYPEAHEAD_MIN_LENGTH) return;
+    
+    typeaheadTimer = setTimeout(() => runTypeahead(query), TYPEAHEAD_DELAY_MS);
+}
+
+async function runTypeahead(query) {
+    const controller = new AbortController();
+    typeaheadController = controller;
+    
+    try {
+        const response = await fetch(`/api/typeahead?q=${encodeURIComponent(query)}`, { signal: controller.signal });
+        const movies = await response.json();
+        if (movies.error || controller.signal.aborted) return;
+        
+        showSearchResults(movies);
+        if (movies.length === 0) return;
+        
+        const ids = movies.map(movie => movie.id).join(',');
+        const directorsResponse = await fetch(`/api/typeahead/directors?ids=${ids}`, { signal: controller.signal });
+        const directors = await directorsResponse.json();
+        if (directors.error) return;
+        
+        for (const [id, director] of Object.entries(directors)) {
+            const element = searchResults.querySelector(`[data-director-id="${id}"]`);
+            if (element) element.textContent = director;
+        }
+    } catch (error) {
+        if (error.name !== 'AbortError') console.error('Typeahead error:', error);
+    }
+}
+
 // Show search results
 function showSearchResults(movies) {
     if (!movies || movies.length === 0) {
@@ -87,7 +135,7 @@ function showSearchResults(movies) {
         <div class="movie-result">
             <div class="movie-info">
                 <h4>${movie.title} (${movie.year})</h4>
-                <p><strong>Regia:</strong> ${movie.director}</p>
+                <p><strong>Regia:</strong> <span data-director-id="${movie.id}">${movie.director || '…'}</span></p>
                 <p><strong>Voto TMDB:</strong> ${movie.vote_average}/10</p>
                 <p>${movie.overview}</p>
             </div>
@@ -121,13 +169,21 @@ async function extractDirect() {
     showExtractionModal(title, year);
     
     try {
-        const response = await fetch('/api/extract', {
+        const response = await fetch('/api/jobs', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ title, year })
         });
         
-        const result = await response.json();
+        const submitted = await response.json();
+        if (!response.ok) {
+            hideExtractionModal();
+            alert(`❌ Errore estrazione: ${submitted.error}`);
+            return;
+        }
+        
+        const job = await waitForJob(submitted);
+        const result = job.result || { success: false, error: job.error };
         
         hideExtractionModal();
         
@@ -152,6 +208,45 @@ async function extractDirect() {
     }
 }
 
+const JOB_STAGE_LABELS = {
+    http: 'Download pagina film...',
+    browser: 'Caricamento pagina nel browser...',
+    saving: 'Salvataggio recensione...'
+};
+
+// Segue il job via SSE fino alla conclusione (stato e posizione in coda nel modal)
+function waitForJob(submitted) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(submitted.eventsUrl);
+        
+        source.addEventListener('job', event => {
+            const job = JSON.parse(event.data);
+            const status = document.getElementById('extractionStatus');
+            
+            if (job.status === 'queued') {
+                status.textContent = `In coda (posizione ${job.position})...`;
+            } else if (job.status === 'running') {
+                status.textContent = JOB_STAGE_LABELS[job.stage] || 'Connessione a MyMovies.it...';
+            } else {
+                source.close();
+                resolve(job);
+            }
+        });
+        
+        source.onerror = () => {
+            // Connessione persa: ultimo stato dal server
+            source.close();
+            fetch(submitted.statusUrl)
+                .then(response => response.json())
+                .then(job => {
+                    if (!job.status) return resolve({ status: 'error', error: job.error });
+                    resolve(job.status === 'done' || job.status === 'error' ? job : waitForJob(submitted));
+                })
+                .catch(reject);
+        };
+    });
+}
+
 // Show extraction modal
 function showExtractionModal(title, year) {
     document.getElementById('extractingTitle').textContent = title;
@@ -162,19 +257,6 @@ function showExtractionModal(title, year) {
     
     extractionStartTime = Date.now();
     currentExtractionTimer = setInterval(updateExtractionTimer, 1000);
-    
-    // Simulate progress updates
-    setTimeout(() => {
-        document.getElementById('extractionStatus').textContent = 'Caricamento pagina film...';
-    }, 2000);
-    
-    setTimeout(() => {
-        document.getElementById('extractionStatus').textContent = 'Estrazione contenuto recensione...';
-    }, 5000);
-    
-    setTimeout(() => {
-        document.getElementById('extractionStatus').textContent = 'Pulizia e validazione testo...';
-    }, 10000);
 }
 
 // Hide extraction modal
@@ -194,15 +276,20 @@ function updateExtractionTimer() {
     document.getElementById('extractionTime').textContent = `${elapsed}s`;
 }
 
-// Load reviews list
-async function loadReviews() {
-    reviewsList.innerHTML = '<div class="loading"><i class="fas fa-spinner fa-spin"></i> Caricamento recensioni...</div>';
+// Load reviews list (50 per pagina, le successive con "Carica altre")
+async function loadReviews(cursor = null) {
+    if (!cursor) {
+        reviewsList.innerHTML = '<div class="loading"><i class="fas fa-spinner fa-spin"></i> Caricamento recensioni...</div>';
+    }
     
     try {
-        const response = await fetch('/api/reviews');
+        const params = new URLSearchParams({ limit: 50 });
+        if (cursor) params.set('cursor', cursor);
+        
+        const response = await fetch(`/api/reviews?${params}`);
         const data = await response.json();
         
-        if (data.reviews.length === 0) {
+        if (!cursor && data.reviews.length === 0) {
             reviewsList.innerHTML = `
                 <div class="text-center text-muted">
                     <i class="fas fa-film" style="font-size: 3rem; margin-bottom: 20px; display: block; opacity: 0.3;"></i>
@@ -242,7 +329,22 @@ async function loadReviews() {
             </div>
         `).join('');
         
-        reviewsList.innerHTML = html;
+        const loadMore = document.getElementById('loadMoreReviews');
+        if (loadMore) loadMore.remove();
+        
+        if (cursor) {
+            reviewsList.insertAdjacentHTML('beforeend', html);
+        } else {
+            reviewsList.innerHTML = html;
+        }
+        
+        if (data.nextCursor) {
+            reviewsList.insertAdjacentHTML('beforeend', `
+                <button id="loadMoreReviews" class="btn btn-outline" onclick="loadReviews('${data.nextCursor}')">
+                    <i class="fas fa-chevron-down"></i> Carica altre (${data.total - reviewsList.querySelectorAll('.review-card').length} rimanenti)
+                </button>
+            `);
+        }
     } catch (error) {
         console.error('Error loading reviews:', error);
         reviewsList.innerHTML = '<div class="text-center text-muted">Errore caricamento recensioni</div>';
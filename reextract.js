@@ -0,0 +1,173 @@
+#!/usr/bin/env node
+
+const os = require('os');
+const path = require('path');
+const { Worker, isMainThread, parentPort, workerData } = require('worker_threads');
+const { HtmlArchive } = require('./html_archive');
+const { parseReviewHTML, saveReviewWithLog, MIN_REVIEW_LENGTH } = require('./mymovies_extractor');
+const { getExtractionCache } = require('./extraction_cache');
+
+/**
+ * Ri-estrazione offline dall'archivio HTML (html_archive.js)
+ *
+ * Riapplica extractMetadata/cleanReviewContent alle pagine archiviate senza contattare
+ * mymovies.it: il parsing gira in worker thread (uno per core), il salvataggio delle
+ * recensioni resta nel thread principale insieme all'aggiornamento dell'indice.
+ */
+
+/**
+ * Lato worker: legge la pagina archiviata e ricostruisce il risultato come extractMovieReview
+ */
+function reextractRef(archive, ref) {
+    const startTime = Date.now();
+    const html = archive.read(ref);
+    const outcome = { url: ref.url, title: ref.title, year: ref.year, status: 'success', contentLength: 0 };
+
+    if (html === null) {
+        return { ...outcome, status: 'missing' };
+    }
+
+    const { metadata, content } = parseReviewHTML(html);
+    if (content.length < MIN_REVIEW_LENGTH) {
+        // Servirebbe il DOM renderizzato (DOM_FALLBACK): la recensione esistente resta invariata
+        return { ...outcome, status: 'needs_browser' };
+    }
+
+    return {
+        ...outcome,
+        contentLength: content.length,
+        result: {
+            success: true,
+            input: { title: ref.title, year: ref.year },
+            url: `${ref.url}#recensione`,
+            review: {
+                content,
+                author: metadata.author,
+                date: metadata.date,
+                title: metadata.title || ref.title
+            },
+            metadata: {
+                extractionMethod: 'HTML_RESPONSE',
+                tier: 'ARCHIVE',
+                contentLength: content.length,
+                wordCount: content.split(/\s+/).length,
+                processingTime: Date.now() - startTime
+            },
+            httpStatus: ref.status,
+            error: null
+        }
+    };
+}
+
+function runWorker() {
+    const archive = new HtmlArchive(workerData.archiveDir);
+    parentPort.on('message', ref => {
+        try {
+            parentPort.postMessage(reextractRef(archive, ref));
+        } catch (error) {
+            parentPort.postMessage({ url: ref.url, title: ref.title, year: ref.year, status: 'error', error: error.message });
+        }
+    });
+}
+
+/**
+ * Distribuisce le voci ai worker (una alla volta per worker) e chiama onResult nell'ordine di arrivo
+ */
+function reextractArchive(archive, options = {}) {
+    const refs = archive.list().filter(ref => ref.status === 200 && ref.title && ref.year);
+    const workerCount = Math.max(1, Math.min(options.workers || os.cpus().length, refs.length));
+    const onResult = options.onResult || (() => {});
+
+    if (refs.length === 0) return Promise.resolve({ pages: 0, workers: 0 });
+
+    return new Promise((resolve, reject) => {
+        let next = 0;
+        let done = 0;
+        const workers = [];
+
+        const dispatch = worker => {
+            if (next < refs.length) {
+                worker.postMessage(refs[next++]);
+            }
+        };
+
+        for (let i = 0; i < workerCount; i++) {
+            const worker = new Worker(__filename, { workerData: { archiveDir: archive.archiveDir } });
+            worker.on('message', outcome => {
+                onResult(outcome);
+                dispatch(worker);
+                if (++done === refs.length) {
+                    Promise.all(workers.map(w => w.terminate()))
+                        .then(() => resolve({ pages: refs.length, workers: workerCount }));
+                }
+            });
+            worker.on('error', error => {
+                workers.forEach(w => w.terminate());
+                reject(error);
+            });
+            workers.push(worker);
+            dispatch(worker);
+        }
+    });
+}
+
+async function main() {
+    const args = process.argv.slice(2);
+    const option = name => {
+        const index = args.indexOf(name);
+        return index !== -1 ? args[index + 1] : undefined;
+    };
+
+    if (args.includes('--help') || args.includes('-h')) {
+        console.log('Usage: node reextract.js [--workers N] [--dry-run] [--archive-dir DIR]');
+        console.log('Riapplica il parsing alle pagine in .cache/html_archive e riscrive reviews/');
+        console.log('Options:');
+        console.log('  --workers N        Worker thread (default: numero di core)');
+        console.log('  --dry-run          Solo report, nessun file riscritto');
+        console.log('  --archive-dir DIR  Archivio da usare (default: MYMOVIES_ARCHIVE_DIR o .cache/html_archive)');
+        process.exit(0);
+    }
+
+    const dryRun = args.includes('--dry-run');
+    const archive = new HtmlArchive(option('--archive-dir') ? path.resolve(option('--archive-dir')) : undefined);
+    const startTime = Date.now();
+    const counts = {};
+    const cache = getExtractionCache();
+
+    // Il salvataggio scrive su stdout: lo spostiamo su stderr per lasciare solo JSON lines
+    console.log = (...messages) => console.error(...messages);
+
+    const summary = await reextractArchive(archive, {
+        workers: parseInt(option('--workers')) || undefined,
+        onResult: outcome => {
+            const { result, ...line } = outcome;
+            if (result && !dryRun) {
+                const savedPath = saveReviewWithLog(result);
+                line.file = savedPath ? path.basename(savedPath) : null;
+                if (!savedPath) line.status = 'error';
+                // La voce in cache deve riflettere il testo appena ri-estratto
+                if (savedPath && cache) cache.set({ ...result, filePath: savedPath });
+            }
+            counts[line.status] = (counts[line.status] || 0) + 1;
+            process.stdout.write(JSON.stringify(line) + '\n');
+        }
+    });
+
+    console.error(JSON.stringify({
+        ...summary,
+        results: counts,
+        dryRun,
+        wallTimeMs: Date.now() - startTime
+    }));
+}
+
+if (!isMainThread) {
+    runWorker();
+} else if (require.main === module) {
+    main().catch(error => {
+        console.error('Errore fatale:', error.message);
+        process.exit(1);
+    });
+}
+
+module.exports = { reextractArchive };
@@ -0,0 +1,554 @@
+#!/usr/bin/env node
+
+const fs = require('fs');
+const path = require('path');
+const { getReviewStore, tryLock, releaseLock, withFileLock } = require('./review_store');
+
+/**
+ * Indice dei metadati delle recensioni salvate in reviews/
+ *
+ * Evita readdir + stat + lettura completa di ogni file ad ogni richiesta:
+ * l'indice e aggiornato da saveReviewWithLog e riallineato in modo incrementale
+ * solo quando cambia la directory (mtime). Formato condiviso con review_index.py.
+ *
+ * review_index.json      snapshot completo, riscritto solo in compattazione
+ * review_index.json.log  una riga JSON per modifica (set/del/dir) dopo lo snapshot
+ * review_index.json.lock lock tra processi (Node e Python) per append e compattazione
+ *
+ * Un upsert e un append di una riga, non la riscrittura dell'intero indice, e gli
+ * altri processi rileggono solo la coda del log.
+ *
+ * Le letture (list, query, stats) non prendono il lock: snapshot e log si rileggono in modo
+ * ottimistico, e se il lock e occupato le modifiche trovate da refresh() restano in memoria
+ * e vengono scritte al commit successivo. Nessuna attesa blocca l'event loop di server.js.
+ *
+ * Le recensioni salvate senza export .txt (MYMOVIES_TXT_EXPORT=0) esistono solo nell'archivio
+ * strutturato: list() le aggiunge dai metadati di review_store (voci con source: 'store').
+ */
+
+const INDEX_VERSION = 1;
+const DEFAULT_INDEX_PATH = path.join(__dirname, '.cache', 'review_index.json');
+const REVIEW_FILE_PATTERN = /^(.+)_(\d{4})_review\.txt$/;
+const HEADER_BYTES = 2048;
+// Oltre queste righe di log lo snapshot viene riscritto e il log svuotato
+const LOG_COMPACT_LINES = 1000;
+function statOrNull(filePath) {
+    try {
+        return fs.statSync(filePath);
+    } catch (error) {
+        return null;
+    }
+}
+
+/**
+ * Legge i metadati dall'intestazione del file (solo i primi KB, non tutta la recensione)
+ */
+function parseReviewHeader(filePath) {
+    const metadata = { filmTitle: null, author: 'Unknown', date: 'Unknown', length: 0 };
+
+    const fd = fs.openSync(filePath, 'r');
+    let header;
+    try {
+        const buffer = Buffer.alloc(HEADER_BYTES);
+        const bytesRead = fs.readSync(fd, buffer, 0, HEADER_BYTES, 0);
+        header = buffer.toString('utf8', 0, bytesRead);
+    } finally {
+        fs.closeSync(fd);
+    }
+
+    for (const line of header.split('\n')) {
+        if (line.startsWith('RECENSIONE:')) break;
+
+        if (line.startsWith('Autore:')) {
+            metadata.author = line.replace('Autore:', '').trim();
+        } else if (line.startsWith('Data:')) {
+            metadata.date = line.replace('Data:', '').trim();
+        } else if (line.startsWith('Lunghezza:')) {
+            const lengthMatch = line.match(/(\d+)/);
+            metadata.length = lengthMatch ? parseInt(lengthMatch[1]) : 0;
+        } else if (!metadata.filmTitle && /\(\d{4}\)\s*$/.test(line) && !line.startsWith('ESTRATTO IL:')) {
+            metadata.filmTitle = line.replace(/\s*\(\d{4}\)\s*$/, '').trim();
+        }
+    }
+
+    return metadata;
+}
+
+/**
+ * Costruisce la voce di indice per un file recensione
+ */
+function buildEntry(reviewsDir, filename, stats, metadata) {
+    const match = filename.match(REVIEW_FILE_PATTERN);
+    const title = match ? match[1].replace(/_/g, ' ') : filename;
+
+    return {
+        filename,
+        title,
+        filmTitle: metadata.filmTitle || title,
+        year: match ? match[2] : 'Unknown',
+        author: metadata.author,
+        date: metadata.date,
+        length: metadata.length,
+        size: stats.size,
+        mtimeMs: stats.mtimeMs,
+        path: path.join(reviewsDir, filename)
+    };
+}
+
+/**
+ * Voce di indice per una recensione presente solo nell'archivio strutturato (nessun .txt).
+ * size e la dimensione del record nello shard, mtimeMs l'istante di estrazione.
+ */
+function buildStoreEntry(meta) {
+    const filename = `${meta.key}_review.txt`;
+    const match = filename.match(REVIEW_FILE_PATTERN);
+    const title = match ? match[1].replace(/_/g, ' ') : meta.key;
+
+    return {
+        filename,
+        title,
+        filmTitle: meta.filmTitle || title,
+        year: match ? match[2] : String(meta.year ?? 'Unknown'),
+        author: meta.author || 'Unknown',
+        date: meta.date || 'Unknown',
+        length: meta.contentLength || 0,
+        size: meta.length,
+        mtimeMs: Date.parse(meta.extractedAt) || 0,
+        path: null,
+        source: 'store'
+    };
+}
+
+class ReviewIndex {
+    constructor(reviewsDir, indexPath = DEFAULT_INDEX_PATH, store = null) {
+        this.reviewsDir = reviewsDir;
+        this.indexPath = indexPath;
+        this.store = store;
+        this.logPath = `${indexPath}.log`;
+        this.lockPath = `${indexPath}.lock`;
+        this.entries = new Map();
+        this.dirMtimeMs = 0;
+        this.indexMtimeMs = 0;
+        this.logOffset = 0;
+        this.logLines = 0;
+        this.loaded = false;
+        // Modifiche applicate solo in memoria perche il lock era occupato (commit con wait: false)
+        this.unsaved = [];
+    }
+
+    applyOp(op) {
+        if (op.op === 'set') {
+            this.entries.set(op.entry.filename, op.entry);
+        } else if (op.op === 'del') {
+            this.entries.delete(op.filename);
+        } else if (op.op === 'dir') {
+            this.dirMtimeMs = op.dirMtimeMs;
+        }
+    }
+
+    /**
+     * Applica le righe del log scritte dopo l'ultima lettura (solo righe complete)
+     */
+    readLog() {
+        let fd;
+        try {
+            fd = fs.openSync(this.logPath, 'r');
+        } catch (error) {
+            return;
+        }
+        try {
+            const size = fs.fstatSync(fd).size;
+            if (size <= this.logOffset) return;
+            const buffer = Buffer.alloc(size - this.logOffset);
+            fs.readSync(fd, buffer, 0, buffer.length, this.logOffset);
+            const end = buffer.lastIndexOf(0x0a) + 1;
+            for (const line of buffer.toString('utf8', 0, end).split('\n')) {
+                if (!line) continue;
+                try {
+                    this.applyOp(JSON.parse(line));
+                    this.logLines++;
+                } catch (error) {
+                    // Riga troncata da una scrittura interrotta
+                }
+            }
+            this.logOffset += end;
+        } finally {
+            fs.closeSync(fd);
+        }
+    }
+
+    /**
+     * Snapshot + log completo. Sotto lock e sempre coerente; senza lock una compattazione
+     * concorrente (nuovo snapshot, log svuotato) puo intervenire tra le due letture
+     */
+    load() {
+        this.entries = new Map();
+        this.dirMtimeMs = 0;
+        this.indexMtimeMs = 0;
+        try {
+            this.indexMtimeMs = fs.statSync(this.indexPath).mtimeMs;
+            const data = JSON.parse(fs.readFileSync(this.indexPath, 'utf8'));
+            if (data.version === INDEX_VERSION && data.reviewsDir === this.reviewsDir) {
+                this.entries = new Map(Object.entries(data.reviews || {}));
+                this.dirMtimeMs = data.dirMtimeMs || 0;
+            }
+        } catch (error) {
+            // Indice assente o corrotto: verra ricostruito
+        }
+        this.logOffset = 0;
+        this.logLines = 0;
+        // Le modifiche non salvate si perdono: il mtime della directory torna quello salvato e il
+        // prossimo refresh() rifa la scansione
+        this.unsaved = [];
+        this.readLog();
+        this.loaded = true;
+    }
+
+    needsFullLoad() {
+        if (!this.loaded) return true;
+        const index = statOrNull(this.indexPath);
+        if ((index ? index.mtimeMs : 0) !== this.indexMtimeMs) return true;
+        // Log svuotato da una compattazione di un altro processo
+        const log = statOrNull(this.logPath);
+        return (log ? log.size : 0) < this.logOffset;
+    }
+
+    /**
+     * Ricarica l'indice se un altro processo (worker, Python) lo ha modificato:
+     * dopo una compattazione tutto, altrimenti solo le nuove righe del log.
+     * Senza lock: la lettura completa si ripete se lo snapshot cambia nel frattempo.
+     */
+    reloadIfChanged() {
+        if (!this.needsFullLoad()) {
+            this.readLog();
+            return;
+        }
+        for (let attempt = 0; attempt < 5; attempt++) {
+            this.load();
+            const index = statOrNull(this.indexPath);
+            if ((index ? index.mtimeMs : 0) === this.indexMtimeMs) return;
+        }
+        // Compattazioni continue da altri processi: si attende il lock
+        withFileLock(this.lockPath, () => this.load());
+    }
+
+    /**
+     * Allinea lo stato in memoria ai file (da chiamare tenendo il lock)
+     */
+    catchUp() {
+        if (this.needsFullLoad()) this.load(); else this.readLog();
+    }
+
+    /**
+     * Aggiunge modifiche al log sotto lock: gli upsert concorrenti di piu processi
+     * si sommano invece di sovrascriversi.
+     * wait: false (percorsi di lettura) non attende il lock: se e occupato le modifiche
+     * valgono solo in memoria (scritte al commit successivo) e restituisce false
+     */
+    commit(ops, { wait = true } = {}) {
+        if (ops.length === 0 && this.unsaved.length === 0) return true;
+        const append = () => {
+            this.catchUp();
+
+            const pending = [...this.unsaved, ...ops];
+            this.unsaved = [];
+            let text = pending.map(op => JSON.stringify(op) + '\n').join('');
+            const log = statOrNull(this.logPath);
+            // Riga finale troncata: la si chiude per non unirla alla prima nuova
+            if (log && log.size > this.logOffset) text = '\n' + text;
+            fs.mkdirSync(path.dirname(this.logPath), { recursive: true });
+            fs.appendFileSync(this.logPath, text, 'utf8');
+            this.readLog();
+
+            if (this.logLines > LOG_COMPACT_LINES) this.compact();
+        };
+        if (wait) {
+            withFileLock(this.lockPath, append);
+            return true;
+        }
+
+        const fd = tryLock(this.lockPath);
+        if (fd === null) {
+            ops.forEach(op => this.applyOp(op));
+            this.unsaved.push(...ops);
+            return false;
+        }
+        try {
+            append();
+        } finally {
+            releaseLock(this.lockPath, fd);
+        }
+        return true;
+    }
+
+    /**
+     * Riscrive lo snapshot e svuota il log (tenendo il lock)
+     */
+    compact() {
+        fs.mkdirSync(path.dirname(this.indexPath), { recursive: true });
+        const data = {
+            version: INDEX_VERSION,
+            reviewsDir: this.reviewsDir,
+            dirMtimeMs: this.dirMtimeMs,
+            reviews: Object.fromEntries(this.entries)
+        };
+        // Scrittura atomica: un lettore senza lock vede il vecchio o il nuovo snapshot
+        const tmpPath = `${this.indexPath}.${process.pid}.tmp`;
+        fs.writeFileSync(tmpPath, JSON.stringify(data), 'utf8');
+        fs.renameSync(tmpPath, this.indexPath);
+        fs.writeFileSync(this.logPath, '');
+        this.indexMtimeMs = fs.statSync(this.indexPath).mtimeMs;
+        this.logOffset = 0;
+        this.logLines = 0;
+    }
+
+    /**
+     * Riallinea l'indice alla directory: legge solo i file nuovi o modificati.
+     * wait: false (letture) non attende il lock per scrivere le modifiche trovate
+     */
+    refresh({ force = false, wait = true } = {}) {
+        this.reloadIfChanged();
+
+        if (!fs.existsSync(this.reviewsDir)) {
+            if (this.entries.size > 0) {
+                const ops = [...this.entries.keys()].map(filename => ({ op: 'del', filename }));
+                this.commit([...ops, { op: 'dir', dirMtimeMs: 0 }], { wait });
+            }
+            return this;
+        }
+
+        const dirMtimeMs = fs.statSync(this.reviewsDir).mtimeMs;
+        // Tolleranza di 1ms: l'indice puo essere stato scritto da review_index.py
+        if (!force && Math.abs(dirMtimeMs - this.dirMtimeMs) < 1) {
+            if (this.unsaved.length > 0) this.commit([], { wait });
+            return this;
+        }
+
+        // Si rimuovono solo voci note prima della scansione: quelle aggiunte nel frattempo
+        // da un altro processo non sono "sparite" anche se readdir non le ha viste
+        const known = new Set(this.entries.keys());
+        const seen = new Set();
+        const ops = [];
+        for (const filename of fs.readdirSync(this.reviewsDir)) {
+            if (!filename.endsWith('_review.txt')) continue;
+            seen.add(filename);
+
+            const filePath = path.join(this.reviewsDir, filename);
+            const stats = fs.statSync(filePath);
+            const existing = this.entries.get(filename);
+
+            if (!force && existing && Math.abs(existing.mtimeMs - stats.mtimeMs) < 1 && existing.size === stats.size) {
+                continue;
+            }
+            ops.push({ op: 'set', entry: buildEntry(this.reviewsDir, filename, stats, parseReviewHeader(filePath)) });
+        }
+
+        for (const filename of known) {
+            if (!seen.has(filename)) ops.push({ op: 'del', filename });
+        }
+
+        ops.push({ op: 'dir', dirMtimeMs });
+        this.commit(ops, { wait });
+        return this;
+    }
+
+    rebuild() {
+        this.refresh({ force: true });
+        withFileLock(this.lockPath, () => {
+            this.catchUp();
+            this.compact();
+        });
+        return this;
+    }
+
+    /**
+     * Aggiorna una singola voce dopo il salvataggio di una recensione.
+     * syncDir: l'indice era allineato prima della scrittura (refresh() appena eseguito),
+     * quindi il nuovo mtime della directory e dovuto solo a questo file.
+     * wait: false come in refresh() (salvataggi dal processo di server.js)
+     */
+    upsert(filePath, metadata = {}, { syncDir = false, wait = true } = {}) {
+        this.reloadIfChanged();
+
+        const filename = path.basename(filePath);
+        const stats = fs.statSync(filePath);
+        const header = metadata.author !== undefined ? {
+            filmTitle: metadata.filmTitle || null,
+            author: metadata.author || 'Unknown',
+            date: metadata.date || 'Unknown',
+            length: metadata.length || 0
+        } : parseReviewHeader(filePath);
+
+        const ops = [{ op: 'set', entry: buildEntry(this.reviewsDir, filename, stats, header) }];
+        if (syncDir) {
+            ops.push({ op: 'dir', dirMtimeMs: fs.statSync(this.reviewsDir).mtimeMs });
+        }
+        this.commit(ops, { wait });
+        return this.entries.get(filename);
+    }
+
+    /**
+     * Recensioni dei .txt piu quelle solo nell'archivio strutturato (export .txt disattivato)
+     */
+    list() {
+        const entries = Array.from(this.refresh({ wait: false }).entries.values());
+        if (!this.store) return entries;
+
+        for (const meta of this.store.latestMetadata().values()) {
+            // meta.file e null solo se il .txt non e mai stato scritto
+            if (meta.file || this.entries.has(`${meta.key}_review.txt`)) continue;
+            entries.push(buildStoreEntry(meta));
+        }
+        return entries;
+    }
+
+    /**
+     * Pagina di risultati: { items, total, nextCursor }
+     * options: year, author, titlePrefix, sort (mtime|date|length), order (asc|desc), limit, cursor
+     */
+    query(options = {}) {
+        return queryEntries(this.list(), options);
+    }
+
+    stats() {
+        const entries = this.list();
+        const totalSize = entries.reduce((sum, e) => sum + e.size, 0);
+        return {
+            totalReviews: entries.length,
+            successfulReviews: entries.filter(e => e.size > 100).length,
+            totalSize,
+            averageLength: entries.length > 0 ? Math.round(totalSize / entries.length) : 0,
+            recent: entries.sort((a, b) => b.mtimeMs - a.mtimeMs).slice(0, 5)
+        };
+    }
+}
+
+const ITALIAN_MONTHS = {
+    gennaio: 1, febbraio: 2, marzo: 3, aprile: 4, maggio: 5, giugno: 6,
+    luglio: 7, agosto: 8, settembre: 9, ottobre: 10, novembre: 11, dicembre: 12
+};
+
+/**
+ * Converte la data della recensione ("domenica 23 luglio 2023", "23/07/2023", "luglio 2023")
+ * in timestamp per l'ordinamento; 0 se non riconosciuta
+ */
+function parseReviewDate(date) {
+    if (!date) return 0;
+    const text = date.toLowerCase();
+
+    let match = text.match(/(\d{1,2})\s+([a-z]+)\s+(\d{4})/);
+    if (match && ITALIAN_MONTHS[match[2]]) {
+        return Date.UTC(parseInt(match[3]), ITALIAN_MONTHS[match[2]] - 1, parseInt(match[1]));
+    }
+    match = text.match(/(\d{1,2})[\/-](\d{1,2})[\/-](\d{4})/);
+    if (match) {
+        return Date.UTC(parseInt(match[3]), parseInt(match[2]) - 1, parseInt(match[1]));
+    }
+    match = text.match(/([a-z]+)\s+(\d{4})/);
+    if (match && ITALIAN_MONTHS[match[1]]) {
+        return Date.UTC(parseInt(match[2]), ITALIAN_MONTHS[match[1]] - 1, 1);
+    }
+    return 0;
+}
+
+const SORT_KEYS = {
+    mtime: entry => entry.mtimeMs,
+    length: entry => entry.length,
+    date: entry => parseReviewDate(entry.date)
+};
+
+function encodeCursor(value, filename) {
+    return Buffer.from(JSON.stringify([value, filename])).toString('base64url');
+}
+
+function decodeCursor(cursor) {
+    try {
+        const [value, filename] = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+        return { value, filename };
+    } catch (error) {
+        return null;
+    }
+}
+
+/**
+ * Filtra, ordina e pagina le voci dell'indice.
+ * Il cursore codifica (valore di ordinamento, filename) dell'ultima voce restituita,
+ * quindi resta stabile anche se nel frattempo vengono aggiunte recensioni.
+ */
+function queryEntries(entries, options = {}) {
+    const sort = SORT_KEYS[options.sort] ? options.sort : 'mtime';
+    const direction = options.order === 'asc' ? 1 : -1;
+    const keyOf = SORT_KEYS[sort];
+    const author = options.author ? options.author.toLowerCase() : null;
+    const titlePrefix = options.titlePrefix ? options.titlePrefix.toLowerCase() : null;
+
+    const filtered = entries.filter(entry => {
+        if (options.year && String(entry.year) !== String(options.year)) return false;
+        if (author && !(entry.author || '').toLowerCase().includes(author)) return false;
+        if (titlePrefix &&
+            !entry.title.toLowerCase().startsWith(titlePrefix) &&
+            !(entry.filmTitle || '').toLowerCase().startsWith(titlePrefix)) return false;
+        return true;
+    });
+
+    const compare = (aValue, aName, bValue, bName) => {
+        if (aValue !== bValue) return (aValue < bValue ? -1 : 1) * direction;
+        return aName < bName ? -1 : aName > bName ? 1 : 0;
+    };
+
+    const keyed = filtered
+        .map(entry => ({ entry, value: keyOf(entry) }))
+        .sort((a, b) => compare(a.value, a.entry.filename, b.value, b.entry.filename));
+
+    let start = 0;
+    const cursor = options.cursor ? decodeCursor(options.cursor) : null;
+    if (cursor) {
+        start = keyed.findIndex(item => compare(item.value, item.entry.filename, cursor.value, cursor.filename) > 0);
+        if (start === -1) start = keyed.length;
+    }
+
+    const limit = options.limit ? Math.max(1, options.limit) : keyed.length;
+    const page = keyed.slice(start, start + limit);
+    const last = page[page.length - 1];
+
+    return {
+        items: page.map(item => item.entry),
+        total: filtered.length,
+        nextCursor: last && start + limit < keyed.length ? encodeCursor(last.value, last.entry.filename) : null
+    };
+}
+
+const indexes = new Map();
+
+/**
+ * Indice condiviso per directory (una istanza per processo)
+ */
+function getReviewIndex(reviewsDir = path.join(__dirname, 'reviews')) {
+    if (!indexes.has(reviewsDir)) {
+        const store = getReviewStore(path.join(reviewsDir, 'store'));
+        indexes.set(reviewsDir, new ReviewIndex(reviewsDir, DEFAULT_INDEX_PATH, store));
+    }
+    return indexes.get(reviewsDir);
+}
+
+module.exports = {
+    ReviewIndex,
+    getReviewIndex,
+    parseReviewHeader,
+    parseReviewDate
+};
+
+// CLI: node review_index.js [rebuild|list|stats]
+if (require.main === module) {
+    const command = process.argv[2] || 'stats';
+    const index = getReviewIndex();
+
+    if (command === 'rebuild') {
+        index.rebuild();
+        console.log(JSON.stringify({ indexed: index.entries.size, indexPath: index.indexPath }));
+    } else if (command === 'list') {
+        console.log(JSON.stringify(index.list(), null, 2));
+    } else {
+        console.log(JSON.stringify(index.stats(), null, 2));
+    }
+}
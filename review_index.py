@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Indice dei metadati delle recensioni (lato Python)
+Stessi file e stesso formato di review_index.js: snapshot .cache/review_index.json,
+log delle modifiche review_index.json.log e lock review_index.json.lock.
+list() include le recensioni salvate solo in reviews/store (MYMOVIES_TXT_EXPORT=0).
+"""
+
+import errno
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from review_store import ReviewStore
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_REVIEWS_DIR = os.path.join(SCRIPT_DIR, 'reviews')
+DEFAULT_INDEX_PATH = os.path.join(SCRIPT_DIR, '.cache', 'review_index.json')
+INDEX_VERSION = 1
+HEADER_BYTES = 2048
+REVIEW_FILE_PATTERN = re.compile(r'^(.+)_(\d{4})_review\.txt$')
+TITLE_LINE_PATTERN = re.compile(r'\s*\(\d{4}\)\s*$')
+# Stessi valori di review_index.js
+LOG_COMPACT_LINES = 1000
+LOCK_TIMEOUT_S = 15
+LOCK_STALE_S = 10
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Lock tra processi con creazione esclusiva del file (compatibile con review_index.js)"""
+    deadline = time.time() + LOCK_TIMEOUT_S
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+            continue
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        try:
+            if time.time() - os.stat(lock_path).st_mtime > LOCK_STALE_S:
+                # Lock lasciato da un processo terminato durante la scrittura
+                os.unlink(lock_path)
+                continue
+        except OSError:
+            # Lock rilasciato nel frattempo
+            continue
+        if time.time() > deadline:
+            raise TimeoutError(f"Indice recensioni bloccato da {lock_path}")
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.unlink(lock_path)
+        except OSError:
+            pass
+
+
+def _mtime_ms(path):
+    try:
+        return os.stat(path).st_mtime_ns / 1e6
+    except OSError:
+        return 0
+
+
+def _size(path):
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def parse_review_header(file_path):
+    """Legge i metadati dall'intestazione del file (solo i primi KB)"""
+    metadata = {'filmTitle': None, 'author': 'Unknown', 'date': 'Unknown', 'length': 0}
+
+    with open(file_path, 'rb') as f:
+        header = f.read(HEADER_BYTES).decode('utf-8', errors='ignore')
+
+    for line in header.split('\n'):
+        if line.startswith('RECENSIONE:'):
+            break
+        if line.startswith('Autore:'):
+            metadata['author'] = line.replace('Autore:', '', 1).strip()
+        elif line.startswith('Data:'):
+            metadata['date'] = line.replace('Data:', '', 1).strip()
+        elif line.startswith('Lunghezza:'):
+            match = re.search(r'(\d+)', line)
+            metadata['length'] = int(match.group(1)) if match else 0
+        elif not metadata['filmTitle'] and TITLE_LINE_PATTERN.search(line) and not line.startswith('ESTRATTO IL:'):
+            metadata['filmTitle'] = TITLE_LINE_PATTERN.sub('', line).strip()
+
+    return metadata
+
+
+def build_entry(reviews_dir, filename, stat, metadata):
+    match = REVIEW_FILE_PATTERN.match(filename)
+    title = match.group(1).replace('_', ' ') if match else filename
+    return {
+        'filename': filename,
+        'title': title,
+        'filmTitle': metadata.get('filmTitle') or title,
+        'year': match.group(2) if match else 'Unknown',
+        'author': metadata['author'],
+        'date': metadata['date'],
+        'length': metadata['length'],
+        'size': stat.st_size,
+        'mtimeMs': stat.st_mtime_ns / 1e6,
+        'path': os.path.join(reviews_dir, filename)
+    }
+
+
+def timestamp_ms(iso):
+    """Data ISO (extractedAt) in millisecondi, 0 se assente o non valida"""
+    try:
+        return datetime.fromisoformat(iso.replace('Z', '+00:00')).timestamp() * 1000
+    except (AttributeError, ValueError):
+        return 0
+
+
+def build_store_entry(meta):
+    """Voce per una recensione solo nell'archivio strutturato (come buildStoreEntry di review_index.js)"""
+    filename = f"{meta['key']}_review.txt"
+    match = REVIEW_FILE_PATTERN.match(filename)
+    title = match.group(1).replace('_', ' ') if match else meta['key']
+    return {
+        'filename': filename,
+        'title': title,
+        'filmTitle': meta.get('filmTitle') or title,
+        'year': match.group(2) if match else str(meta.get('year', 'Unknown')),
+        'author': meta.get('author') or 'Unknown',
+        'date': meta.get('date') or 'Unknown',
+        'length': meta.get('contentLength') or 0,
+        'size': meta['length'],
+        'mtimeMs': timestamp_ms(meta.get('extractedAt')),
+        'path': None,
+        'source': 'store'
+    }
+
+
+class ReviewIndex:
+    def __init__(self, reviews_dir=None, index_path=None, store=None):
+        self.reviews_dir = os.path.abspath(reviews_dir or DEFAULT_REVIEWS_DIR)
+        self.index_path = index_path or DEFAULT_INDEX_PATH
+        self.store = store if store is not None else ReviewStore(os.path.join(self.reviews_dir, 'store'))
+        self.log_path = f"{self.index_path}.log"
+        self.lock_path = f"{self.index_path}.lock"
+        self.entries = {}
+        self.dir_mtime_ms = 0
+        self._index_mtime_ms = 0
+        self._log_offset = 0
+        self._log_lines = 0
+        self._loaded = False
+
+    def _apply(self, op):
+        if op.get('op') == 'set':
+            self.entries[op['entry']['filename']] = op['entry']
+        elif op.get('op') == 'del':
+            self.entries.pop(op['filename'], None)
+        elif op.get('op') == 'dir':
+            self.dir_mtime_ms = op['dirMtimeMs']
+
+    def _read_log(self):
+        """Applica le righe del log scritte dopo l'ultima lettura (solo righe complete)"""
+        try:
+            f = open(self.log_path, 'rb')
+        except OSError:
+            return
+        with f:
+            f.seek(self._log_offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].split(b'\n'):
+            if not line:
+                continue
+            try:
+                self._apply(json.loads(line))
+                self._log_lines += 1
+            except (ValueError, KeyError):
+                # Riga troncata da una scrittura interrotta
+                continue
+        self._log_offset += end
+
+    def _load(self):
+        """Snapshot + log completo (tenendo il lock: la compattazione sostituisce entrambi)"""
+        self.entries = {}
+        self.dir_mtime_ms = 0
+        self._index_mtime_ms = _mtime_ms(self.index_path)
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION and data.get('reviewsDir') == self.reviews_dir:
+                self.entries = data.get('reviews', {})
+                self.dir_mtime_ms = data.get('dirMtimeMs', 0)
+        except (OSError, ValueError):
+            # Indice assente o corrotto: verra ricostruito
+            pass
+        self._log_offset = 0
+        self._log_lines = 0
+        self._read_log()
+        self._loaded = True
+
+    def _needs_full_load(self):
+        # Snapshot riscritto o log svuotato da una compattazione di un altro processo
+        return (not self._loaded or _mtime_ms(self.index_path) != self._index_mtime_ms
+                or _size(self.log_path) < self._log_offset)
+
+    def _catch_up(self):
+        if self._needs_full_load():
+            self._load()
+        else:
+            self._read_log()
+
+    def reload_if_changed(self):
+        """Rilegge tutto dopo una compattazione, altrimenti solo le nuove righe del log"""
+        if self._needs_full_load():
+            with file_lock(self.lock_path):
+                self._load()
+        else:
+            self._read_log()
+
+    def _commit(self, ops):
+        """Aggiunge modifiche al log sotto lock; oltre LOG_COMPACT_LINES righe compatta"""
+        if not ops:
+            return
+        with file_lock(self.lock_path):
+            self._catch_up()
+            text = ''.join(json.dumps(op, ensure_ascii=False) + '\n' for op in ops)
+            if _size(self.log_path) > self._log_offset:
+                # Riga finale troncata: la si chiude per non unirla alla prima nuova
+                text = '\n' + text
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(text)
+            self._read_log()
+            if self._log_lines > LOG_COMPACT_LINES:
+                self._compact()
+
+    def _compact(self):
+        """Riscrive lo snapshot e svuota il log (tenendo il lock)"""
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        data = {
+            'version': INDEX_VERSION,
+            'reviewsDir': self.reviews_dir,
+            'dirMtimeMs': self.dir_mtime_ms,
+            'reviews': self.entries
+        }
+        # Scrittura atomica, come review_index.js
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        open(self.log_path, 'w').close()
+        self._index_mtime_ms = _mtime_ms(self.index_path)
+        self._log_offset = 0
+        self._log_lines = 0
+
+    def refresh(self, force=False):
+        """Riallinea l'indice alla directory leggendo solo i file nuovi o modificati"""
+        self.reload_if_changed()
+
+        if not os.path.isdir(self.reviews_dir):
+            if self.entries:
+                self._commit([{'op': 'del', 'filename': name} for name in self.entries]
+                             + [{'op': 'dir', 'dirMtimeMs': 0}])
+            return self
+
+        dir_mtime_ms = os.stat(self.reviews_dir).st_mtime_ns / 1e6
+        if not force and abs(dir_mtime_ms - self.dir_mtime_ms) < 1:
+            return self
+
+        # Si rimuovono solo le voci note prima della scansione (vedi review_index.js)
+        known = set(self.entries)
+        seen = set()
+        ops = []
+        with os.scandir(self.reviews_dir) as it:
+            for item in it:
+                if not item.name.endswith('_review.txt'):
+                    continue
+                seen.add(item.name)
+                stat = item.stat()
+                existing = self.entries.get(item.name)
+                if (not force and existing and existing['size'] == stat.st_size
+                        and abs(existing['mtimeMs'] - stat.st_mtime_ns / 1e6) < 1):
+                    continue
+                ops.append({'op': 'set', 'entry': build_entry(
+                    self.reviews_dir, item.name, stat, parse_review_header(item.path)
+                )})
+
+        ops.extend({'op': 'del', 'filename': name} for name in known - seen)
+        ops.append({'op': 'dir', 'dirMtimeMs': dir_mtime_ms})
+        self._commit(ops)
+        return self
+
+    def rebuild(self):
+        self.refresh(force=True)
+        with file_lock(self.lock_path):
+            self._catch_up()
+            self._compact()
+        return self
+
+    def list(self):
+        """Recensioni dei .txt piu quelle solo nell'archivio strutturato (export .txt disattivato)"""
+        entries = list(self.refresh().entries.values())
+        for meta in self.store.latest_metadata().values():
+            # file e None solo se il .txt non e mai stato scritto
+            if meta.get('file') or f"{meta['key']}_review.txt" in self.entries:
+                continue
+            entries.append(build_store_entry(meta))
+        return entries
+
+    def stats(self, recent=5):
+        """Statistiche nel formato di 'ai_wrapper.sh stats --json'"""
+        entries = self.list()
+        successful = [e for e in entries if e['size'] > 100]
+        recent_files = sorted(successful, key=lambda e: e['mtimeMs'], reverse=True)[:recent]
+
+        return {
+            'total_files': len(entries),
+            'successful_extractions': len(successful),
+            'failed_extractions': len(entries) - len(successful),
+            'total_size_bytes': sum(e['size'] for e in entries),
+            'recent_files': [
+                {
+                    'filename': e['filename'],
+                    'size_bytes': e['size'],
+                    'modified': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(e['mtimeMs'] / 1000))
+                }
+                for e in recent_files
+            ],
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        }
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    index = ReviewIndex()
+
+    if command == 'rebuild':
+        index.rebuild()
+        print(json.dumps({'indexed': len(index.entries), 'index_path': index.index_path}))
+    elif command == 'list':
+        print(json.dumps(index.list(), indent=2, ensure_ascii=False))
+    else:
+        print(json.dumps(index.stats(), indent=2, ensure_ascii=False))
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Ricerca full-text nelle recensioni estratte
+Indice SQLite FTS5 (.cache/review_search.sqlite3) aggiornato in modo incrementale prima di
+ogni ricerca: testi e metadati dall'archivio strutturato (reviews/store, anche senza export
+.txt), piu i .txt dell'indice dei metadati (review_index) non presenti nell'archivio
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from review_index import ReviewIndex, timestamp_ms
+from text_cleaner import fold_accents
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SEARCH_DB = os.path.join(SCRIPT_DIR, '.cache', 'review_search.sqlite3')
+CONTENT_PATTERN = re.compile(r'RECENSIONE:\n=+\n(.*?)\n=+\n', re.S)
+TOKEN_PATTERN = re.compile(r'\w+', re.U)
+
+# Pesi bm25 per colonna: titolo, autore, testo
+BM25_WEIGHTS = (0.0, 5.0, 3.0, 1.0)
+
+
+def extract_review_body(text):
+    """Testo della recensione senza intestazione e log di estrazione"""
+    match = CONTENT_PATTERN.search(text)
+    return match.group(1).strip() if match else text
+
+
+def _read_review_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return extract_review_body(f.read())
+
+
+def build_fts_query(query):
+    """
+    Converte una query libera in query FTS5: parole in AND, l'ultima come prefisso.
+    Gli accenti sono rimossi con le stesse regole di normalize_title_py
+    (il tokenizer unicode61 remove_diacritics fa lo stesso lato indice).
+    """
+    tokens = TOKEN_PATTERN.findall(fold_accents(query))
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens[:-1]]
+    terms.append(f'"{tokens[-1]}"*')
+    return ' '.join(terms)
+
+
+class ReviewSearchIndex:
+    def __init__(self, reviews_dir=None, db_path=None, index_path=None):
+        self.review_index = ReviewIndex(reviews_dir, index_path)
+        self.index_path = self.review_index.index_path
+        self.store = self.review_index.store
+        self.db_path = db_path or DEFAULT_SEARCH_DB
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                filename TEXT UNIQUE NOT NULL,
+                year TEXT,
+                mtime_ms REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5(
+                filename UNINDEXED, title, author, content,
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def _meta(self, key):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _source_stamp(self):
+        """
+        Firma economica dello stato sorgente: mtime di reviews/, dello snapshot e del log
+        dell'indice, dimensioni dei file metadati dell'archivio (ogni recensione salvata la cambia)
+        """
+        parts = []
+        for path in (self.review_index.reviews_dir, self.index_path, self.review_index.log_path):
+            try:
+                parts.append(str(os.stat(path).st_mtime_ns))
+            except OSError:
+                parts.append('0')
+        parts.append(self.store.signature())
+        return ':'.join(parts)
+
+    def _sources(self):
+        """
+        {filename: (voce, mtime_ms, size, lettore del testo)} per ogni recensione.
+        Se l'archivio ha l'ultima estrazione del film il testo viene dal record (nessun parsing
+        del .txt) e mtime/size sono quelli del record; altrimenti dal .txt.
+        """
+        metadata = self.store.latest_metadata()
+        sources = {}
+        for entry in self.review_index.list():
+            filename = entry['filename']
+            key = filename[:-len('_review.txt')]
+            meta = metadata.get(key)
+            if meta and meta.get('file') in (None, filename):
+                sources[filename] = (entry, timestamp_ms(meta.get('extractedAt')), meta['length'],
+                                     lambda key=key: self.store.get(key, metadata)['content'])
+            elif entry.get('path'):
+                sources[filename] = (entry, entry['mtimeMs'], entry['size'],
+                                     lambda path=entry['path']: _read_review_file(path))
+        return sources
+
+    def sync(self, force=False):
+        """Indicizza solo le recensioni nuove o modificate; rimuove quelle cancellate"""
+        with self._lock:
+            stamp = self._source_stamp()
+            if not force and stamp == self._meta('source_stamp'):
+                return {'added': 0, 'updated': 0, 'removed': 0}
+
+            sources = self._sources()
+            indexed = {row[0]: (row[1], row[2], row[3]) for row in
+                       self._conn.execute('SELECT filename, id, mtime_ms, size FROM docs')}
+            counts = {'added': 0, 'updated': 0, 'removed': 0}
+
+            with self._conn:
+                for filename, (doc_id, _, _) in indexed.items():
+                    if filename not in sources:
+                        self._conn.execute('DELETE FROM reviews_fts WHERE rowid = ?', (doc_id,))
+                        self._conn.execute('DELETE FROM docs WHERE id = ?', (doc_id,))
+                        counts['removed'] += 1
+
+                for filename, (entry, mtime_ms, size, read_content) in sources.items():
+                    current = indexed.get(filename)
+                    if (not force and current and current[2] == size
+                            and abs(current[1] - mtime_ms) < 1):
+                        continue
+
+                    try:
+                        content = read_content()
+                    except (OSError, ValueError, TypeError, KeyError):
+                        continue
+
+                    if current:
+                        doc_id = current[0]
+                        self._conn.execute('DELETE FROM reviews_fts WHERE rowid = ?', (doc_id,))
+                        self._conn.execute('UPDATE docs SET year = ?, mtime_ms = ?, size = ? WHERE id = ?',
+                                           (entry['year'], mtime_ms, size, doc_id))
+                        counts['updated'] += 1
+                    else:
+                        doc_id = self._conn.execute(
+                            'INSERT INTO docs (filename, year, mtime_ms, size) VALUES (?, ?, ?, ?)',
+                            (filename, entry['year'], mtime_ms, size)
+                        ).lastrowid
+                        counts['added'] += 1
+
+                    self._conn.execute(
+                        'INSERT INTO reviews_fts (rowid, filename, title, author, content) VALUES (?, ?, ?, ?, ?)',
+                        (doc_id, filename, entry.get('filmTitle') or entry['title'], entry['author'], content)
+                    )
+
+                self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                                   ('source_stamp', self._source_stamp()))
+
+            return counts
+
+    def rebuild(self):
+        with self._lock:
+            with self._conn:
+                self._conn.execute('DELETE FROM reviews_fts')
+                self._conn.execute('DELETE FROM docs')
+                self._conn.execute('DELETE FROM meta')
+        return self.sync(force=True)
+
+    def search(self, query, limit=20, year=None):
+        """Risultati ordinati per rilevanza (bm25) con snippet evidenziati"""
+        fts_query = build_fts_query(query)
+        if not fts_query:
+            return []
+
+        self.sync()
+
+        sql = """
+            SELECT reviews_fts.filename, reviews_fts.title, reviews_fts.author, docs.year,
+                   bm25(reviews_fts, ?, ?, ?, ?) AS score,
+                   snippet(reviews_fts, 3, '[', ']', '…', 16) AS snippet
+            FROM reviews_fts JOIN docs ON docs.id = reviews_fts.rowid
+            WHERE reviews_fts MATCH ?
+        """
+        params = [*BM25_WEIGHTS, fts_query]
+        if year:
+            sql += ' AND docs.year = ?'
+            params.append(str(year))
+        sql += ' ORDER BY score LIMIT ?'
+        params.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        reviews_dir = self.review_index.reviews_dir
+        return [
+            {
+                'filename': filename,
+                'title': title,
+                'author': author,
+                'year': year,
+                'score': round(-score, 4),
+                'snippet': snippet,
+                # Come toReviewSummary di server.js: senza .txt (solo archivio strutturato)
+                # il testo si legge da /api/reviews/:filename
+                'url': (f'/reviews/{filename}' if os.path.exists(os.path.join(reviews_dir, filename))
+                        else f'/api/reviews/{filename}')
+            }
+            for filename, title, author, year, score, snippet in rows
+        ]
+
+    def close(self):
+        self._conn.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Ricerca full-text nelle recensioni estratte')
+    parser.add_argument('query', nargs='?', help='Testo da cercare (es. "nolan bomba atomica")')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--year', help='Filtra per anno')
+    parser.add_argument('--json', action='store_true', help='Output JSON')
+    parser.add_argument('--rebuild', action='store_true', help="Ricostruisce l'indice da zero")
+    args = parser.parse_args()
+
+    index = ReviewSearchIndex()
+
+    if args.rebuild:
+        started = time.time()
+        counts = index.rebuild()
+        print(json.dumps({**counts, 'elapsed_ms': int((time.time() - started) * 1000)}))
+        if not args.query:
+            return
+
+    if not args.query:
+        parser.print_help()
+        return
+
+    started = time.time()
+    results = index.search(args.query, limit=args.limit, year=args.year)
+    elapsed_ms = round((time.time() - started) * 1000, 1)
+
+    if args.json:
+        print(json.dumps({'query': args.query, 'results': results, 'total': len(results),
+                          'elapsed_ms': elapsed_ms}, ensure_ascii=False))
+        return
+
+    print(f"{len(results)} risultati per '{args.query}' ({elapsed_ms} ms)")
+    for i, result in enumerate(results, 1):
+        print(f"\n{i}. {result['title']} ({result['year']}) - {result['author']}")
+        print(f"   {result['snippet']}")
+        print(f"   File: {result['filename']}")
+
+
+if __name__ == "__main__":
+    main()
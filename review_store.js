@@ -0,0 +1,464 @@
+#!/usr/bin/env node
+
+const fs = require('fs');
+const path = require('path');
+
+/**
+ * Archivio strutturato delle recensioni (reviews/store/)
+ *
+ * <shard>.jsonl       un record completo per riga: testo, metadati, log di estrazione
+ * <shard>.meta.jsonl  solo metadati + posizione (offset/length) del record nello shard
+ *
+ * Tutti i processi scrivono nello shard condiviso reviews-shared, un append alla volta sotto
+ * il lock store.lock: l'offset del record e la dimensione del file letta tenendo il lock, quindi
+ * resta esatto, e il numero di shard non cresce con le estrazioni. compact() (stesso lock)
+ * riscrive tutti gli shard, compresi quelli per processo delle versioni precedenti, in uno
+ * solo. Un film estratto piu volte ha piu record, vale l'ultimo.
+ * I .txt in reviews/ sono un export leggibile generato dagli stessi record.
+ * Lettore Python: review_store.py
+ */
+
+const STORE_VERSION = 1;
+const DEFAULT_STORE_DIR = path.join(__dirname, 'reviews', 'store');
+const META_SUFFIX = '.meta.jsonl';
+const DATA_SUFFIX = '.jsonl';
+const SHARED_SHARD = 'reviews-shared';
+const LOCK_FILE = 'store.lock';
+const USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36';
+
+// Campi del record che finiscono anche nel file metadati (tutto tranne il testo)
+const META_FIELDS = [
+    'key', 'title', 'filmTitle', 'year', 'author', 'date', 'url', 'contentLength', 'wordCount',
+    'extractionMethod', 'tier', 'processingTime', 'extractedAt', 'file'
+];
+
+const LOCK_TIMEOUT_MS = 15000;
+// Lock lasciato da un processo terminato durante la scrittura
+const LOCK_STALE_MS = 10000;
+const sleepCell = new Int32Array(new SharedArrayBuffer(4));
+
+/**
+ * Un tentativo di creazione esclusiva del lock file (stesso protocollo di review_index.py):
+ * descrittore del lock, o null se un altro processo lo tiene
+ */
+function tryLock(lockPath) {
+    for (;;) {
+        try {
+            return fs.openSync(lockPath, 'wx');
+        } catch (error) {
+            if (error.code === 'ENOENT') {
+                fs.mkdirSync(path.dirname(lockPath), { recursive: true });
+                continue;
+            }
+            if (error.code !== 'EEXIST') throw error;
+            try {
+                if (Date.now() - fs.statSync(lockPath).mtimeMs <= LOCK_STALE_MS) return null;
+                fs.rmSync(lockPath, { force: true });
+            } catch (statError) {
+                // Lock rilasciato nel frattempo
+            }
+        }
+    }
+}
+
+function releaseLock(lockPath, fd) {
+    fs.closeSync(fd);
+    fs.rmSync(lockPath, { force: true });
+}
+
+/**
+ * Esegue fn tenendo il lock file, attendendo fino a LOCK_TIMEOUT_MS (CLI e worker, non il server)
+ */
+function withFileLock(lockPath, fn) {
+    const deadline = Date.now() + LOCK_TIMEOUT_MS;
+    let fd;
+    while ((fd = tryLock(lockPath)) === null) {
+        if (Date.now() > deadline) {
+            throw new Error(`Indice recensioni bloccato da ${lockPath}`);
+        }
+        Atomics.wait(sleepCell, 0, 0, 10);
+    }
+    try {
+        return fn();
+    } finally {
+        releaseLock(lockPath, fd);
+    }
+}
+
+function reviewKey(normalizedTitle, year) {
+    return `${normalizedTitle}_${year}`;
+}
+
+function isDataShard(name) {
+    return name.endsWith(DATA_SUFFIX) && !name.endsWith(META_SUFFIX);
+}
+
+/**
+ * Contenuto del .txt leggibile (stesso formato storico di saveReviewWithLog)
+ */
+function formatReviewText(record) {
+    const extractedAt = new Date(record.extractedAt);
+    const timestampStr = extractedAt.toLocaleString('it-IT', {
+        weekday: 'long',
+        year: 'numeric',
+        month: 'long',
+        day: 'numeric',
+        hour: '2-digit',
+        minute: '2-digit',
+        second: '2-digit'
+    });
+
+    return `ESTRATTO IL: ${timestampStr}
+
+${record.filmTitle} (${record.year})
+Autore: ${record.author}
+Data: ${record.date}
+Lunghezza: ${record.contentLength} caratteri
+
+RECENSIONE:
+================================================================================
+${record.content}
+================================================================================
+
+LOG ESTRAZIONE:
+================================================================================
+URL: ${record.url}
+Tempo elaborazione: ${record.processingTime}ms
+Metodo estrazione: ${record.extractionMethod}
+Livello estrazione: ${record.tier}
+Parole: ${record.wordCount}
+File: ${record.file}
+Timestamp: ${extractedAt.toISOString()}
+User-Agent: ${record.userAgent || USER_AGENT}
+Selettori utilizzati: p.corpo, .corpo, #recensione
+Viewport: Default Puppeteer
+Lingua: Italiano
+================================================================================
+`;
+}
+
+class ReviewStore {
+    constructor(storeDir = DEFAULT_STORE_DIR) {
+        this.storeDir = storeDir;
+        this.shard = SHARED_SHARD;
+        this.lockPath = path.join(storeDir, LOCK_FILE);
+        // Mappa key -> ultimi metadati e byte gia letti di ogni file metadati
+        this.metaCache = null;
+    }
+
+    /**
+     * Aggiunge un record (testo + metadati + log) allo shard condiviso e restituisce la voce metadati.
+     * I file si aprono a ogni append: compact() puo averli sostituiti nel frattempo.
+     */
+    append(record) {
+        fs.mkdirSync(this.storeDir, { recursive: true });
+        const fullRecord = { v: STORE_VERSION, ...record };
+        const line = Buffer.from(JSON.stringify(fullRecord) + '\n');
+
+        return withFileLock(this.lockPath, () => {
+            const dataFd = fs.openSync(path.join(this.storeDir, this.shard + DATA_SUFFIX), 'a');
+            const metaFd = fs.openSync(path.join(this.storeDir, this.shard + META_SUFFIX), 'a');
+            try {
+                const offset = fs.fstatSync(dataFd).size;
+                const metaOffset = fs.fstatSync(metaFd).size;
+                fs.writeSync(dataFd, line);
+
+                const meta = { v: STORE_VERSION };
+                for (const field of META_FIELDS) meta[field] = record[field] ?? null;
+                meta.shard = this.shard;
+                meta.offset = offset;
+                meta.length = line.length;
+                const metaLine = Buffer.from(JSON.stringify(meta) + '\n');
+                fs.writeSync(metaFd, metaLine);
+
+                // Mappa dei metadati gia in memoria aggiornata senza rileggere lo shard,
+                // se nessun altro processo ha scritto dopo l'ultima lettura
+                if (this.metaCache && (this.metaCache.offsets.get(this.shard) || 0) === metaOffset) {
+                    this.mergeMeta(this.metaCache.latest, meta);
+                    this.metaCache.offsets.set(this.shard, metaOffset + metaLine.length);
+                }
+                return meta;
+            } finally {
+                fs.closeSync(dataFd);
+                fs.closeSync(metaFd);
+            }
+        });
+    }
+
+    shards() {
+        if (!fs.existsSync(this.storeDir)) return [];
+        return fs.readdirSync(this.storeDir)
+            .filter(isDataShard)
+            .map(name => name.slice(0, -DATA_SUFFIX.length))
+            .sort();
+    }
+
+    /**
+     * Legge le righe JSON di un file, ignorando l'eventuale riga troncata finale
+     */
+    *readLines(filePath) {
+        let text;
+        try {
+            text = fs.readFileSync(filePath, 'utf8');
+        } catch (error) {
+            return;
+        }
+        for (const line of text.split('\n')) {
+            if (!line) continue;
+            try {
+                yield JSON.parse(line);
+            } catch (error) {
+                // Scrittura interrotta: record incompleto
+            }
+        }
+    }
+
+    /**
+     * Righe JSON complete scritte da offset in poi: { items, end }
+     */
+    readTail(filePath, offset) {
+        const items = [];
+        let fd;
+        try {
+            fd = fs.openSync(filePath, 'r');
+        } catch (error) {
+            return { items, end: offset };
+        }
+        try {
+            const size = fs.fstatSync(fd).size;
+            if (size <= offset) return { items, end: offset };
+            const buffer = Buffer.alloc(size - offset);
+            fs.readSync(fd, buffer, 0, buffer.length, offset);
+            const complete = buffer.lastIndexOf(0x0a) + 1;
+            for (const line of buffer.toString('utf8', 0, complete).split('\n')) {
+                if (!line) continue;
+                try {
+                    items.push(JSON.parse(line));
+                } catch (error) {
+                    // Scrittura interrotta: record incompleto
+                }
+            }
+            return { items, end: offset + complete };
+        } finally {
+            fs.closeSync(fd);
+        }
+    }
+
+    mergeMeta(latest, meta) {
+        const current = latest.get(meta.key);
+        if (!current || meta.extractedAt >= current.extractedAt) latest.set(meta.key, meta);
+    }
+
+    /**
+     * Ultimi metadati per ogni film, senza leggere i testi.
+     * La mappa resta in memoria: a ogni chiamata si leggono solo le righe aggiunte ai file
+     * metadati dopo la chiamata precedente (append() la aggiorna direttamente); si riparte da
+     * zero solo se uno shard e stato rimosso o riscritto da compact(). Da non modificare.
+     */
+    latestMetadata() {
+        const shards = this.shards();
+        const present = new Set(shards);
+        if (!this.metaCache || [...this.metaCache.offsets.keys()].some(shard => !present.has(shard))) {
+            this.metaCache = { latest: new Map(), offsets: new Map() };
+        }
+
+        const { latest, offsets } = this.metaCache;
+        for (const shard of shards) {
+            const metaPath = path.join(this.storeDir, shard + META_SUFFIX);
+            const offset = offsets.get(shard) || 0;
+            let size;
+            try {
+                size = fs.statSync(metaPath).size;
+            } catch (error) {
+                continue;
+            }
+            if (size < offset) {
+                this.metaCache = null;
+                return this.latestMetadata();
+            }
+            if (size === offset) continue;
+
+            const { items, end } = this.readTail(metaPath, offset);
+            for (const meta of items) this.mergeMeta(latest, meta);
+            offsets.set(shard, end);
+        }
+        return latest;
+    }
+
+    /**
+     * Tutti i record completi, in ordine di scrittura (lettura sequenziale degli shard)
+     */
+    *records() {
+        for (const shard of this.shards()) {
+            yield* this.readLines(path.join(this.storeDir, shard + DATA_SUFFIX));
+        }
+    }
+
+    /**
+     * Record completo dell'ultima estrazione del film, letto con un solo accesso posizionato
+     */
+    get(key, metadata = null) {
+        const meta = metadata ? metadata.get(key) : this.latestMetadata().get(key);
+        if (!meta) return null;
+
+        const fd = fs.openSync(path.join(this.storeDir, meta.shard + DATA_SUFFIX), 'r');
+        try {
+            const buffer = Buffer.alloc(meta.length);
+            fs.readSync(fd, buffer, 0, meta.length, meta.offset);
+            return JSON.parse(buffer.toString('utf8'));
+        } finally {
+            fs.closeSync(fd);
+        }
+    }
+
+    /**
+     * Riscrive tutti gli shard in uno solo tenendo l'ultimo record per film (sotto lock:
+     * nessun append durante la riscrittura)
+     */
+    compact() {
+        return withFileLock(this.lockPath, () => {
+            const shards = this.shards();
+            if (shards.length < 2 && !shards.includes(SHARED_SHARD)) return { shards: shards.length, records: null };
+
+            const latest = new Map();
+            for (const shard of shards) {
+                for (const record of this.readLines(path.join(this.storeDir, shard + DATA_SUFFIX))) {
+                    const current = latest.get(record.key);
+                    if (!current || record.extractedAt >= current.extractedAt) latest.set(record.key, record);
+                }
+            }
+
+            // Il nuovo shard viene scritto per intero prima di eliminare i vecchi
+            const stamp = new Date().toISOString().replace(/[-:]/g, '').replace(/\..*/, '');
+            const base = `reviews-${stamp}-compact-${process.pid}`;
+            // Nome mai uguale a uno shard da eliminare (piu compattazioni nello stesso secondo)
+            let compacted = base;
+            for (let n = 1; shards.includes(compacted); n++) compacted = `${base}-${n}`;
+            const data = [];
+            const meta = [];
+            let offset = 0;
+            for (const record of latest.values()) {
+                const { v, ...rest } = record;
+                const line = Buffer.from(JSON.stringify({ v: STORE_VERSION, ...rest }) + '\n');
+                const entry = { v: STORE_VERSION };
+                for (const field of META_FIELDS) entry[field] = rest[field] ?? null;
+                Object.assign(entry, { shard: compacted, offset, length: line.length });
+                data.push(line);
+                meta.push(JSON.stringify(entry) + '\n');
+                offset += line.length;
+            }
+            fs.writeFileSync(path.join(this.storeDir, compacted + DATA_SUFFIX), Buffer.concat(data));
+            fs.writeFileSync(path.join(this.storeDir, compacted + META_SUFFIX), meta.join(''), 'utf8');
+
+            for (const shard of shards) {
+                fs.rmSync(path.join(this.storeDir, shard + DATA_SUFFIX), { force: true });
+                fs.rmSync(path.join(this.storeDir, shard + META_SUFFIX), { force: true });
+            }
+            this.metaCache = null;
+
+            return { shards: shards.length, records: latest.size };
+        });
+    }
+}
+
+const stores = new Map();
+
+/**
+ * Archivio condiviso per directory (una istanza per processo)
+ */
+function getReviewStore(storeDir = DEFAULT_STORE_DIR) {
+    if (!stores.has(storeDir)) {
+        stores.set(storeDir, new ReviewStore(storeDir));
+    }
+    return stores.get(storeDir);
+}
+
+/**
+ * Import dei .txt esistenti (una tantum, per chi aveva gia recensioni in reviews/)
+ */
+function importTextReviews(store, reviewsDir) {
+    const { parseReviewHeader } = require('./review_index');
+    const existing = store.latestMetadata();
+    let imported = 0;
+
+    for (const filename of fs.readdirSync(reviewsDir)) {
+        const match = filename.match(/^(.+)_(\d{4})_review\.txt$/);
+        if (!match || existing.has(`${match[1]}_${match[2]}`)) continue;
+
+        const filePath = path.join(reviewsDir, filename);
+        const text = fs.readFileSync(filePath, 'utf8');
+        const body = text.match(/RECENSIONE:\n=+\n([\s\S]*?)\n=+\n/);
+        if (!body) continue;
+
+        const header = parseReviewHeader(filePath);
+        const log = field => (text.match(new RegExp(`^${field}: (.*)$`, 'm')) || [])[1] || null;
+        const content = body[1].trim();
+
+        store.append({
+            key: `${match[1]}_${match[2]}`,
+            title: header.filmTitle || match[1].replace(/-/g, ' '),
+            filmTitle: header.filmTitle || match[1].replace(/-/g, ' '),
+            year: parseInt(match[2]),
+            author: header.author,
+            date: header.date,
+            url: log('URL'),
+            content,
+            contentLength: header.length || content.length,
+            wordCount: parseInt(log('Parole')) || content.split(/\s+/).length,
+            extractionMethod: log('Metodo estrazione'),
+            tier: log('Livello estrazione'),
+            processingTime: parseInt(log('Tempo elaborazione')) || null,
+            extractedAt: log('Timestamp') || fs.statSync(filePath).mtime.toISOString(),
+            file: filename
+        });
+        imported++;
+    }
+
+    return imported;
+}
+
+module.exports = {
+    ReviewStore,
+    getReviewStore,
+    formatReviewText,
+    reviewKey,
+    tryLock,
+    releaseLock,
+    withFileLock,
+    DEFAULT_STORE_DIR
+};
+
+// CLI: node review_store.js [stats|import-txt|export-txt|compact]
+if (require.main === module) {
+    const command = process.argv[2] || 'stats';
+    const store = getReviewStore();
+    const reviewsDir = path.join(__dirname, 'reviews');
+
+    if (command === 'import-txt') {
+        console.log(JSON.stringify({ imported: importTextReviews(store, reviewsDir) }));
+    } else if (command === 'export-txt') {
+        // Rigenera i .txt dall'archivio strutturato
+        const { getReviewIndex } = require('./review_index');
+        const index = getReviewIndex(reviewsDir);
+        let exported = 0;
+        const metadata = store.latestMetadata();
+        for (const meta of metadata.values()) {
+            const record = store.get(meta.key, metadata);
+            const filePath = path.join(reviewsDir, record.file || `${record.key}_review.txt`);
+            fs.writeFileSync(filePath, formatReviewText({ ...record, file: path.basename(filePath) }), 'utf8');
+            exported++;
+        }
+        index.refresh({ force: true });
+        console.log(JSON.stringify({ exported }));
+    } else if (command === 'compact') {
+        console.log(JSON.stringify(store.compact()));
+    } else {
+        const metadata = [...store.latestMetadata().values()];
+        console.log(JSON.stringify({
+            reviews: metadata.length,
+            shards: store.shards().length,
+            totalContentLength: metadata.reduce((sum, meta) => sum + (meta.contentLength || 0), 0),
+            storeDir: store.storeDir
+        }, null, 2));
+    }
+}
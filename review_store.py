@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Lettore dell'archivio strutturato delle recensioni (reviews/store/, scritto da review_store.js)
+
+<shard>.jsonl       un record completo per riga (testo, metadati, log di estrazione)
+<shard>.meta.jsonl  solo metadati + offset/length del record nello shard
+
+I metadati si leggono senza toccare i testi; l'analisi completa e una lettura sequenziale
+degli shard invece di aprire e interpretare ogni .txt.
+"""
+
+import json
+import os
+import threading
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_DIR = os.path.join(SCRIPT_DIR, 'reviews', 'store')
+META_SUFFIX = '.meta.jsonl'
+DATA_SUFFIX = '.jsonl'
+
+
+def _read_lines(path):
+    """Righe JSON del file, ignorando l'eventuale riga troncata da una scrittura interrotta"""
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except OSError:
+        return
+    with f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def _read_tail(path, offset):
+    """Righe JSON complete scritte da offset in poi: (voci, nuovo offset)"""
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return [], offset
+    with f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1
+    items = []
+    for line in data[:end].split(b'\n'):
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return items, offset + end
+
+
+def _merge_meta(latest, meta):
+    current = latest.get(meta['key'])
+    if current is None or meta['extractedAt'] >= current['extractedAt']:
+        latest[meta['key']] = meta
+
+
+class ReviewStore:
+    def __init__(self, store_dir=None):
+        self.store_dir = store_dir or DEFAULT_STORE_DIR
+        self._lock = threading.Lock()
+        # {key: meta} e byte gia letti di ogni file metadati (come review_store.js)
+        self._latest = None
+        self._offsets = {}
+
+    def shards(self):
+        try:
+            names = os.listdir(self.store_dir)
+        except OSError:
+            return []
+        return sorted(name[:-len(DATA_SUFFIX)] for name in names
+                      if name.endswith(DATA_SUFFIX) and not name.endswith(META_SUFFIX))
+
+    def signature(self):
+        """Firma economica del contenuto: nome e dimensione dei file metadati (cambia a ogni append)"""
+        parts = []
+        for shard in self.shards():
+            try:
+                parts.append(f"{shard}:{os.stat(os.path.join(self.store_dir, shard + META_SUFFIX)).st_size}")
+            except OSError:
+                continue
+        return ','.join(parts)
+
+    def iter_metadata(self):
+        """Tutte le voci metadati (anche estrazioni superate), senza leggere i testi"""
+        for shard in self.shards():
+            yield from _read_lines(os.path.join(self.store_dir, shard + META_SUFFIX))
+
+    def latest_metadata(self):
+        """
+        Metadati dell'ultima estrazione per ogni film: {key: meta}, da non modificare.
+        Il dizionario resta in memoria e a ogni chiamata si leggono solo le righe aggiunte
+        agli shard; si riparte da zero se uno shard e stato rimosso o riscritto (compact).
+        """
+        with self._lock:
+            shards = self.shards()
+            if self._latest is None or not set(self._offsets) <= set(shards):
+                self._latest, self._offsets = {}, {}
+
+            for shard in shards:
+                path = os.path.join(self.store_dir, shard + META_SUFFIX)
+                offset = self._offsets.get(shard, 0)
+                try:
+                    size = os.stat(path).st_size
+                except OSError:
+                    continue
+                if size < offset:
+                    self._latest, self._offsets = None, {}
+                    break
+                if size == offset:
+                    continue
+                items, self._offsets[shard] = _read_tail(path, offset)
+                for meta in items:
+                    _merge_meta(self._latest, meta)
+            else:
+                return self._latest
+        return self.latest_metadata()
+
+    def iter_records(self, latest_only=True):
+        """
+        Record completi in ordine di scrittura, con una lettura sequenziale per shard.
+        latest_only: salta le estrazioni superate da una successiva dello stesso film.
+        """
+        latest = self.latest_metadata() if latest_only else None
+        for shard in self.shards():
+            for record in _read_lines(os.path.join(self.store_dir, shard + DATA_SUFFIX)):
+                if latest is not None:
+                    meta = latest.get(record['key'])
+                    if not meta or meta['extractedAt'] != record['extractedAt']:
+                        continue
+                yield record
+
+    def get(self, key, metadata=None):
+        """Record completo dell'ultima estrazione del film (slug_anno), o None"""
+        meta = (metadata if metadata is not None else self.latest_metadata()).get(key)
+        if not meta:
+            return None
+        with open(os.path.join(self.store_dir, meta['shard'] + DATA_SUFFIX), 'rb') as f:
+            f.seek(meta['offset'])
+            return json.loads(f.read(meta['length']))
+
+    def stats(self):
+        latest = list(self.latest_metadata().values())
+        return {
+            'reviews': len(latest),
+            'shards': len(self.shards()),
+            'total_content_length': sum(meta.get('contentLength') or 0 for meta in latest),
+            'store_dir': self.store_dir
+        }
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    store = ReviewStore()
+
+    if command == 'list':
+        print(json.dumps(list(store.latest_metadata().values()), indent=2, ensure_ascii=False))
+    elif command == 'get' and len(sys.argv) > 2:
+        print(json.dumps(store.get(sys.argv[2]), indent=2, ensure_ascii=False))
+    else:
+        print(json.dumps(store.stats(), indent=2, ensure_ascii=False))
@@ -4,17 +4,51 @@ MyMovies Smart Search & Extract
 Cerca film con TMDB API e estrae recensioni automaticamente
 """
 
+import argparse
 import requests
 import json
 import subprocess
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from extraction_cache import ExtractionCache
+from extraction_jobs import ExtractionJobClient, ExtractionJobError
+from extraction_worker import ExtractionWorker, ExtractionWorkerError, parse_year, to_wrapper_result
+from http_client import TokenBucket, create_session, request_with_retry
+from metrics import Trace, registry
+from mymovies_http import MyMoviesChecker, MyMoviesResolver
+from review_store import ReviewStore
+from text_cleaner import normalize_title_py
+from tmdb_cache import TMDBCache
+
+tmdb_request_duration = registry.histogram(
+    'tmdb_request_duration_seconds', 'Durata delle richieste HTTP a TMDB (retry compresi)')
+tmdb_cache_lookups = registry.counter('tmdb_cache_lookups_total', 'Letture dalla cache TMDB per esito')
+extraction_requests = registry.counter(
+    'mymovies_py_extractions_total', 'Estrazioni richieste da MyMoviesExtractor per percorso ed esito')
+
 class TMDBMovieSearch:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, max_workers=None, cache=None,
+                 pool_size=None, rate_limit=None, max_retries=3):
         self.api_key = api_key or os.getenv('TMDB_API_KEY')
-        self.base_url = "https://api.themoviedb.org/3"
+        # TMDB_BASE_URL: API alternativa (es. il server finto di benchmark/mock_servers.py)
+        self.base_url = os.getenv('TMDB_BASE_URL', "https://api.themoviedb.org/3")
+        # Numero massimo di richieste dettagli/credits in parallelo
+        self.max_workers = max_workers or int(os.getenv('TMDB_MAX_WORKERS', '10'))
+        # Cache su disco (cache=False o TMDB_CACHE=0 per disabilitarla)
+        if cache is None and os.getenv('TMDB_CACHE', '1') != '0':
+            cache = TMDBCache()
+        self.cache = cache or None
+        # Sessione con pool keep-alive e rate limiter condiviso tra i thread
+        # (TMDB consente circa 40-50 richieste/secondo)
+        self.session = create_session(pool_size or self.max_workers)
+        if rate_limit is None:
+            rate_limit = float(os.getenv('TMDB_RATE_LIMIT', '40'))
+        self.limiter = TokenBucket(rate_limit)
+        self.max_retries = max_retries
         
         if not self.api_key:
             print("ERRORE: TMDB API Key richiesta!")
@@ -22,9 +56,35 @@ class TMDBMovieSearch:
             print("Get API key from: https://www.themoviedb.org/settings/api")
             sys.exit(1)
     
-    def search_movies(self, query, max_results=10):
-        """Cerca film su TMDB"""
-        url = f"{self.base_url}/search/movie"
+    def _get_json(self, endpoint, params, timeout):
+        """GET su TMDB passando dalla cache se disponibile"""
+        if self.cache:
+            cached = self.cache.get(endpoint, params)
+            tmdb_cache_lookups.inc({'result': 'miss' if cached is None else 'hit'})
+            if cached is not None:
+                return cached
+        
+        # /movie/<id> -> /movie/{id}: una serie per tipo di richiesta, non per film
+        labels = {'endpoint': re.sub(r'^/movie/\d+$', '/movie/{id}', endpoint)}
+        with tmdb_request_duration.time(labels):
+            response = request_with_retry(
+                self.session, 'GET', f"{self.base_url}{endpoint}",
+                limiter=self.limiter, max_retries=self.max_retries,
+                params=params, timeout=timeout
+            )
+        response.raise_for_status()
+        data = response.json()
+        
+        if self.cache:
+            self.cache.set(endpoint, params, data)
+        return data
+    
+    def search_movies_light(self, query, max_results=10):
+        """
+        Solo la chiamata /search/movie (nessun dettaglio/credits): titolo, anno, poster, trama.
+        director resta None. Le eccezioni di rete vengono propagate.
+        Restituisce (film, total_results).
+        """
         params = {
             'api_key': self.api_key,
             'query': query,
@@ -32,27 +92,48 @@ class TMDBMovieSearch:
             'include_adult': False,
             'page': 1
         }
-        
+        data = self._get_json('/search/movie', params, timeout=10)
+        movies = [self._movie_summary(movie) for movie in data.get('results', [])[:max_results]]
+        return movies, data.get('total_results', len(movies))
+    
+    def list_movies(self, list_name, region='IT', page=1):
+        """
+        Una pagina di un elenco TMDB (now_playing, upcoming) per la regione indicata,
+        stesso formato di search_movies_light piu 'popularity'. Restituisce (film, total_pages).
+        """
+        params = {
+            'api_key': self.api_key,
+            'language': 'it-IT',
+            'region': region,
+            'page': page
+        }
+        data = self._get_json(f"/movie/{list_name}", params, timeout=10)
+        movies = [self._movie_summary(movie) for movie in data.get('results', [])]
+        return movies, data.get('total_pages', 1)
+    
+    @staticmethod
+    def _movie_summary(movie):
+        """Risultato TMDB -> dict usato da ricerca e interfaccia (director da completare)"""
+        return {
+            'id': movie['id'],
+            'title': movie.get('title', 'N/A'),
+            'original_title': movie.get('original_title', ''),
+            'year': movie.get('release_date', '')[:4] if movie.get('release_date') else 'N/A',
+            'director': None,
+            'overview': movie.get('overview', '')[:150] + '...' if movie.get('overview') else 'Nessuna trama disponibile',
+            'vote_average': movie.get('vote_average', 0),
+            'popularity': movie.get('popularity', 0),
+            'poster_path': movie.get('poster_path', '')
+        }
+    
+    def search_movies(self, query, max_results=10):
+        """Cerca film su TMDB"""
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            movies, _ = self.search_movies_light(query, max_results)
+            details = self.get_movies_details([movie['id'] for movie in movies])
             
-            movies = []
-            for movie in data.get('results', [])[:max_results]:
-                # Ottieni dettagli film per avere il regista
-                movie_details = self.get_movie_details(movie['id'])
-                
-                movies.append({
-                    'id': movie['id'],
-                    'title': movie.get('title', 'N/A'),
-                    'original_title': movie.get('original_title', ''),
-                    'year': movie.get('release_date', '')[:4] if movie.get('release_date') else 'N/A',
-                    'director': movie_details.get('director', 'N/A'),
-                    'overview': movie.get('overview', '')[:150] + '...' if movie.get('overview') else 'Nessuna trama disponibile',
-                    'vote_average': movie.get('vote_average', 0),
-                    'poster_path': movie.get('poster_path', '')
-                })
+            for movie, movie_details in zip(movies, details):
+                movie['director'] = movie_details.get('director', 'N/A')
             
             return movies
             
@@ -60,19 +141,31 @@ class TMDBMovieSearch:
             print(f"ERRORE: Errore nella ricerca TMDB: {e}")
             return []
     
-    def get_movie_details(self, movie_id):
-        """Ottiene dettagli film incluso regista"""
-        url = f"{self.base_url}/movie/{movie_id}"
+    def get_movies_details(self, movie_ids):
+        """Ottiene i dettagli di piu film in parallelo, mantenendo l'ordine"""
+        if not movie_ids:
+            return []
+        
+        workers = max(1, min(self.max_workers, len(movie_ids)))
+        if workers == 1:
+            return [self.get_movie_details(movie_id) for movie_id in movie_ids]
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.get_movie_details, movie_ids))
+    
+    def fetch_movie_details(self, movie_id):
+        """Risposta TMDB dettagli + credits di un film; le eccezioni di rete vengono propagate"""
         params = {
             'api_key': self.api_key,
             'language': 'en-EN',  # English per nomi registi romanizzati
             'append_to_response': 'credits'
         }
-        
+        return self._get_json(f"/movie/{movie_id}", params, timeout=5)
+    
+    def get_movie_details(self, movie_id):
+        """Ottiene dettagli film incluso regista"""
         try:
-            response = requests.get(url, params=params, timeout=5)
-            response.raise_for_status()
-            data = response.json()
+            data = self.fetch_movie_details(movie_id)
             
             # Trova il regista
             director = 'N/A'
@@ -92,41 +185,102 @@ class TMDBMovieSearch:
             return {'director': 'N/A', 'runtime': 0, 'genres': []}
 
 class MyMoviesExtractor:
-    def __init__(self, script_dir):
+    def __init__(self, script_dir, use_worker=True, worker_concurrency=None, server_url=None, use_cache=True):
         self.script_dir = script_dir
         self.ai_wrapper = os.path.join(script_dir, 'ai_wrapper.sh')
         
         if not os.path.exists(self.ai_wrapper):
             print(f"ERRORE: Script ai_wrapper.sh non trovato in {self.ai_wrapper}")
             sys.exit(1)
+        
+        self.checker = MyMoviesChecker()
+        # Cache dei risultati (extraction_cache.js/.py, MYMOVIES_EXTRACTION_CACHE=0 per disabilitarla)
+        self.cache = ExtractionCache() if use_cache and os.getenv('MYMOVIES_EXTRACTION_CACHE', '1') != '0' else None
+        # Coda di server.js (MYMOVIES_SERVER_URL, es. http://localhost:3000): estrazioni limitate e condivise
+        server_url = server_url or os.getenv('MYMOVIES_SERVER_URL')
+        self.jobs = ExtractionJobClient(server_url) if server_url else None
+        # Altrimenti worker Node persistente con browser gia avviato (MYMOVIES_WORKER=0 per disabilitarlo)
+        self.worker = None
+        if not self.jobs and use_worker and os.getenv('MYMOVIES_WORKER', '1') != '0':
+            concurrency = worker_concurrency or int(os.getenv('MYMOVIES_WORKER_CONCURRENCY', '2'))
+            self.worker = ExtractionWorker(script_dir, concurrency=concurrency)
+    
+    def close(self):
+        """Termina il worker di estrazione se avviato"""
+        if self.worker:
+            self.worker.close()
     
     def check_film_exists(self, title, year):
-        """Controlla se il film esiste su MyMovies"""
-        cmd = [self.ai_wrapper, 'check', title, str(year)]
+        """Controlla se la recensione del film esiste su MyMovies (solo HTTP, senza browser)"""
+        return self.checker.exists(title, year)
+    
+    def check_films_exist(self, films):
+        """Controlla in parallelo una lista di (titolo, anno)"""
+        return [self.checker.has_review(result) for result in self.checker.check_many(films)]
+    
+    def extract_review(self, title, year, no_save=False, force=False, trace=False):
+        """
+        Estrae recensione (force: ignora la cache e rifa l'estrazione).
+        Con trace=True (o MYMOVIES_TRACE=1) il risultato include 'trace': fasi Python
+        e, se l'estrazione passa dal worker, le fasi di extractMovieReview.
+        """
+        tracing = trace or os.getenv('MYMOVIES_TRACE') == '1'
+        spans = Trace()
+        path, raw, result = None, None, None
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
-            if result.stdout.strip():
-                data = json.loads(result.stdout)
-                return data.get('status') == 'found'
-        except (subprocess.TimeoutExpired, json.JSONDecodeError, Exception):
-            pass
-        
-        return False
+            path, raw, result = self._extract(spans, title, year, no_save, force, tracing)
+            return result
+        finally:
+            status = result.get('status', 'error') if result else 'error'
+            extraction_requests.inc({'path': path or 'none', 'status': status})
+            if tracing and result is not None:
+                result['trace'] = {**spans.to_dict(), 'path': path, 'extractor': (raw or {}).get('trace')}
     
-    def extract_review(self, title, year):
-        """Estrae recensione"""
+    def _extract(self, spans, title, year, no_save, force, tracing):
+        """Restituisce (percorso usato, risultato grezzo di extractMovieReview o None, risultato)"""
+        # Film TMDB senza data di uscita (anno 'N/A'): nessun percorso puo estrarli
+        if parse_year(year) is None:
+            return None, None, {'status': 'error', 'title': title, 'year': year,
+                                'message': f"Anno non valido: {year}"}
+        
+        if self.cache and not force:
+            with spans.span('cache_lookup'):
+                cached = self.cache.get(title, year)
+            if cached:
+                return 'cache', None, to_wrapper_result(cached, title, year)
+        
+        if self.jobs:
+            try:
+                with spans.span('server_job'):
+                    raw = self.jobs.extract(title, year, no_save=no_save, force=force)
+                return 'server', raw, to_wrapper_result(raw, title, year)
+            except (ExtractionJobError, requests.exceptions.RequestException) as e:
+                return 'server', None, {'status': 'error', 'message': str(e)}
+        
+        if self.worker:
+            try:
+                with spans.span('worker'):
+                    raw = self.worker.extract(title, year, no_save=no_save, trace=tracing)
+                return 'worker', raw, to_wrapper_result(raw, title, year)
+            except FileNotFoundError:
+                # Node non disponibile: ripiega sul wrapper
+                self.worker = None
+            except ExtractionWorkerError as e:
+                return 'worker', None, {'status': 'error', 'message': str(e)}
+        
         cmd = [self.ai_wrapper, 'extract', title, str(year)]
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
+            with spans.span('wrapper_subprocess'):
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
             if result.stdout.strip():
                 data = json.loads(result.stdout)
-                return data
+                return 'wrapper', None, data
         except (subprocess.TimeoutExpired, json.JSONDecodeError, Exception) as e:
-            return {'status': 'error', 'message': str(e)}
+            return 'wrapper', None, {'status': 'error', 'message': str(e)}
         
-        return {'status': 'error', 'message': 'Unknown error'}
+        return 'wrapper', None, {'status': 'error', 'message': 'Unknown error'}
 
 def print_movie_list(movies):
     """Stampa lista film formattata"""
@@ -170,27 +324,7 @@ def get_user_choice(max_num):
 
 def show_review_file(title, year):
     """Mostra il contenuto della recensione salvata"""
-    import os
-
     # Normalizza titolo come fa JavaScript
-    def normalize_title_py(title):
-        import re
-        title = title.lower()
-        # Caratteri speciali
-        replacements = {
-            'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'ä': 'a', 'å': 'a',
-            'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
-            'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
-            'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o', 'ö': 'o', 'ø': 'o',
-            'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
-            'ý': 'y', 'ÿ': 'y', 'ñ': 'n', 'ç': 'c'
-        }
-        for old, new in replacements.items():
-            title = title.replace(old, new)
-        title = re.sub(r'[^a-z0-9\s]', '', title)
-        title = re.sub(r'\s+', '-', title)
-        return title.strip('-')
-
     normalized_title = normalize_title_py(title)
     filename = f"{normalized_title}_{year}_review.txt"
     filepath = os.path.join('reviews', filename)
@@ -204,6 +338,17 @@ def show_review_file(title, year):
                 print(content)
         except Exception as e:
             print(f"ERRORE: Errore lettura file: {e}")
+        return
+
+    # Export .txt disattivato (MYMOVIES_TXT_EXPORT=0): record strutturato in reviews/store
+    record = ReviewStore().get(f"{normalized_title}_{year}")
+    if record:
+        print(f"\nRECENSIONE: {record['filmTitle']} ({year})")
+        print("="*80)
+        print(f"Autore: {record['author']}")
+        print(f"Data: {record['date']}")
+        print(f"Lunghezza: {record['contentLength']} caratteri\n")
+        print(record['content'])
     else:
         print(f"ERRORE: File recensione non trovato: {filename}")
 
@@ -258,7 +403,29 @@ def get_extraction_confirmation(title, year):
             print("\nUscita...")
             return 'quit'
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Ricerca TMDB ed estrazione recensioni MyMovies')
+    parser.add_argument('--api-key', help='TMDB API key (default: TMDB_API_KEY)')
+    parser.add_argument('--jsonl', nargs='?', const='-', metavar='FILE',
+                        help='Modalita non interattiva: record JSON per riga da FILE o stdin (vedi extract_pipeline.py)')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('MYMOVIES_BATCH_WORKERS', '4')),
+                        help='--jsonl: record elaborati in parallelo (default: 4)')
+    parser.add_argument('--in-flight', type=int, default=None,
+                        help='--jsonl: record letti e non ancora conclusi (default: 2 x workers)')
+    parser.add_argument('--rps', type=float, default=0.5,
+                        help='--jsonl: estrazioni/secondo verso mymovies.it (default: 0.5, 0 = nessun limite)')
+    parser.add_argument('--no-save', action='store_true', help='--jsonl: non salvare i file recensione')
+    parser.add_argument('--force', action='store_true', help='--jsonl: ignora la cache dei risultati')
+    parser.add_argument('--resolve-only', action='store_true',
+                        help='--jsonl: solo ricerca e risoluzione URL, senza estrazione')
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.jsonl:
+        from extract_pipeline import run_jsonl
+        sys.exit(run_jsonl(args))
+    
     print("MyMovies Smart Search & Extract")
     print("="*50)
     
@@ -266,7 +433,7 @@ def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     
     # Controlla API key
-    api_key = os.getenv('TMDB_API_KEY')
+    api_key = args.api_key or os.getenv('TMDB_API_KEY')
     if not api_key:
         print("\nTMDB API Key Setup:")
         print("1. Vai su https://www.themoviedb.org/settings/api")
@@ -276,15 +443,13 @@ def main():
         print("Oppure passa la key come argomento:")
         print("   python3 search_and_extract.py --api-key YOUR_KEY")
         
-        # Check se passata come argomento
-        if len(sys.argv) == 3 and sys.argv[1] == '--api-key':
-            api_key = sys.argv[2]
-        else:
-            sys.exit(1)
+        sys.exit(1)
     
     # Inizializza servizi
     tmdb = TMDBMovieSearch(api_key)
     extractor = MyMoviesExtractor(script_dir)
+    # Mappatura id TMDB -> pagina MyMovies nella stessa cache delle risposte TMDB
+    resolver = MyMoviesResolver(extractor.checker, cache=tmdb.cache)
     
     try:
         current_movies = []  # Mantieni l'ultimo elenco film
@@ -339,20 +504,18 @@ def main():
             # Controlla esistenza su MyMovies
             print(f"\nControllo disponibilita su MyMovies.it...")
             
-            if not extractor.check_film_exists(title, year):
-                print(f"ERRORE: '{title} ({year})' non trovato su MyMovies.it")
-                
-                # Prova con titolo originale se diverso
-                if selected_movie['original_title'] != title:
-                    print(f"Tentativo con titolo originale: {selected_movie['original_title']}")
-                    if extractor.check_film_exists(selected_movie['original_title'], year):
-                        title = selected_movie['original_title']
-                        print(f"Trovato con titolo originale!")
-                    else:
-                        print(f"ERRORE: Non trovato neanche con titolo originale")
-                        continue
-                else:
-                    continue
+            # Titolo localizzato e originale, anno TMDB e +-1: verifiche in parallelo, vince la prima conferma
+            resolved = resolver.resolve(title, year, selected_movie['original_title'], tmdb_id=selected_movie['id'])
+            
+            if not resolved['found']:
+                print(f"ERRORE: '{title} ({year})' non trovato su MyMovies.it (provati titolo originale e anno +-1)")
+                if resolved['error']:
+                    print(f"   Errore di rete: {resolved['error']}")
+                continue
+            
+            if (resolved['title'], str(resolved['year'])) != (title, str(year)):
+                print(f"Trovato su MyMovies.it come '{resolved['title']}' ({resolved['year']})")
+                title, year = resolved['title'], resolved['year']
             else:
                 print(f"Film trovato su MyMovies.it!")
             
@@ -367,7 +530,7 @@ def main():
                 result = extractor.extract_review(title, year)
                 
                 if result.get('status') == 'success':
-                    print(f"\nESTRAZIONE COMPLETATA!")
+                    print(f"\nESTRAZIONE COMPLETATA!" + (" (dalla cache)" if result.get('cached') else ""))
                     print(f"Film: {result.get('title', title)} ({year})")
                     print(f"Autore: {result.get('author', 'N/A')}")
                     print(f"Data: {result.get('date', 'N/A')}")
@@ -421,6 +584,8 @@ def main():
         print(f"\nUscita forzata. Arrivederci!")
     except Exception as e:
         print(f"ERRORE imprevisto: {e}")
+    finally:
+        extractor.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,188 @@
+const http = require('http');
+const path = require('path');
+const readline = require('readline');
+const { spawn } = require('child_process');
+const { registry } = require('./metrics');
+
+/**
+ * Client del servizio di ricerca Python (search_service.py)
+ *
+ * Il servizio resta attivo per tutta la vita di server.js: sessione TMDB, cache e indice
+ * full-text restano caldi e le richieste viaggiano su connessioni keep-alive riutilizzate.
+ * Con SEARCH_SERVICE_URL si usa un servizio gia avviato invece di lanciarne uno.
+ *
+ * Se il processo termina viene riavviato con attesa esponenziale (1s, 2s, 4s... fino a 30s),
+ * al massimo MAX_RESTARTS volte di seguito: oltre, il servizio resta non disponibile e solo la
+ * richiesta successiva prova un nuovo avvio. Durante l'attesa le richieste falliscono subito.
+ */
+
+const SERVICE_SCRIPT = path.join(__dirname, 'search_service.py');
+const START_TIMEOUT_MS = 15000;
+const REQUEST_TIMEOUT_MS = 30000;
+const RESTART_DELAY_MS = 1000;
+const MAX_RESTART_DELAY_MS = 30000;
+const MAX_RESTARTS = 5;
+
+const agent = new http.Agent({ keepAlive: true, maxSockets: 16 });
+const requestDuration = registry.histogram(
+    'mymovies_search_service_client_duration_seconds', 'Durata delle richieste di server.js al servizio di ricerca');
+
+class SearchServiceClient {
+    constructor(options = {}) {
+        this.externalUrl = options.url || process.env.SEARCH_SERVICE_URL || null;
+        this.port = options.port ?? parseInt(process.env.MYMOVIES_SEARCH_SERVICE_PORT || '0');
+        this.child = null;
+        this.ready = null;
+        this.stopped = false;
+        // Terminazioni consecutive (azzerate se il processo resta attivo oltre MAX_RESTART_DELAY_MS)
+        this.failures = 0;
+        this.restartTimer = null;
+    }
+
+    /**
+     * Avvia (una sola volta) il processo Python e attende la riga {"ready": true, "port": N}
+     */
+    start() {
+        if (this.externalUrl) return Promise.resolve(new URL(this.externalUrl));
+        if (this.ready) return this.ready;
+        if (this.restartTimer) return Promise.reject(new Error('Search service unavailable (restart pending)'));
+
+        this.ready = new Promise((resolve, reject) => {
+            let readyAt = null;
+            const child = spawn('python3', [SERVICE_SCRIPT, '--port', String(this.port)], {
+                cwd: __dirname,
+                stdio: ['ignore', 'pipe', 'inherit']
+            });
+            this.child = child;
+
+            const timer = setTimeout(() => {
+                reject(new Error('Search service did not start in time'));
+                child.kill();
+            }, START_TIMEOUT_MS);
+
+            readline.createInterface({ input: child.stdout }).once('line', line => {
+                clearTimeout(timer);
+                try {
+                    const { port } = JSON.parse(line);
+                    readyAt = Date.now();
+                    resolve(new URL(`http://127.0.0.1:${port}`));
+                } catch (error) {
+                    reject(new Error(`Unexpected search service output: ${line}`));
+                }
+            });
+
+            child.on('error', error => {
+                clearTimeout(timer);
+                reject(error);
+            });
+
+            child.on('exit', code => {
+                clearTimeout(timer);
+                reject(new Error(`Search service exited with code ${code}`));
+                this.child = null;
+                this.ready = null;
+                if (this.stopped) return;
+
+                if (readyAt && Date.now() - readyAt > MAX_RESTART_DELAY_MS) this.failures = 0;
+                this.failures++;
+                if (this.failures > MAX_RESTARTS) {
+                    console.error(`⚠️ Search service terminato (code ${code}) ${this.failures} volte di seguito: ` +
+                        'non disponibile, nuovo tentativo alla prossima richiesta');
+                    return;
+                }
+                const delay = Math.min(RESTART_DELAY_MS * 2 ** (this.failures - 1), MAX_RESTART_DELAY_MS);
+                console.error(`⚠️ Search service terminato (code ${code}), riavvio tra ${delay}ms ` +
+                    `(tentativo ${this.failures}/${MAX_RESTARTS})...`);
+                this.restartTimer = setTimeout(() => {
+                    this.restartTimer = null;
+                    this.start().catch(() => {});
+                }, delay);
+                this.restartTimer.unref();
+            });
+        });
+
+        return this.ready;
+    }
+
+    /**
+     * Richiesta JSON al servizio: restituisce { status, body } (con raw, body e il testo della risposta)
+     */
+    async request(method, pathname, payload = null, { raw = false } = {}) {
+        const baseUrl = await this.start();
+        const body = payload ? Buffer.from(JSON.stringify(payload)) : null;
+        const started = process.hrtime.bigint();
+        const labels = { path: pathname.split('?')[0] };
+
+        return new Promise((resolve, reject) => {
+            const req = http.request({
+                hostname: baseUrl.hostname,
+                port: baseUrl.port,
+                path: pathname,
+                method,
+                agent,
+                timeout: REQUEST_TIMEOUT_MS,
+                headers: body ? { 'Content-Type': 'application/json', 'Content-Length': body.length } : {}
+            }, res => {
+                const chunks = [];
+                res.on('data', chunk => chunks.push(chunk));
+                res.on('end', () => {
+                    requestDuration.observe(labels, Number(process.hrtime.bigint() - started) / 1e9);
+                    const text = Buffer.concat(chunks).toString('utf8');
+                    try {
+                        resolve({ status: res.statusCode, body: raw ? text : JSON.parse(text) });
+                    } catch (error) {
+                        reject(new Error('Invalid JSON from search service'));
+                    }
+                });
+            });
+            req.on('timeout', () => req.destroy(new Error('Search service timeout')));
+            req.on('error', reject);
+            req.end(body);
+        });
+    }
+
+    searchMovies(query, limit = 10) {
+        return this.request('POST', '/search', { query, limit });
+    }
+
+    suggestMovies(query, limit = 8) {
+        const params = new URLSearchParams({ q: query, limit: String(limit) });
+        return this.request('GET', `/typeahead?${params}`);
+    }
+
+    movieDirectors(ids) {
+        return this.request('GET', `/typeahead/directors?${new URLSearchParams({ ids: ids.join(',') })}`);
+    }
+
+    searchReviews(query, { limit = 20, year } = {}) {
+        const params = new URLSearchParams({ q: query, limit: String(limit) });
+        if (year) params.set('year', String(year));
+        return this.request('GET', `/reviews/search?${params}`);
+    }
+
+    metrics() {
+        return this.request('GET', '/metrics', null, { raw: true });
+    }
+
+    stop() {
+        this.stopped = true;
+        clearTimeout(this.restartTimer);
+        this.restartTimer = null;
+        if (this.child) this.child.kill();
+        agent.destroy();
+    }
+}
+
+let sharedClient = null;
+
+function getSearchService() {
+    if (!sharedClient) {
+        sharedClient = new SearchServiceClient();
+    }
+    return sharedClient;
+}
+
+module.exports = {
+    SearchServiceClient,
+    getSearchService
+};
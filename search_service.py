@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Servizio di ricerca persistente per server.js
+Tiene caldi TMDBMovieSearch (sessione keep-alive, cache TMDB) e l'indice full-text delle
+recensioni, invece di avviare un interprete Python per ogni richiesta.
+
+HTTP/1.1 con keep-alive su 127.0.0.1:
+  GET  /health
+  GET  /search?q=...&limit=10           ricerca film TMDB
+  POST /search {"query": ..., "limit": 10}
+  GET  /reviews/search?q=...&limit=20&year=2023
+  GET  /typeahead?q=...&limit=8            risultati leggeri (senza regista), vedi typeahead.py
+  GET  /typeahead/directors?ids=1,2,3      regista per id, per l'arricchimento successivo
+  GET  /metrics                            metriche Prometheus (testo), riportate dal /metrics di server.js
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from metrics import registry
+from review_search import ReviewSearchIndex
+from search_and_extract import TMDBMovieSearch
+from typeahead import TypeaheadSearch
+
+DEFAULT_PORT = int(os.getenv('MYMOVIES_SEARCH_SERVICE_PORT', '8765'))
+MAX_MOVIE_RESULTS = 20
+MAX_REVIEW_RESULTS = 100
+MAX_TYPEAHEAD_RESULTS = 20
+
+request_duration = registry.histogram(
+    'mymovies_search_service_request_duration_seconds', 'Durata delle richieste al servizio di ricerca')
+
+
+class SearchServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SearchService:
+    """Istanze condivise tra le richieste (create al primo uso)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tmdb = None
+        self._reviews = None
+        self._typeahead = None
+        self.started_at = time.time()
+        self.requests = 0
+
+    def tmdb(self):
+        with self._lock:
+            if self._tmdb is None:
+                if not os.getenv('TMDB_API_KEY'):
+                    raise SearchServiceError(503, 'TMDB_API_KEY not set')
+                self._tmdb = TMDBMovieSearch()
+            return self._tmdb
+
+    def typeahead(self):
+        tmdb = self.tmdb()
+        with self._lock:
+            if self._typeahead is None:
+                self._typeahead = TypeaheadSearch(tmdb)
+            return self._typeahead
+
+    def reviews(self):
+        with self._lock:
+            if self._reviews is None:
+                self._reviews = ReviewSearchIndex()
+            return self._reviews
+
+    def search_movies(self, query, limit=10):
+        if not query:
+            raise SearchServiceError(400, 'Query is required')
+        return self.tmdb().search_movies(query, max(1, min(int(limit), MAX_MOVIE_RESULTS)))
+
+    def suggest_movies(self, query, limit=8):
+        if not query:
+            return []
+        try:
+            return self.typeahead().suggest(query, max(1, min(int(limit), MAX_TYPEAHEAD_RESULTS)))
+        except requests.exceptions.RequestException as e:
+            raise SearchServiceError(502, f'TMDB error: {e}')
+
+    def movie_directors(self, ids):
+        movie_ids = [int(movie_id) for movie_id in ids.split(',') if movie_id.strip()][:MAX_TYPEAHEAD_RESULTS]
+        return self.typeahead().directors(movie_ids)
+
+    def search_reviews(self, query, limit=20, year=None):
+        if not query:
+            raise SearchServiceError(400, 'Query parameter q is required')
+        started = time.time()
+        results = self.reviews().search(query, limit=max(1, min(int(limit), MAX_REVIEW_RESULTS)), year=year)
+        return {
+            'query': query,
+            'results': results,
+            'total': len(results),
+            'elapsed_ms': round((time.time() - started) * 1000, 1)
+        }
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'requests': self.requests,
+            'tmdb_cache': self._tmdb.cache.stats() if self._tmdb and self._tmdb.cache else None,
+            'typeahead': dict(self._typeahead.stats) if self._typeahead else None
+        }
+
+
+class SearchRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1: la connessione resta aperta tra una richiesta e l'altra
+    protocol_version = 'HTTP/1.1'
+    # Header e corpo sono due write: senza TCP_NODELAY ogni risposta attende l'ACK ritardato
+    disable_nagle_algorithm = True
+    service = None
+
+    def log_message(self, format, *args):
+        if os.getenv('MYMOVIES_SEARCH_SERVICE_LOG'):
+            sys.stderr.write("%s - %s\n" % (self.address_string(), format % args))
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, handler):
+        self.service.requests += 1
+        with request_duration.time({'path': urlparse(self.path).path}):
+            try:
+                self._send_json(200, handler())
+            except SearchServiceError as e:
+                self._send_json(e.status, {'error': str(e)})
+            except (ValueError, TypeError) as e:
+                self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+
+    def _send_metrics(self):
+        body = registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if url.path == '/health':
+            self._dispatch(self.service.health)
+        elif url.path == '/metrics':
+            self._send_metrics()
+        elif url.path == '/search':
+            self._dispatch(lambda: self.service.search_movies(params.get('q', '').strip(), params.get('limit', 10)))
+        elif url.path == '/typeahead':
+            self._dispatch(lambda: self.service.suggest_movies(params.get('q', '').strip(), params.get('limit', 8)))
+        elif url.path == '/typeahead/directors':
+            self._dispatch(lambda: self.service.movie_directors(params.get('ids', '')))
+        elif url.path == '/reviews/search':
+            self._dispatch(lambda: self.service.search_reviews(
+                params.get('q', '').strip(), params.get('limit', 20), params.get('year')))
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            return self._send_json(400, {'error': 'Invalid JSON body'})
+
+        if url.path == '/search':
+            self._dispatch(lambda: self.service.search_movies((body.get('query') or '').strip(), body.get('limit', 10)))
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+
+def create_server(port=DEFAULT_PORT, host='127.0.0.1', service=None):
+    handler = type('BoundSearchRequestHandler', (SearchRequestHandler,), {'service': service or SearchService()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servizio di ricerca persistente (TMDB + recensioni)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help='Porta su 127.0.0.1 (default: 8765, 0 = porta libera)')
+    args = parser.parse_args()
+
+    server = create_server(args.port)
+    # Prima riga su stdout: server.js la usa per sapere che il servizio e pronto
+    print(json.dumps({'ready': True, 'port': server.server_address[1], 'pid': os.getpid()}), flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,146 @@
 const express = require('express');
 const path = require('path');
 const fs = require('fs');
-const { extractMovieReview } = require('./mymovies_extractor');
-const { exec } = require('child_process');
-const util = require('util');
+const { getExtractionQueue, QueueFullError } = require('./extraction_queue');
+const { getReviewIndex } = require('./review_index');
+const { getReviewStore, formatReviewText } = require('./review_store');
+const { getSearchService } = require('./search_service');
+const { registry } = require('./metrics');
 
 const app = express();
 const PORT = process.env.PORT || 3000;
-const execAsync = util.promisify(exec);
+const searchService = getSearchService();
+const extractionQueue = getExtractionQueue();
+const SSE_HEARTBEAT_MS = 15000;
+
+const httpDuration = registry.histogram(
+    'mymovies_http_request_duration_seconds', 'Durata delle richieste HTTP a server.js per route');
+registry.gauge('mymovies_queue_jobs', 'Job della coda di estrazione per stato', () => {
+    const stats = extractionQueue.stats();
+    return [[{ state: 'running' }, stats.running], [{ state: 'queued' }, stats.queued]];
+});
+registry.collectedCounter('mymovies_queue_events_total', 'Eventi cumulativi della coda di estrazione', () => {
+    const stats = extractionQueue.stats();
+    return ['submitted', 'cached', 'deduplicated', 'rejected', 'done', 'error']
+        .map(event => [{ event }, stats[event]]);
+});
 
 // Middleware
+app.use('/api', (req, res, next) => {
+    // Etichetta = route Express (/api/jobs/:id), non l'URL: una serie per endpoint
+    const started = process.hrtime.bigint();
+    res.on('finish', () => {
+        const route = req.route ? req.route.path : 'unmatched';
+        httpDuration.observe({ route, status: res.statusCode }, Number(process.hrtime.bigint() - started) / 1e9);
+    });
+    next();
+});
 app.use(express.json());
 app.use(express.static('public'));
 app.use('/reviews', express.static(path.join(__dirname, 'reviews')));
 
 // API Routes
 
-// Get all extracted reviews
-app.get('/api/reviews', (req, res) => {
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 500;
+
+function toReviewSummary(entry) {
+    return {
+        filename: entry.filename,
+        title: entry.title,
+        year: entry.year,
+        author: entry.author,
+        date: entry.date,
+        length: entry.length,
+        size: entry.size,
+        modified: new Date(entry.mtimeMs),
+        // Senza .txt (solo archivio strutturato) il testo si legge da /api/reviews/:filename
+        url: entry.path ? `/reviews/${entry.filename}` : `/api/reviews/${entry.filename}`
+    };
+}
+
+// Get extracted reviews (paginated, filtered, sorted)
+// Query: limit, cursor, year, author, title (prefix), sort=mtime|date|length, order=desc|asc, format=ndjson
+app.get('/api/reviews', async (req, res) => {
     const reviewsDir = path.join(__dirname, 'reviews');
+    const ndjson = req.query.format === 'ndjson';
     
     if (!fs.existsSync(reviewsDir)) {
-        return res.json({ reviews: [], total: 0 });
+        return ndjson ? res.type('application/x-ndjson').end() : res.json({ reviews: [], total: 0, nextCursor: null });
     }
     
     try {
-        const files = fs.readdirSync(reviewsDir)
-            .filter(file => file.endsWith('_review.txt'))
-            .map(file => {
-                const filePath = path.join(reviewsDir, file);
-                const stats = fs.statSync(filePath);
-                
-                // Parse filename to extract title and year
-                const match = file.match(/^(.+)_(\d{4})_review\.txt$/);
-                const title = match ? match[1].replace(/_/g, ' ') : file;
-                const year = match ? match[2] : 'Unknown';
-                
-                // Read first few lines to get metadata
-                const content = fs.readFileSync(filePath, 'utf8');
-                const lines = content.split('\n');
-                
-                let author = 'Unknown';
-                let date = 'Unknown';
-                let length = 0;
-                
-                for (const line of lines) {
-                    if (line.startsWith('Autore:')) {
-                        author = line.replace('Autore:', '').trim();
-                    } else if (line.startsWith('Data:')) {
-                        date = line.replace('Data:', '').trim();
-                    } else if (line.startsWith('Lunghezza:')) {
-                        const lengthMatch = line.match(/(\d+)/);
-                        length = lengthMatch ? parseInt(lengthMatch[1]) : 0;
-                    }
-                }
-                
-                return {
-                    filename: file,
-                    title,
-                    year,
-                    author,
-                    date,
-                    length,
-                    size: stats.size,
-                    modified: stats.mtime,
-                    url: `/reviews/${file}`
-                };
-            })
-            .sort((a, b) => new Date(b.modified) - new Date(a.modified));
+        const index = getReviewIndex(reviewsDir);
         
-        res.json({
-            reviews: files,
-            total: files.length
-        });
+        const requestedLimit = parseInt(req.query.limit);
+        const query = {
+            year: req.query.year,
+            author: req.query.author,
+            titlePrefix: req.query.title,
+            sort: req.query.sort,
+            order: req.query.order,
+            cursor: req.query.cursor,
+            // Lo stream NDJSON restituisce tutto salvo limit esplicito
+            limit: requestedLimit > 0 ? Math.min(requestedLimit, MAX_PAGE_SIZE) : (ndjson ? 0 : DEFAULT_PAGE_SIZE)
+        };
+        const page = index.query(query);
+        
+        if (!ndjson) {
+            return res.json({
+                reviews: page.items.map(toReviewSummary),
+                total: page.total,
+                nextCursor: page.nextCursor
+            });
+        }
+        
+        // Variante streaming: una recensione per riga, rispettando il backpressure
+        res.type('application/x-ndjson');
+        for (const entry of page.items) {
+            if (!res.write(JSON.stringify(toReviewSummary(entry)) + '\n')) {
+                await new Promise(resolve => res.once('drain', resolve));
+            }
+        }
+        res.end();
     } catch (error) {
+        if (res.headersSent) return res.end();
         res.status(500).json({ error: error.message });
     }
 });
 
+// Full-text search in the review texts (SQLite FTS5, see review_search.py)
+// Query: q, limit, year
+app.get('/api/reviews/search', async (req, res) => {
+    const q = (req.query.q || '').trim();
+
+    if (!q) {
+        return res.status(400).json({ error: 'Query parameter q is required' });
+    }
+
+    try {
+        const { status, body } = await searchService.searchReviews(q, {
+            limit: Math.min(parseInt(req.query.limit) || 20, 100),
+            year: req.query.year
+        });
+        res.status(status).json(body);
+    } catch (error) {
+        console.error('Review search error:', error);
+        res.status(503).json({ error: 'Review search service unavailable' });
+    }
+});
+
 // Get specific review content
 app.get('/api/reviews/:filename', (req, res) => {
     const filename = req.params.filename;
     const filePath = path.join(__dirname, 'reviews', filename);
     
     if (!fs.existsSync(filePath)) {
-        return res.status(404).json({ error: 'Review not found' });
+        // Senza export .txt la recensione e solo nell'archivio strutturato
+        const key = filename.replace(/_review\.txt$/, '');
+        const record = getReviewStore().get(key);
+        if (!record) {
+            return res.status(404).json({ error: 'Review not found' });
+        }
+        return res.json({ content: formatReviewText(record) });
     }
     
     try {
@@ -95,23 +151,103 @@ app.get('/api/reviews/:filename', (req, res) => {
     }
 });
 
-// Extract new review
-app.post('/api/extract', async (req, res) => {
-    const { title, year } = req.body;
+function isFinished(job) {
+    return job.status === 'done' || job.status === 'error';
+}
+
+function submitJob(req, res) {
+    const { title, year, noSave, force } = req.body;
     
     if (!title || !year) {
-        return res.status(400).json({ error: 'Title and year are required' });
+        res.status(400).json({ error: 'Title and year are required' });
+        return null;
     }
     
     try {
-        console.log(`Starting extraction for: ${title} (${year})`);
-        const result = await extractMovieReview(title, year, { headless: true });
-        
-        res.json(result);
+        return extractionQueue.submit(String(title), parseInt(year), { noSave: Boolean(noSave), force: Boolean(force) });
     } catch (error) {
-        console.error('Extraction error:', error);
-        res.status(500).json({ error: error.message });
+        if (!(error instanceof QueueFullError)) throw error;
+        res.status(429).set('Retry-After', '30').json({ error: error.message });
+        return null;
     }
+}
+
+// Extract new review (attende il job in coda: stessa risposta di extractMovieReview)
+// Un film gia in cache risponde subito con cached: true; force: true rifa l'estrazione
+app.post('/api/extract', (req, res) => {
+    const submitted = submitJob(req, res);
+    if (!submitted) return;
+    
+    console.log(`Starting extraction for: ${submitted.job.title} (${submitted.job.year}) [job ${submitted.job.id}]`);
+    
+    const respond = job => {
+        // Estrazione fallita: 500 con il risultato di extractMovieReview se disponibile
+        if (job.status === 'error') return res.status(500).json(job.result || { error: job.error });
+        res.json(job.result);
+    };
+    if (isFinished(submitted.job)) return respond(submitted.job);
+    
+    const onJob = job => {
+        if (job.id !== submitted.job.id || !isFinished(job)) return;
+        extractionQueue.off('job', onJob);
+        respond(job);
+    };
+    extractionQueue.on('job', onJob);
+    res.on('close', () => extractionQueue.off('job', onJob));
+});
+
+// Job di estrazione asincroni: 202 con id, stato in /api/jobs/:id, avanzamento SSE in /api/jobs/:id/events
+app.post('/api/jobs', (req, res) => {
+    const submitted = submitJob(req, res);
+    if (!submitted) return;
+    
+    const { job, deduplicated, cached } = submitted;
+    res.status(cached ? 200 : 202).json({
+        job,
+        deduplicated,
+        cached,
+        statusUrl: `/api/jobs/${job.id}`,
+        eventsUrl: `/api/jobs/${job.id}/events`
+    });
+});
+
+app.get('/api/jobs', (req, res) => {
+    res.json(extractionQueue.stats());
+});
+
+app.get('/api/jobs/:id', (req, res) => {
+    const job = extractionQueue.get(req.params.id);
+    if (!job) return res.status(404).json({ error: 'Job not found' });
+    res.json(job);
+});
+
+app.get('/api/jobs/:id/events', (req, res) => {
+    const job = extractionQueue.get(req.params.id);
+    if (!job) return res.status(404).json({ error: 'Job not found' });
+    
+    res.writeHead(200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive'
+    });
+    
+    const send = snapshot => res.write(`event: job\ndata: ${JSON.stringify(snapshot)}\n\n`);
+    send(job);
+    if (isFinished(job)) return res.end();
+    
+    const heartbeat = setInterval(() => res.write(': ping\n\n'), SSE_HEARTBEAT_MS);
+    const onJob = snapshot => {
+        if (snapshot.id !== job.id) return;
+        send(snapshot);
+        if (isFinished(snapshot)) res.end();
+    };
+    const cleanup = () => {
+        clearInterval(heartbeat);
+        extractionQueue.off('job', onJob);
+    };
+    
+    extractionQueue.on('job', onJob);
+    res.on('close', cleanup);
 });
 
 // Search movies using TMDB
@@ -123,29 +259,40 @@ app.post('/api/search', async (req, res) => {
     }
     
     try {
-        // Use Python search script
-        const { stdout } = await execAsync(`python3 -c "
-import sys
-sys.path.append('.')
-from search_and_extract import TMDBMovieSearch
-import json
-import os
-
-api_key = os.getenv('TMDB_API_KEY')
-if not api_key:
-    print(json.dumps({'error': 'TMDB_API_KEY not set'}))
-    sys.exit(1)
-
-tmdb = TMDBMovieSearch(api_key)
-results = tmdb.search_movies('${query.replace(/'/g, "\\'")}', 10)
-print(json.dumps(results))
-"`);
-        
-        const results = JSON.parse(stdout);
-        res.json(results);
+        // Servizio Python persistente (search_service.py): niente interprete per richiesta
+        const { status, body } = await searchService.searchMovies(query, 10);
+        res.status(status).json(body);
     } catch (error) {
         console.error('Search error:', error);
-        res.status(500).json({ error: 'Search failed. Make sure TMDB_API_KEY is set.' });
+        res.status(503).json({ error: 'Search service unavailable' });
+    }
+});
+
+// Typeahead: risultati leggeri mentre l'utente digita (cache per prefisso e richieste unite
+// nel servizio di ricerca), il regista arriva dopo da /api/typeahead/directors
+app.get('/api/typeahead', async (req, res) => {
+    const q = (req.query.q || '').trim();
+    if (!q) return res.json([]);
+
+    try {
+        const { status, body } = await searchService.suggestMovies(q, Math.min(parseInt(req.query.limit) || 8, 20));
+        res.status(status).json(body);
+    } catch (error) {
+        console.error('Typeahead error:', error);
+        res.status(503).json({ error: 'Search service unavailable' });
+    }
+});
+
+app.get('/api/typeahead/directors', async (req, res) => {
+    const ids = String(req.query.ids || '').split(',').filter(id => /^\d+$/.test(id));
+    if (ids.length === 0) return res.json({});
+
+    try {
+        const { status, body } = await searchService.movieDirectors(ids);
+        res.status(status).json(body);
+    } catch (error) {
+        console.error('Typeahead directors error:', error);
+        res.status(503).json({ error: 'Search service unavailable' });
     }
 });
 
@@ -163,37 +310,36 @@ app.get('/api/stats', (req, res) => {
     }
     
     try {
-        const files = fs.readdirSync(reviewsDir)
-            .filter(file => file.endsWith('_review.txt'))
-            .map(file => {
-                const filePath = path.join(reviewsDir, file);
-                const stats = fs.statSync(filePath);
-                return { file, size: stats.size, modified: stats.mtime };
-            });
-        
-        const totalSize = files.reduce((sum, f) => sum + f.size, 0);
-        const averageLength = files.length > 0 ? Math.round(totalSize / files.length) : 0;
-        
-        const recentExtractions = files
-            .sort((a, b) => new Date(b.modified) - new Date(a.modified))
-            .slice(0, 5)
-            .map(f => ({
-                filename: f.file,
-                size: f.size,
-                modified: f.modified
-            }));
+        const stats = getReviewIndex(reviewsDir).stats();
         
         res.json({
-            totalReviews: files.length,
-            totalSize,
-            averageLength,
-            recentExtractions
+            totalReviews: stats.totalReviews,
+            totalSize: stats.totalSize,
+            averageLength: stats.averageLength,
+            recentExtractions: stats.recent.map(entry => ({
+                filename: entry.filename,
+                size: entry.size,
+                modified: new Date(entry.mtimeMs)
+            }))
         });
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 });
 
+// Metriche Prometheus: fasi di estrazione, coda e HTTP di questo processo, piu quelle del
+// servizio di ricerca Python (omesse se il servizio non risponde)
+app.get('/metrics', async (req, res) => {
+    let text = registry.render();
+    try {
+        const { status, body } = await searchService.metrics();
+        if (status === 200) text += body;
+    } catch (error) {
+        // Servizio non disponibile: solo le metriche locali
+    }
+    res.type('text/plain; version=0.0.4').send(text);
+});
+
 // Serve main page
 app.get('/', (req, res) => {
     res.sendFile(path.join(__dirname, 'public', 'index.html'));
@@ -201,6 +347,8 @@ app.get('/', (req, res) => {
 
 // Start server
 app.listen(PORT, () => {
+    // Avvio anticipato: la prima ricerca non paga l'avvio dell'interprete
+    searchService.start().catch(error => console.error('Search service start failed:', error.message));
     console.log(`🎬 MyMovies Extractor Server running on http://localhost:${PORT}`);
     console.log(`📁 Reviews directory: ${path.join(__dirname, 'reviews')}`);
     console.log(`🔧 API endpoints available at /api/*`);
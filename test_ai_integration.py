@@ -8,10 +8,16 @@ import subprocess
 import json
 import os
 import time
+import urllib.parse
+import urllib.request
+
+from review_index import ReviewIndex
 
 class MyMoviesAI:
-    def __init__(self, wrapper_path="./ai_wrapper.sh"):
+    def __init__(self, wrapper_path="./ai_wrapper.sh", server_url=None):
         self.wrapper = wrapper_path
+        self.server_url = (server_url or os.getenv('MYMOVIES_SERVER_URL', 'http://localhost:3000')).rstrip('/')
+        self.reviews_dir = os.path.join(os.path.dirname(os.path.abspath(wrapper_path)), 'reviews')
         
     def _execute_command(self, cmd):
         """Esegue comando e restituisce risultato JSON"""
@@ -42,45 +48,53 @@ class MyMoviesAI:
         cmd = f'{self.wrapper} stats --json'
         return self._execute_command(cmd)
     
+    def iter_reviews(self, page_size=50, year=None, author=None, title=None, sort='mtime', order='desc'):
+        """Itera le recensioni da /api/reviews scaricando le pagine solo quando servono"""
+        params = {'limit': page_size, 'sort': sort, 'order': order}
+        for key, value in (('year', year), ('author', author), ('title', title)):
+            if value:
+                params[key] = value
+        
+        cursor = None
+        while True:
+            if cursor:
+                params['cursor'] = cursor
+            url = f"{self.server_url}/api/reviews?{urllib.parse.urlencode(params)}"
+            with urllib.request.urlopen(url, timeout=30) as response:
+                page = json.loads(response.read().decode('utf-8'))
+            
+            yield from page.get('reviews', [])
+            
+            cursor = page.get('nextCursor')
+            if not cursor:
+                break
+    
     def analyze_available_reviews(self):
         """Analizza le recensioni già estratte"""
-        stats = self.get_stats()
-        if stats.get('status') == 'error':
-            return stats
+        # L'indice unisce i .txt e le recensioni solo nell'archivio strutturato (nessun testo letto)
+        entries = ReviewIndex(self.reviews_dir).list()
+        successful = [entry for entry in entries if entry['size'] > 100]
             
         analysis = {
-            "total_reviews": stats.get('successful_extractions', 0),
-            "total_size_mb": round(stats.get('total_size_bytes', 0) / 1024 / 1024, 2),
+            "total_reviews": len(successful),
+            "total_size_mb": round(sum(entry['size'] for entry in entries) / 1024 / 1024, 2),
             "films_by_year": {},
             "average_length": 0
         }
         
-        # Analizza file per anno
-        for file_info in stats.get('recent_files', []):
-            filename = file_info.get('filename', '')
-            if '_review.txt' in filename:
-                # Estrai anno dal filename
-                parts = filename.split('_')
-                year = None
-                for part in parts:
-                    if part.isdigit() and len(part) == 4:
-                        year = part
-                        break
-                
-                if year:
-                    if year not in analysis['films_by_year']:
-                        analysis['films_by_year'][year] = []
-                    
-                    title = filename.replace(f'_{year}_review.txt', '').replace('_', ' ').title()
-                    analysis['films_by_year'][year].append({
-                        "title": title,
-                        "size_bytes": file_info.get('size_bytes', 0)
-                    })
+        # Analizza recensioni per anno dall'indice dei metadati
+        for entry in successful:
+            year = entry['year']
+            analysis['films_by_year'].setdefault(year, []).append({
+                "title": entry['filmTitle'],
+                "author": entry['author'],
+                "length": entry['length'],
+                "size_bytes": entry['size']
+            })
         
         # Calcola lunghezza media
-        total_bytes = sum(f.get('size_bytes', 0) for files in analysis['films_by_year'].values() for f in files)
-        total_count = sum(len(files) for files in analysis['films_by_year'].values())
-        analysis['average_length'] = round(total_bytes / total_count) if total_count > 0 else 0
+        total_bytes = sum(entry['size'] for entry in successful)
+        analysis['average_length'] = round(total_bytes / len(successful)) if successful else 0
         
         return analysis
 
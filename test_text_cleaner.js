@@ -0,0 +1,117 @@
+#!/usr/bin/env node
+
+/**
+ * Test del cleaner (text_cleaner.js) sulle pagine di fixtures/text_cleaner/
+ *
+ * - parita con la catena di replace usata prima di text_cleaner.js (legacyCleanReviewContent):
+ *   stesso output sulla pagina intera e sulle finestre che parseReviewHTML passa al cleaner,
+ *   tranne per le pagine con una "divergence" documentata in cases.json
+ * - output atteso (<pagina>.expected.txt) della finestra usata da parseReviewHTML
+ *
+ * Uso: node --test test_text_cleaner.js
+ *      UPDATE_FIXTURES=1 node --test test_text_cleaner.js   (riscrive gli .expected.txt)
+ */
+
+const test = require('node:test');
+const assert = require('node:assert');
+const fs = require('fs');
+const path = require('path');
+const { cleanReviewContent } = require('./text_cleaner');
+
+const FIXTURES_DIR = path.join(__dirname, 'fixtures', 'text_cleaner');
+const cases = JSON.parse(fs.readFileSync(path.join(FIXTURES_DIR, 'cases.json'), 'utf8'));
+
+/**
+ * Implementazione precedente, riportata senza modifiche come riferimento
+ */
+function legacyCleanReviewContent(rawContent, metadata) {
+    if (!rawContent) return '';
+
+    let cleaned = rawContent
+        .replace(/<script[^>]*>.*?<\/script>/gis, '')
+        .replace(/<style[^>]*>.*?<\/style>/gis, '')
+        .replace(/<[^>]+>/g, ' ')
+        .replace(/&[a-z]+;/gi, ' ')
+        .replace(/\s+/g, ' ')
+        .trim();
+
+    if (metadata.author) {
+        cleaned = cleaned.replace(new RegExp(`Recensione di\\s+${metadata.author}`, 'gi'), '');
+    }
+
+    if (metadata.date) {
+        cleaned = cleaned.replace(new RegExp(metadata.date, 'gi'), '');
+    }
+
+    const cleanPatterns = [
+        /^[a-z_]+\"?>\s*/i,
+        /&#x[0-9A-F]+;/g,
+        /Il tuo commento è stato registrato\.[\s\S]*$/i,
+        /Convalida adesso il tuo inserimento\.[\s\S]*$/i,
+        /Overview di [^.]+\s+(lunedì|martedì|mercoledì|giovedì|venerdì|sabato|domenica)[\s\S]*$/i,
+        /<input[^>]*>[\s\S]*$/i,
+        /\s*<[^>]*>[\s\S]*$/i,
+        /MYmovies\.it/gi,
+        /Film \(\d{4}\)/gi,
+        /^={10,}$/gm,
+        /^-{10,}$/gm
+    ];
+
+    for (const pattern of cleanPatterns) {
+        cleaned = cleaned.replace(pattern, '');
+    }
+
+    return cleaned.trim();
+}
+
+/**
+ * Input che il cleaner riceve in produzione: le finestre di parseReviewHTML
+ * (200 caratteri prima del paragrafo, 8000 dopo) e il documento intero
+ */
+function cleanerInputs(html) {
+    const inputs = [];
+    for (const marker of ['<p class="corpo">', 'class="corpo"']) {
+        const index = html.indexOf(marker);
+        if (index !== -1) {
+            inputs.push({ name: `finestra ${marker}`, text: html.substring(Math.max(0, index - 200), index + 8000) });
+        }
+    }
+    inputs.push({ name: 'documento', text: html });
+    return inputs;
+}
+
+for (const [filename, metadata] of Object.entries(cases)) {
+    const html = fs.readFileSync(path.join(FIXTURES_DIR, filename), 'utf8');
+    const inputs = cleanerInputs(html);
+
+    test(`${filename}: parita con il cleaner precedente`, () => {
+        const diverging = [];
+        for (const input of inputs) {
+            let legacy;
+            try {
+                legacy = legacyCleanReviewContent(input.text, metadata);
+            } catch (error) {
+                legacy = `ERRORE: ${error.message}`;
+            }
+            const current = cleanReviewContent(input.text, metadata);
+            if (metadata.divergence) {
+                if (legacy !== current) diverging.push(input.name);
+            } else {
+                assert.strictEqual(current, legacy, `${input.name}: output diverso dal cleaner precedente`);
+            }
+        }
+        // Divergenza documentata: se sparisce, cases.json e la documentazione vanno aggiornati
+        if (metadata.divergence) {
+            assert.ok(diverging.length > 0, `divergenza documentata non piu riprodotta: ${metadata.divergence}`);
+        }
+    });
+
+    test(`${filename}: output atteso`, () => {
+        const expectedPath = path.join(FIXTURES_DIR, `${filename}.expected.txt`);
+        const current = cleanReviewContent(inputs[0].text, metadata) + '\n';
+        if (process.env.UPDATE_FIXTURES === '1') {
+            fs.writeFileSync(expectedPath, current, 'utf8');
+        }
+        assert.strictEqual(current, fs.readFileSync(expectedPath, 'utf8'));
+    });
+}
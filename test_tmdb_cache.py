@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test della cache TMDB contro il server finto di benchmark/mock_servers.py
+Hit/miss, scadenza TTL ed eviction LRU oltre il limite.
+
+Uso: python3 -m pytest test_tmdb_cache.py  (oppure python3 test_tmdb_cache.py)
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from benchmark.mock_servers import MockConfig, start_mock_servers
+from search_and_extract import TMDBMovieSearch
+from tmdb_cache import LOW_WATER_RATIO, TMDBCache
+
+
+class TMDBCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config = MockConfig(latency_ms=0, jitter_ms=0, films=50)
+        cls.tmdb_url, _, cls.servers = start_mock_servers(cls.config)
+
+    @classmethod
+    def tearDownClass(cls):
+        for server in cls.servers:
+            server.shutdown()
+            server.server_close()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.env = mock.patch.dict(os.environ, {'TMDB_BASE_URL': self.tmdb_url, 'TMDB_RATE_LIMIT': '0'})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_search(self, **cache_options):
+        cache = TMDBCache(os.path.join(self.tmp_dir, 'tmdb_cache.sqlite3'), **cache_options)
+        self.addCleanup(cache.close)
+        return TMDBMovieSearch(api_key='test', cache=cache)
+
+    def tmdb_requests(self):
+        with self.config.lock:
+            return self.config.counters['tmdb']
+
+    def test_hit_after_miss(self):
+        tmdb = self.make_search()
+        title = self.config.catalog[0]['title']
+        before = self.tmdb_requests()
+
+        first, _ = tmdb.search_movies_light(title)
+        second, _ = tmdb.search_movies_light(title)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.tmdb_requests() - before, 1)
+        self.assertEqual((tmdb.cache.hits, tmdb.cache.misses), (1, 1))
+
+    def test_key_ignores_api_key(self):
+        params = {'query': 'dune', 'language': 'it-IT'}
+        self.assertEqual(TMDBCache.make_key('/search/movie', {**params, 'api_key': 'a'}),
+                         TMDBCache.make_key('/search/movie', {**params, 'api_key': 'b'}))
+
+    def test_expired_entry_is_refetched(self):
+        tmdb = self.make_search(search_ttl=1)
+        title = self.config.catalog[1]['title']
+        before = self.tmdb_requests()
+
+        tmdb.search_movies_light(title)
+        with mock.patch('tmdb_cache.time.time', return_value=time.time() + 2):
+            tmdb.search_movies_light(title)
+
+        self.assertEqual(self.tmdb_requests() - before, 2)
+        self.assertEqual((tmdb.cache.hits, tmdb.cache.misses), (0, 2))
+
+    def test_details_use_details_ttl(self):
+        tmdb = self.make_search(search_ttl=1)
+        movie_id = self.config.catalog[2]['id']
+
+        tmdb.get_movies_details([movie_id])
+        with mock.patch('tmdb_cache.time.time', return_value=time.time() + 2):
+            tmdb.get_movies_details([movie_id])
+
+        self.assertEqual(tmdb.cache.hits, 1)
+
+    def test_eviction_down_to_low_water_mark(self):
+        cache = TMDBCache(os.path.join(self.tmp_dir, 'lru.sqlite3'), max_entries=20)
+        self.addCleanup(cache.close)
+
+        for i in range(30):
+            cache.set('/search/movie', {'query': f'film {i}'}, {'results': [i]})
+        cache.get('/search/movie', {'query': 'film 0'})
+        for i in range(30, 50):
+            cache.set('/search/movie', {'query': f'film {i}'}, {'results': [i]})
+
+        stats = cache.stats()
+        self.assertLessEqual(stats['entries'], cache.max_entries)
+        self.assertGreaterEqual(stats['entries'], int(cache.max_entries * LOW_WATER_RATIO))
+        self.assertGreater(stats['evictions'], 0)
+        self.assertIsNotNone(cache.get('/search/movie', {'query': 'film 49'}))
+        self.assertIsNone(cache.get('/search/movie', {'query': 'film 1'}))
+
+
+if __name__ == "__main__":
+    unittest.main()
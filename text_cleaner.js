@@ -0,0 +1,141 @@
+/**
+ * Pulizia recensioni e normalizzazione titoli (condiviso da extractor, worker e server)
+ * Pattern compilati una sola volta; l'HTML viene ridotto a testo con un'unica scansione.
+ * Le regole di normalizzazione sono le stesse di text_cleaner.py.
+ */
+
+// Caratteri speciali (stesse regole di ACCENT_TABLE in text_cleaner.py)
+const ACCENT_MAP = {
+    'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'ä': 'a', 'å': 'a',
+    'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
+    'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
+    'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o', 'ö': 'o', 'ø': 'o',
+    'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
+    'ý': 'y', 'ÿ': 'y', 'ñ': 'n', 'ç': 'c'
+};
+const ACCENT_PATTERN = /[àáâãäåèéêëìíîïòóôõöøùúûüýÿñç]/g;
+const NON_SLUG_PATTERN = /[^a-z0-9\s]/g;
+const WHITESPACE_PATTERN = /\s+/g;
+const EDGE_DASHES_PATTERN = /^-+|-+$/g;
+
+// Blocchi eliminati senza lasciare spazi
+const SCRIPT_STYLE_PATTERN = /<script[^>]*>.*?<\/script>|<style[^>]*>.*?<\/style>/gis;
+
+// Sequenze di tag, entita e spazi (collassate in un unico spazio). Un singolo spazio
+// tra due parole non corrisponde: il testo normale non genera sostituzioni.
+const MARKUP_TOKEN = String.raw`<[^>]+>|&[a-z]+;|\s`;
+const MARKUP_RUN_PATTERN = new RegExp(
+    `(?:${MARKUP_TOKEN})(?:${MARKUP_TOKEN})+|<[^>]+>|&[a-z]+;|[^\\S ]`, 'gi'
+);
+
+// Rimuovi contenuto non pertinente (applicati in ordine sul testo gia compatto).
+// trigger: sottostringa senza la quale il pattern non puo corrispondere, per saltarlo
+const CLEAN_PATTERNS = [
+    // HTML artifacts all'inizio
+    { pattern: /^[a-z_]+\"?>\s*/i },  // Rimuove "a_lg"> e simili all'inizio
+    { pattern: /&#x[0-9A-F]+;/g, trigger: '&#x' },  // Codici HTML hex
+
+    // Form di commenti
+    { pattern: /Il tuo commento è stato registrato\.[\s\S]*$/i },
+    { pattern: /Convalida adesso il tuo inserimento\.[\s\S]*$/i },
+
+    // Overview aggiuntivi
+    { pattern: /Overview di [^.]+\s+(lunedì|martedì|mercoledì|giovedì|venerdì|sabato|domenica)[\s\S]*$/i },
+
+    // HTML e artifacts finali
+    { pattern: /<input[^>]*>[\s\S]*$/i, trigger: '<' },
+    { pattern: /\s*<[^>]*>[\s\S]*$/i, trigger: '<' },
+
+    // Metadata del sito
+    { pattern: /MYmovies\.it/gi },
+    { pattern: /Film \(\d{4}\)/gi, trigger: ' (' },
+
+    // Linee separatrici
+    { pattern: /^={10,}$/gm, trigger: '='.repeat(10) },
+    { pattern: /^-{10,}$/gm, trigger: '-'.repeat(10) }
+];
+
+const METADATA_PATTERN_CACHE_SIZE = 256;
+const metadataPatternCache = new Map();
+
+function escapeRegExp(text) {
+    return text.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+}
+
+/**
+ * RegExp (gi) per rimuovere autore/data dal testo, con i valori trattati come testo letterale
+ */
+function metadataPattern(prefix, value) {
+    const key = `${prefix}\u0000${value}`;
+    let pattern = metadataPatternCache.get(key);
+    if (!pattern) {
+        if (metadataPatternCache.size >= METADATA_PATTERN_CACHE_SIZE) {
+            metadataPatternCache.delete(metadataPatternCache.keys().next().value);
+        }
+        pattern = new RegExp(prefix + escapeRegExp(value), 'gi');
+        metadataPatternCache.set(key, pattern);
+    }
+    return pattern;
+}
+
+/**
+ * Normalizza il titolo del film per creare URL MyMovies validi
+ */
+function normalizeFilmTitle(title) {
+    return title
+        .toLowerCase()
+        .replace(ACCENT_PATTERN, char => ACCENT_MAP[char])
+        .replace(NON_SLUG_PATTERN, '')       // Rimuovi caratteri speciali
+        .replace(WHITESPACE_PATTERN, '-')    // Spazi -> trattini
+        .replace(EDGE_DASHES_PATTERN, '');   // Rimuovi trattini all'inizio/fine
+}
+
+/**
+ * HTML -> testo su una riga: tag (<[^>]+>), entita (&[a-z]+;) e spazi diventano un solo spazio,
+ * script/style spariscono, nessuno spazio ai bordi. Equivale alla vecchia catena di replace
+ * globali seguita da trim(), ma il markup viene tokenizzato in una sola passata.
+ *
+ * Divergenza nota: se un blocco <style> contiene '<script' prima di </style>, qui lo stile viene
+ * rimosso intero (scansione unica da sinistra); la vecchia catena toglieva prima gli script e
+ * cancellava dal '<script' interno fino al </script> successivo, testo compreso.
+ * Verificata da test_text_cleaner.js sulle pagine di fixtures/text_cleaner/.
+ */
+function htmlToText(html) {
+    return html
+        .replace(SCRIPT_STYLE_PATTERN, '')
+        .replace(MARKUP_RUN_PATTERN, ' ')
+        .trim();
+}
+
+/**
+ * Pulisce e valida il contenuto della recensione
+ * Autore e data sono rimossi come testo letterale (prima erano interpretati come regex).
+ */
+function cleanReviewContent(rawContent, metadata = {}) {
+    if (!rawContent) return '';
+
+    let cleaned = htmlToText(rawContent);
+
+    // Rimuovi metadata che potrebbero essere incluse nel testo
+    if (metadata.author) {
+        cleaned = cleaned.replace(metadataPattern('Recensione di\\s+', metadata.author), '');
+    }
+
+    if (metadata.date) {
+        cleaned = cleaned.replace(metadataPattern('', metadata.date), '');
+    }
+
+    for (const { pattern, trigger } of CLEAN_PATTERNS) {
+        if (trigger && !cleaned.includes(trigger)) continue;
+        cleaned = cleaned.replace(pattern, '');
+    }
+
+    return cleaned.trim();
+}
+
+module.exports = {
+    normalizeFilmTitle,
+    cleanReviewContent,
+    htmlToText,
+    escapeRegExp
+};
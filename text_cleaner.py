@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Normalizzazione titoli condivisa (stesse regole di text_cleaner.js)
+Tabella di traduzione per gli accenti e pattern compilati una sola volta
+"""
+
+import re
+
+# Caratteri speciali (stesse regole di ACCENT_MAP in text_cleaner.js)
+ACCENT_REPLACEMENTS = {
+    'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'ä': 'a', 'å': 'a',
+    'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
+    'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
+    'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o', 'ö': 'o', 'ø': 'o',
+    'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
+    'ý': 'y', 'ÿ': 'y', 'ñ': 'n', 'ç': 'c'
+}
+ACCENT_TABLE = str.maketrans(ACCENT_REPLACEMENTS)
+
+NON_SLUG_PATTERN = re.compile(r'[^a-z0-9\s]')
+
+
+def fold_accents(text):
+    """Minuscolo e senza accenti, come la prima fase di normalize_title_py"""
+    text = text.lower()
+    return text if text.isascii() else text.translate(ACCENT_TABLE)
+
+
+def normalize_title_py(title):
+    """Normalizza il titolo come normalizeFilmTitle in text_cleaner.js"""
+    # Restano solo [a-z0-9] e spazi: split/join equivale a \s+ -> '-' senza trattini ai bordi
+    return '-'.join(NON_SLUG_PATTERN.sub('', fold_accents(title)).split())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Cache persistente su disco per le risposte TMDB
+Un singolo file SQLite con TTL per tipo di endpoint ed eviction LRU
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'tmdb_cache.sqlite3')
+
+# Risultati di ricerca cambiano spesso, dettagli e credits quasi mai
+DEFAULT_SEARCH_TTL = 6 * 3600
+DEFAULT_DETAILS_TTL = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 20000
+# L'eviction LRU scatta solo oltre il limite e scende fino al 90%, cosi non si ripete a ogni set()
+LOW_WATER_RATIO = 0.9
+EVICTION_CHECK_INTERVAL = 100
+# Elenchi che cambiano ogni giorno: stessa durata dei risultati di ricerca
+LIST_ENDPOINTS = ('/movie/now_playing', '/movie/upcoming')
+
+# Parametri che non identificano la risposta
+IGNORED_PARAMS = {'api_key'}
+
+
+class TMDBCache:
+    def __init__(self, path=None, search_ttl=None, details_ttl=None, max_entries=None):
+        self.path = path or os.getenv('TMDB_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.search_ttl = search_ttl if search_ttl is not None else int(os.getenv('TMDB_CACHE_SEARCH_TTL', DEFAULT_SEARCH_TTL))
+        self.details_ttl = details_ttl if details_ttl is not None else int(os.getenv('TMDB_CACHE_DETAILS_TTL', DEFAULT_DETAILS_TTL))
+        self.max_entries = max_entries or int(os.getenv('TMDB_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # COUNT(*) ogni N inserimenti: il limite puo essere superato al massimo di N-1 voci
+        self._check_every = max(1, min(EVICTION_CHECK_INTERVAL, self.max_entries // 10))
+        self._sets_since_check = 0
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)')
+
+    @staticmethod
+    def make_key(endpoint, params):
+        """Chiave stabile da endpoint e parametri (lingua inclusa, api_key esclusa)"""
+        relevant = {k: v for k, v in (params or {}).items() if k not in IGNORED_PARAMS}
+        return f"{endpoint}?{json.dumps(relevant, sort_keys=True, default=str)}"
+
+    def ttl_for(self, endpoint):
+        """TTL in secondi in base al tipo di endpoint"""
+        return self.search_ttl if endpoint.startswith('/search') or endpoint in LIST_ENDPOINTS else self.details_ttl
+
+    def get(self, endpoint, params):
+        """Restituisce la risposta in cache o None se assente/scaduta"""
+        key = self.make_key(endpoint, params)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute('SELECT value, expires_at FROM entries WHERE key = ?', (key,)).fetchone()
+
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self.misses += 1
+                return None
+
+            self._conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, endpoint, params, value, ttl=None):
+        """Salva una risposta; ogni N inserimenti applica il limite di dimensione (LRU)"""
+        key = self.make_key(endpoint, params)
+        now = time.time()
+        ttl = self.ttl_for(endpoint) if ttl is None else ttl
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries (key, endpoint, value, expires_at, last_access) VALUES (?, ?, ?, ?, ?)',
+                (key, endpoint, json.dumps(value), now + ttl, now)
+            )
+            self._sets_since_check += 1
+            if self._sets_since_check >= self._check_every:
+                self._sets_since_check = 0
+                self._evict()
+
+    def _evict(self):
+        """Oltre max_entries elimina le voci usate meno di recente fino al 90% del limite (sotto lock)"""
+        if self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0] <= self.max_entries:
+            return
+        self.evictions += self._conn.execute(
+            'DELETE FROM entries WHERE key IN '
+            '(SELECT key FROM entries ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+            (int(self.max_entries * LOW_WATER_RATIO),)
+        ).rowcount
+
+    def purge_expired(self):
+        """Rimuove le voci scadute"""
+        with self._lock:
+            return self._conn.execute('DELETE FROM entries WHERE expires_at < ?', (time.time(),)).rowcount
+
+    def clear(self):
+        """Svuota la cache e azzera i contatori"""
+        with self._lock:
+            self._conn.execute('DELETE FROM entries')
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Contatori hit/miss e numero di voci"""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'path': self.path
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    cache = TMDBCache()
+    if len(sys.argv) > 1 and sys.argv[1] == 'clear':
+        cache.clear()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'purge':
+        print(json.dumps({'purged': cache.purge_expired()}))
+    print(json.dumps(cache.stats(), indent=2))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Ricerca typeahead sopra TMDBMovieSearch (usata da search_service.py)
+
+- risultati leggeri subito (solo /search/movie), regista caricato dopo con directors()
+- cache in memoria per prefisso: se "dun" ha restituito l'insieme completo dei risultati,
+  "dune" e "dune p" si filtrano in locale senza chiamare TMDB
+- richieste identiche in corso vengono unite in una sola chiamata a TMDB
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from text_cleaner import fold_accents
+
+CACHE_SIZE = 512
+CACHE_TTL = 600
+# Risultati per chiamata a TMDB (una pagina): tenuti tutti per poter filtrare i prefissi successivi
+PAGE_SIZE = 20
+
+
+def normalize_query(query):
+    return ' '.join(fold_accents(query.lower()).split())
+
+
+def _matches(movie, tokens):
+    """Ogni parola della query e prefisso di una parola del titolo (localizzato o originale)"""
+    words = fold_accents(f"{movie['title']} {movie['original_title']}".lower()).split()
+    return all(any(word.startswith(token) for word in words) for token in tokens)
+
+
+class TypeaheadSearch:
+    def __init__(self, tmdb, cache_size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.tmdb = tmdb
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._cache = OrderedDict()  # query normalizzata -> (scadenza, film, completo)
+        self._inflight = {}          # query normalizzata -> Future
+        self._lock = threading.Lock()
+        self.stats = {'upstream': 0, 'cache_hits': 0, 'prefix_hits': 0, 'coalesced': 0}
+
+    def _cached(self, key):
+        """Voce esatta o, se completa, derivata dal prefisso in cache piu lungo"""
+        now = time.time()
+        entry = self._cache.get(key)
+        if entry and entry[0] > now:
+            self._cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return entry[1]
+
+        tokens = key.split(' ')
+        for end in range(len(key) - 1, 0, -1):
+            entry = self._cache.get(key[:end])
+            if entry and entry[0] > now and entry[2]:
+                self.stats['prefix_hits'] += 1
+                movies = [movie for movie in entry[1] if _matches(movie, tokens)]
+                self._store(key, movies, True)
+                return movies
+        return None
+
+    def _store(self, key, movies, complete):
+        self._cache[key] = (time.time() + self.ttl, movies, complete)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def suggest(self, query, limit=8):
+        """Film leggeri (director=None) per la query digitata finora"""
+        key = normalize_query(query)
+        if not key:
+            return []
+
+        with self._lock:
+            movies = self._cached(key)
+            if movies is not None:
+                return movies[:limit]
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.stats['upstream'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not owner:
+            return future.result()[:limit]
+
+        try:
+            movies, total = self.tmdb.search_movies_light(key, PAGE_SIZE)
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # Completo: TMDB non ha altri risultati oltre questa pagina
+            self._store(key, movies, total <= len(movies))
+            del self._inflight[key]
+        future.set_result(movies)
+        return movies[:limit]
+
+    def directors(self, movie_ids):
+        """Registi per id (arricchimento dopo i risultati leggeri; i dettagli passano dalla cache TMDB)"""
+        details = self.tmdb.get_movies_details(movie_ids)
+        return {str(movie_id): info.get('director', 'N/A') for movie_id, info in zip(movie_ids, details)}